@@ -1,9 +1,12 @@
 from collections import defaultdict
 from datetime import datetime
+import hashlib
+import json
 import logging
 import random
 
 from django.conf import settings
+from lxml import etree
 from lxml.builder import E
 
 from casexml.apps.phone.fixtures import FixtureProvider
@@ -13,16 +16,26 @@ from corehq.apps.app_manager.suite_xml.features.mobile_ucr import is_valid_mobil
 from corehq.apps.userreports.reports.filters.factory import ReportFilterFactory
 from corehq.util.xml_utils import serialize
 
-from corehq.apps.userreports.const import UCR_ES_BACKEND, UCR_LABORATORY_BACKEND, UCR_SUPPORT_BOTH_BACKENDS
+from corehq.apps.userreports.const import (
+    UCR_ES_BACKEND,
+    UCR_LABORATORY_BACKEND,
+    UCR_SQL_BACKEND,
+    UCR_SUPPORT_BOTH_BACKENDS,
+)
 from corehq.apps.userreports.exceptions import UserReportsError, ReportConfigurationNotFoundError
 from corehq.apps.userreports.models import get_report_config
 from corehq.apps.userreports.reports.factory import ReportFactory
 from corehq.apps.userreports.tasks import compare_ucr_dbs
+from corehq.apps.userreports.util import get_data_source_version
 from corehq.apps.app_manager.dbaccessors import get_apps_in_domain, get_brief_apps_in_domain, get_apps_by_id
+from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
 
 
 MOBILE_UCR_RANDOM_THRESHOLD = 1000
 
+MOBILE_UCR_ROWS_CACHE_KEY_PREFIX = 'mobile-ucr-rows'
+MOBILE_UCR_ROWS_CACHE_TIMEOUT = 24 * 60 * 60
+
 
 def _should_sync(restore_state):
     last_sync_log = restore_state.last_sync_log
@@ -130,12 +143,12 @@ class ReportFixturesProvider(FixtureProvider):
         }
         data_source.set_filter_values(filter_values)
         data_source.defer_filters(defer_filters)
-        filter_options_by_field = defaultdict(set)
 
-        rows_elem = ReportFixturesProvider._get_report_elem(
+        rows_elem, filter_options_by_field = ReportFixturesProvider._get_report_rows(
+            report,
             data_source,
+            all_filter_values,
             {ui_filter.field for ui_filter in defer_filters.values()},
-            filter_options_by_field
         )
         filters_elem = ReportFixturesProvider._get_filters_elem(
             defer_filters, filter_options_by_field, restore_user._couch_user)
@@ -149,6 +162,40 @@ class ReportFixturesProvider(FixtureProvider):
         report_elem.append(rows_elem)
         return report_elem
 
+    @staticmethod
+    def _get_report_rows(report, data_source, all_filter_values, deferred_fields):
+        """
+        Get the report's rows element and the values of the deferred fields in its rows.
+
+        When the domain caches mobile report rows, they're shared by every user who
+        has the same filter values until the rows of the data source change.
+        """
+        def get_report_rows():
+            filter_options_by_field = defaultdict(set)
+            rows_elem = ReportFixturesProvider._get_report_elem(
+                data_source, deferred_fields, filter_options_by_field
+            )
+            return rows_elem, filter_options_by_field
+
+        # changes to ES data sources are only searchable after the index refreshes,
+        # so stale rows could be cached under the data source's new version
+        if not toggles.MOBILE_UCR_CACHE_ROWS.enabled(report.domain) or data_source.backend != UCR_SQL_BACKEND:
+            return get_report_rows()
+
+        cache = get_redis_default_cache()
+        cache_key = _get_report_rows_cache_key(report, data_source, all_filter_values)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            rows_xml, filter_options = cached
+            return etree.fromstring(rows_xml), defaultdict(set, {
+                field: set(values) for field, values in filter_options.items()
+            })
+
+        rows_elem, filter_options_by_field = get_report_rows()
+        filter_options = {field: list(values) for field, values in filter_options_by_field.items()}
+        cache.set(cache_key, (etree.tostring(rows_elem), filter_options), timeout=MOBILE_UCR_ROWS_CACHE_TIMEOUT)
+        return rows_elem, filter_options_by_field
+
     @staticmethod
     def _get_report_and_data_source(report_id, domain):
         report = get_report_config(report_id, domain)[0]
@@ -203,4 +250,16 @@ class ReportFixturesProvider(FixtureProvider):
         return rows_elem
 
 
+def _get_report_rows_cache_key(report, data_source, all_filter_values):
+    data_source_id = data_source.config._id
+    rows_version = hashlib.md5(json.dumps([
+        # the report's revision, since its columns and filters may have been edited
+        getattr(report, '_rev', None),
+        data_source_id,
+        get_data_source_version(data_source_id),
+        all_filter_values,
+    ], sort_keys=True, default=repr)).hexdigest()
+    return '{}-{}-{}'.format(MOBILE_UCR_ROWS_CACHE_KEY_PREFIX, report.get_id, rows_version)
+
+
 report_fixture_generator = ReportFixturesProvider()
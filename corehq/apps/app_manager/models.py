@@ -175,6 +175,18 @@ ANDROID_LOGO_PROPERTY_MAPPING = {
     'hq_logo_android_login': 'brand-banner-login',
 }
 
+# app fields that differ between builds without affecting how forms are compiled
+FORM_FINGERPRINT_EXCLUDED_APP_FIELDS = [
+    '_id', '_rev', '_attachments', 'external_blobs', 'version', 'copy_of', 'date_created',
+    'last_modified', 'built_on', 'built_with', 'build_comment', 'comment_from', 'is_released',
+    'short_url', 'short_odk_url', 'short_odk_media_url', 'recipients', 'cached_properties',
+    'form_fingerprints',
+]
+
+# part of every form's fingerprint. Bump it when a change to how forms are compiled
+# changes their XML, so that the next build compiles every form again.
+XFORM_GENERATOR_VERSION = 1
+
 
 def jsonpath_update(datum_context, value):
     field = datum_context.path.fields[0]
@@ -5473,6 +5485,15 @@ class Application(ApplicationBase, TranslationMixin, HQMediaMixin):
     grid_form_menus = StringProperty(default='none',
                                      choices=['none', 'all', 'some'])
     mobile_ucr_sync_interval = IntegerProperty()
+    # fingerprint of everything each form was compiled from, by form unique_id
+    # (set on builds, see set_form_versions)
+    form_fingerprints = DictProperty()
+
+    def __init__(self, *args, **kwargs):
+        super(Application, self).__init__(*args, **kwargs)
+        # compiled forms from the previous build that set_form_versions found
+        # to be unchanged, by form unique_id, to be reused by create_all_files
+        self._unchanged_xforms = {}
 
     def has_modules(self):
         return len(self.modules) > 0 and not self.is_remote_app()
@@ -5565,14 +5586,56 @@ class Application(ApplicationBase, TranslationMixin, HQMediaMixin):
             form = self.get_module(module_id).get_form(form_id)
         return form.validate_form().render_xform(build_profile_id).encode('utf-8')
 
+    def _get_form_fingerprints(self):
+        """
+        Hash each form's source together with its own settings, its module's settings
+        without the module's forms, the app's settings (translations, build spec etc.)
+        without the app's modules, and XFORM_GENERATOR_VERSION, leaving out the fields
+        that change with every build. Changing one form or module doesn't change the
+        fingerprints of the forms in other modules.
+        A form whose fingerprint matches the previous build's compiles to the same XML.
+        """
+        def _hash(*values):
+            return hashlib.md5(''.join(values)).hexdigest()
+
+        def _dump(json_):
+            return json.dumps(json_, sort_keys=True)
+
+        app_json = self.to_json()
+        for key in FORM_FINGERPRINT_EXCLUDED_APP_FIELDS:
+            app_json.pop(key, None)
+        modules_json = app_json.pop('modules', [])
+        app_hash = _hash(str(XFORM_GENERATOR_VERSION), _dump(app_json))
+
+        fingerprints = {}
+        for module, module_json in zip(self.get_modules(), modules_json):
+            forms_json = module_json.pop('forms', [])
+            module_hash = _hash(app_hash, _dump(module_json))
+            for form, form_json in zip(module.get_forms(), forms_json):
+                if isinstance(form, ShadowForm):
+                    continue
+                form_json.pop('version', None)
+                form_json.pop('validation_cache', None)
+                source = form.source
+                if isinstance(source, unicode):
+                    source = source.encode('utf-8')
+                fingerprints[form.unique_id] = _hash(module_hash, _dump(form_json), source)
+        return fingerprints
+
     def set_form_versions(self, previous_version, force_new_version=False):
         """
         Set the 'version' property on each form as follows to the current app version if the form is new
         or has changed since the last build. Otherwise set it to the version from the last build.
+
+        Forms whose fingerprint matches the previous build's are not rendered at all;
+        the rest are rendered and compared with the previous build's compiled form.
         """
         def _hash(val):
             return hashlib.md5(val).hexdigest()
 
+        self._unchanged_xforms = {}
+        self.form_fingerprints = self._get_form_fingerprints()
+        previous_fingerprints = getattr(previous_version, 'form_fingerprints', None) or {}
         if previous_version:
             for form_stuff in self.get_forms(bare=False):
                 filename = 'files/%s' % self.get_form_filename(**form_stuff)
@@ -5583,19 +5646,27 @@ class Application(ApplicationBase, TranslationMixin, HQMediaMixin):
                         previous_form = previous_version.get_form(form.unique_id)
                         # take the previous version's compiled form as-is
                         # (generation code may have changed since last build)
-                        previous_source = previous_version.fetch_attachment(filename)
+                        previous_source = previous_version.lazy_fetch_attachment(filename)
                     except (ResourceNotFound, FormNotFoundException):
                         pass
                     else:
-                        previous_hash = _hash(previous_source)
-
-                        # hack - temporarily set my version to the previous version
-                        # so that that's not treated as the diff
+                        if isinstance(previous_source, unicode):
+                            previous_source = previous_source.encode('utf-8')
                         previous_form_version = previous_form.get_version()
-                        form.version = previous_form_version
-                        my_hash = _hash(self.fetch_xform(form=form))
-                        if previous_hash == my_hash:
+                        fingerprint = self.form_fingerprints.get(form.unique_id)
+                        if fingerprint and fingerprint == previous_fingerprints.get(form.unique_id):
                             form_version = previous_form_version
+                            self._unchanged_xforms[form.unique_id] = previous_source
+                        else:
+                            previous_hash = _hash(previous_source)
+
+                            # hack - temporarily set my version to the previous version
+                            # so that that's not treated as the diff
+                            form.version = previous_form_version
+                            my_hash = _hash(self.fetch_xform(form=form))
+                            if previous_hash == my_hash:
+                                form_version = previous_form_version
+                                self._unchanged_xforms[form.unique_id] = previous_source
 
                     form.version = form_version
                 else:
@@ -5761,6 +5832,10 @@ class Application(ApplicationBase, TranslationMixin, HQMediaMixin):
             if not isinstance(form_stuff['form'], ShadowForm):
                 filename = prefix + self.get_form_filename(**form_stuff)
                 form = form_stuff['form']
+                if not build_profile_id and form.unique_id in self._unchanged_xforms:
+                    # byte-identical to the previous build's, so there's no need to compile it again
+                    files[filename] = self._unchanged_xforms.pop(form.unique_id)
+                    continue
                 try:
                     files[filename] = self.fetch_xform(form=form, build_profile_id=build_profile_id)
                 except XFormValidationFailed:
@@ -106,6 +106,48 @@ class FormVersioningTest(TestCase):
         self.assertEqual(self.get_form_versions(xxx_build1), [1, 1])
         self.assertEqual(self.get_form_versions(xxx_build2), [2, 1])
 
+    @patch_default_builds
+    @patch('corehq.apps.app_manager.models.validate_xform', return_value=None)
+    def test_unchanged_forms_are_reused(self, mock):
+        add_build(version='2.7.0', build_number=20655)
+        domain = 'form-versioning-test'
+
+        app = Application.new_app(domain, 'Foo')
+        app.modules.append(Module(forms=[Form(), Form()]))
+        app.build_spec = BuildSpec.from_string('2.7.0/latest')
+        app.get_module(0).get_form(0).source = BLANK_TEMPLATE.format(xmlns='xmlns-0.0')
+        app.get_module(0).get_form(1).source = BLANK_TEMPLATE.format(xmlns='xmlns-1')
+        app.save()
+
+        build1 = app.make_build(previous_version=None)
+        build1.save()
+
+        app.get_module(0).get_form(0).source = BLANK_TEMPLATE.format(xmlns='xmlns-0.1')
+        app.save()
+
+        with patch.object(Form, 'render_xform', autospec=True, side_effect=Form.render_xform) as render_xform:
+            build2 = app.make_build(previous_version=build1)
+        build2.save()
+
+        rendered = [call[0][0].unique_id for call in render_xform.call_args_list]
+        # the changed form is compiled again with its new version
+        self.assertEqual(rendered.count(app.get_module(0).get_form(0).unique_id), 2)
+        # the unchanged form's fingerprint matches, so it isn't compiled at all
+        self.assertEqual(rendered.count(app.get_module(0).get_form(1).unique_id), 0)
+        self.assertEqual(build2.form_fingerprints[app.get_module(0).get_form(1).unique_id],
+                         build1.form_fingerprints[app.get_module(0).get_form(1).unique_id])
+        self.assertEqual(
+            build2.fetch_attachment('files/modules-0/forms-1.xml'),
+            build1.fetch_attachment('files/modules-0/forms-1.xml'),
+        )
+        self.assertEqual(self.get_form_versions(build2), [2, 1])
+
+        # changing how forms are compiled changes every form's fingerprint
+        fingerprints = app._get_form_fingerprints()
+        with patch('corehq.apps.app_manager.models.XFORM_GENERATOR_VERSION', 2):
+            new_fingerprints = app._get_form_fingerprints()
+        self.assertTrue(all(new_fingerprints[form_id] != fingerprints[form_id] for form_id in fingerprints))
+
     @staticmethod
     def get_form_versions(build):
         from lxml import etree
@@ -1,3 +1,5 @@
+import uuid
+
 from lxml import etree
 from django.test import SimpleTestCase
 from mock import Mock, patch
@@ -6,6 +8,9 @@ from corehq.apps.app_manager.models import ReportAppConfig, StaticChoiceListFilt
 from corehq.apps.app_manager.tests.util import TestXmlMixin
 from corehq.apps.app_manager.tests.test_report_config import MAKE_REPORT_CONFIG, \
     mock_report_configuration_get
+from corehq.apps.userreports.const import UCR_SQL_BACKEND
+from corehq.apps.userreports.util import bump_data_source_version
+from corehq.util.test_utils import flag_enabled
 
 
 class ReportFixturesProviderTests(SimpleTestCase, TestXmlMixin):
@@ -41,3 +46,30 @@ class ReportFixturesProviderTests(SimpleTestCase, TestXmlMixin):
                 etree.tostring(report, pretty_print=True),
                 self.get_xml('expected_report')
             )
+
+    @flag_enabled('MOBILE_UCR_CACHE_ROWS')
+    def test_report_rows_are_cached(self):
+        report_id = 'deadbeef'
+        provider = ReportFixturesProvider()
+        report_app_config = ReportAppConfig(
+            uuid='c0ffee',
+            report_id=report_id,
+            filters={'computed_owner_name_40cc88a0_1': StaticChoiceListFilter()}
+        )
+        user = Mock()
+        data_source_mock = self.get_data_source_mock()
+        data_source_mock.backend = UCR_SQL_BACKEND
+        data_source_mock.config._id = uuid.uuid4().hex
+
+        with mock_report_configuration_get({report_id: MAKE_REPORT_CONFIG('test_domain', report_id)}), \
+                patch('corehq.apps.app_manager.fixtures.mobile_ucr.ReportFactory') as report_factory_patch:
+
+            report_factory_patch.from_spec.return_value = data_source_mock
+            report = provider.report_config_to_fixture(report_app_config, user)
+            cached_report = provider.report_config_to_fixture(report_app_config, user)
+            self.assertEqual(data_source_mock.get_data.call_count, 1)
+            self.assertEqual(etree.tostring(cached_report), etree.tostring(report))
+
+            bump_data_source_version(data_source_mock.config._id)
+            provider.report_config_to_fixture(report_app_config, user)
+            self.assertEqual(data_source_mock.get_data.call_count, 2)
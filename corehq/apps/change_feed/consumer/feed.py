@@ -23,11 +23,15 @@ class KafkaChangeFeed(ChangeFeed):
     """
     sequence_format = 'json'
 
-    def __init__(self, topics, group_id, strict=False, num_processes=1, process_num=0):
+    def __init__(self, topics, group_id, strict=False, num_processes=1, process_num=0, idle_timeout_ms=None):
         """
         Create a change feed listener for a list of kafka topics, a group ID, and partition.
 
         See http://kafka.apache.org/documentation.html#introduction for a description of what these are.
+
+        :param idle_timeout_ms: If set, ``None`` is yielded whenever no message arrives within this
+            many milliseconds while waiting forever. Chunked pillows use this to flush partially
+            filled chunks.
         """
         self._topics = topics
         self._group_id = group_id
@@ -35,6 +39,7 @@ class KafkaChangeFeed(ChangeFeed):
         self.strict = strict
         self.num_processes = num_processes
         self.process_num = process_num
+        self.idle_timeout_ms = idle_timeout_ms
 
     def __unicode__(self):
         return u'KafkaChangeFeed: topics: {}, group: {}'.format(self._topics, self._group_id)
@@ -64,6 +69,8 @@ class KafkaChangeFeed(ChangeFeed):
 
         # in milliseconds, -1 means wait forever for changes
         timeout = -1 if forever else MIN_TIMEOUT
+        if forever and self.idle_timeout_ms:
+            timeout = self.idle_timeout_ms
 
         start_from_latest = since is None
 
@@ -87,13 +94,19 @@ class KafkaChangeFeed(ChangeFeed):
             # this is how you tell the consumer to start from a certain point in the sequence
             consumer.set_topic_partitions(*offsets)
 
-        try:
-            for message in consumer:
-                self._processed_topic_offsets[(message.topic, message.partition)] = message.offset
-                yield change_from_kafka_message(message)
-        except ConsumerTimeout:
-            assert not forever, 'Kafka pillow should not timeout when waiting forever!'
-            # no need to do anything since this is just telling us we've reached the end of the feed
+        while True:
+            try:
+                for message in consumer:
+                    self._processed_topic_offsets[(message.topic, message.partition)] = message.offset
+                    yield change_from_kafka_message(message)
+            except ConsumerTimeout:
+                if forever and self.idle_timeout_ms:
+                    # let the pillow know the feed is idle and keep waiting
+                    yield None
+                    continue
+                assert not forever, 'Kafka pillow should not timeout when waiting forever!'
+                # no need to do anything since this is just telling us we've reached the end of the feed
+            break
 
     def get_current_checkpoint_offsets(self):
         # the way kafka works, the checkpoint should increment by 1 because
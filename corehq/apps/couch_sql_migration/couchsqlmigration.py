@@ -1,8 +1,11 @@
 from __future__ import print_function
 import os
 import uuid
+from collections import deque
 from datetime import datetime
+from multiprocessing import Pool
 
+from django.db import connections
 from django.db.utils import IntegrityError
 
 import settings
@@ -13,7 +16,9 @@ from corehq.apps.couch_sql_migration.diff import filter_form_diffs, filter_case_
 from corehq.apps.domain.dbaccessors import get_doc_count_in_domain_by_type
 from corehq.apps.domain.models import Domain
 from corehq.apps.tzmigration.api import force_phone_timezones_should_be_processed
-from corehq.form_processor.backends.sql.dbaccessors import CaseAccessorSQL, doc_type_to_state, LedgerAccessorSQL
+from corehq.form_processor.backends.sql.dbaccessors import (
+    CaseAccessorSQL, doc_type_to_state, FormAccessorSQL, LedgerAccessorSQL
+)
 from corehq.form_processor.backends.sql.processor import FormProcessorSQL
 from corehq.form_processor.interfaces.processor import FormProcessorInterface, ProcessedForms
 from corehq.form_processor.models import (
@@ -26,6 +31,8 @@ from corehq.form_processor.utils import should_use_sql_backend
 from corehq.form_processor.utils.general import set_local_domain_sql_backend_override, \
     clear_local_domain_sql_backend_override
 from corehq.toggles import COUCH_SQL_MIGRATION_BLACKLIST
+from corehq.util.concurrent import iter_concurrently
+from corehq.util.couch_helpers import MultiKeyViewArgsProvider
 from corehq.util.log import with_progress_bar
 from corehq.util.pagination import PaginationEventHandler
 from couchforms.models import XFormInstance, doc_types as form_doc_types, all_known_formlike_doc_types
@@ -34,17 +41,28 @@ from dimagi.utils.couch.undo import DELETED_SUFFIX
 from pillowtop.reindexer.change_providers.couch import CouchDomainDocTypeChangeProvider
 
 CASE_DOC_TYPES = ['CommCareCase', 'CommCareCase-Deleted', ]
+LEDGER_DIFF_KIND = 'stock state'
 
 UNPROCESSED_DOC_TYPES = list(all_known_formlike_doc_types() - {'XFormInstance'})
 
+MAIN_FORMS_PAGE_SIZE = 1000
+MAIN_FORMS_CHECKPOINT = 'main_forms'
+PROBLEM_FORMS_FLAG = 'errors_with_normal_doc_type'
+TOUCH_FORMS_FLAG = 'forms_that_touch_cases_without_actions'
+
 
-def do_couch_to_sql_migration(domain, with_progress=True, debug=False):
+def do_couch_to_sql_migration(domain, with_progress=True, debug=False, workers=0):
     set_local_domain_sql_backend_override(domain)
-    CouchSqlDomainMigrator(domain, with_progress=with_progress, debug=debug).migrate()
+    CouchSqlDomainMigrator(domain, with_progress=with_progress, debug=debug, workers=workers).migrate()
 
 
 class CouchSqlDomainMigrator(object):
-    def __init__(self, domain, with_progress=True, debug=False):
+    def __init__(self, domain, with_progress=True, debug=False, workers=0):
+        """
+        :param workers: The number of worker processes to diff the main forms with. If
+                        given, the main forms are migrated in a pipeline that can be
+                        resumed, see ``_process_main_forms_pipelined``.
+        """
         from corehq.apps.tzmigration.planning import DiffDB
         assert should_use_sql_backend(domain)
         assert not COUCH_SQL_MIGRATION_BLACKLIST.enabled(domain)
@@ -52,6 +70,7 @@ class CouchSqlDomainMigrator(object):
         self.with_progress = with_progress
         self.debug = debug
         self.domain = domain
+        self.workers = workers
         db_filepath = get_diff_db_filepath(domain)
         self.diff_db = DiffDB.init(db_filepath)
 
@@ -66,7 +85,10 @@ class CouchSqlDomainMigrator(object):
         print('[ERROR] {}'.format(message))
 
     def migrate(self):
-        self._process_main_forms()
+        if self.workers:
+            self._process_main_forms_pipelined()
+        else:
+            self._process_main_forms()
         self._copy_unprocessed_forms()
         self._copy_unprocessed_cases()
         self._calculate_case_diffs()
@@ -82,21 +104,90 @@ class CouchSqlDomainMigrator(object):
                 self.errors_with_normal_doc_type.append(change.id)
                 continue
             wrapped_form = XFormInstance.wrap(form)
-            form_received = wrapped_form.received_on
-            assert last_received_on <= form_received
-            last_received_on = form_received
+            last_received_on = _check_received_on_order(last_received_on, wrapped_form)
             try:
                 self._migrate_form_and_associated_models(wrapped_form)
             except:
                 self.log_error("Unable to migrate form: {}".format(change.id))
                 raise
 
-    def _migrate_form_and_associated_models(self, couch_form):
+    def _process_main_forms_pipelined(self):
+        """
+        Process the main forms in three stages that run at the same time. A thread
+        reads pages of forms from couch, a pool of worker processes calculates the
+        forms' diffs, and the forms are saved with their cases and ledgers in this
+        process. The forms are saved one at a time in the order they were received,
+        since the case and ledger updates of a form depend on the forms before it.
+
+        The position after each saved page is checkpointed in the diff db, so that
+        an interrupted migration continues from there when it's run again.
+        """
+        resume_kwargs = self.diff_db.get_checkpoint(MAIN_FORMS_CHECKPOINT)
+        pages = iter_concurrently([_iter_main_form_pages(self.domain, resume_kwargs)], buffer_size=2)
+        # the worker processes are forked so they mustn't share this process' connections
+        connections.close_all()
+        pool = Pool(self.workers, initializer=set_local_domain_sql_backend_override, initargs=(self.domain,))
+        try:
+            # the first page after resuming may have been partly saved
+            skip_saved = resume_kwargs is not None
+            last_received_on = datetime.min
+            pending = deque()
+            for rows, next_kwargs in self._with_progress(['XFormInstance'], pages, page_size=MAIN_FORMS_PAGE_SIZE):
+                form_jsons = [row['doc'] for row in rows]
+                diffs = pool.map_async(_get_main_form_diffs, [(self.domain, doc) for doc in form_jsons])
+                pending.append((form_jsons, diffs, next_kwargs))
+                # diff the next page while this one is saved
+                if len(pending) > 1:
+                    last_received_on = self._save_main_forms_page(last_received_on, skip_saved, *pending.popleft())
+                    skip_saved = False
+            while pending:
+                last_received_on = self._save_main_forms_page(last_received_on, skip_saved, *pending.popleft())
+                skip_saved = False
+        finally:
+            pool.terminate()
+
+        self.errors_with_normal_doc_type = list(self.diff_db.get_flagged_doc_ids(PROBLEM_FORMS_FLAG))
+        self.forms_that_touch_cases_without_actions = self.diff_db.get_flagged_doc_ids(TOUCH_FORMS_FLAG)
+
+    def _save_main_forms_page(self, last_received_on, skip_saved, form_jsons, diffs, next_kwargs):
+        saved_form_ids = set()
+        if skip_saved:
+            saved_form_ids = {
+                form.form_id for form in FormAccessorSQL.get_forms([form['_id'] for form in form_jsons])
+            }
+
+        for form_json, form_diffs in zip(form_jsons, diffs.get()):
+            form_id = form_json['_id']
+            self.log_debug('Processing doc: {}({})'.format('XFormInstance', form_id))
+            if form_json.get('problem', None):
+                self.diff_db.add_flagged_doc_ids(PROBLEM_FORMS_FLAG, [form_id])
+                continue
+            wrapped_form = XFormInstance.wrap(form_json)
+            last_received_on = _check_received_on_order(last_received_on, wrapped_form)
+            if form_id in saved_form_ids:
+                continue
+            try:
+                self._migrate_form_and_associated_models(wrapped_form, _unpickle_diffs(form_diffs))
+            except:
+                self.log_error("Unable to migrate form: {}".format(form_id))
+                raise
+
+        self.diff_db.set_checkpoint(MAIN_FORMS_CHECKPOINT, next_kwargs)
+        return last_received_on
+
+    def _migrate_form_and_associated_models(self, couch_form, form_diffs=None):
+        """
+        :param form_diffs: The form's diffs if they've already been calculated
+        """
         sql_form = _migrate_form(self.domain, couch_form)
         _migrate_form_attachments(sql_form, couch_form)
         _migrate_form_operations(sql_form, couch_form)
 
-        self._save_diffs(couch_form, sql_form)
+        if form_diffs is None:
+            self._save_diffs(couch_form, sql_form)
+        else:
+            # a previous run may have stopped after saving the diffs but not the form
+            self.diff_db.replace_diffs(couch_form.doc_type, couch_form.form_id, form_diffs)
 
         case_stock_result = None
         if sql_form.initial_processing_complete:
@@ -109,18 +200,15 @@ class CouchSqlDomainMigrator(object):
                 if len(touch_updates):
                     # record these for later use when filtering case diffs. See ``_filter_forms_touch_case``
                     self.forms_that_touch_cases_without_actions.add(couch_form.form_id)
+                    if self.workers:
+                        # recorded before the form is saved, since a resumed migration
+                        # skips the forms that have been saved
+                        self.diff_db.add_flagged_doc_ids(TOUCH_FORMS_FLAG, [couch_form.form_id])
 
         _save_migrated_models(sql_form, case_stock_result)
 
     def _save_diffs(self, couch_form, sql_form):
-        from corehq.apps.tzmigration.timezonemigration import json_diff
-        couch_form_json = couch_form.to_json()
-        sql_form_json = sql_form.to_json()
-        diffs = json_diff(couch_form_json, sql_form_json, track_list_indices=False)
-        self.diff_db.add_diffs(
-            couch_form.doc_type, couch_form.form_id,
-            filter_form_diffs(couch_form_json, sql_form_json, diffs)
-        )
+        self.diff_db.add_diffs(couch_form.doc_type, couch_form.form_id, _get_form_diffs(couch_form, sql_form))
 
     def _copy_unprocessed_forms(self):
         for couch_form_json in iter_docs(XFormInstance.get_db(), self.errors_with_normal_doc_type, chunksize=1000):
@@ -136,6 +224,10 @@ class CouchSqlDomainMigrator(object):
     def _migrate_unprocessed_form(self, couch_form_json):
         self.log_debug('Processing doc: {}({})'.format(couch_form_json['doc_type'], couch_form_json['_id']))
         couch_form = _wrap_form(couch_form_json)
+        if FormAccessorSQL.form_exists(couch_form.form_id):
+            # saved by a previous run of the migration, after its diffs
+            return
+
         sql_form = XFormInstanceSQL(
             form_id=couch_form.form_id,
             xmlns=couch_form.xmlns,
@@ -146,7 +238,10 @@ class CouchSqlDomainMigrator(object):
         _migrate_form_operations(sql_form, couch_form)
 
         if couch_form.doc_type != 'SubmissionErrorLog':
-            self._save_diffs(couch_form, sql_form)
+            # a previous run may have stopped after saving the diffs but not the form
+            self.diff_db.replace_diffs(
+                couch_form.doc_type, couch_form.form_id, _get_form_diffs(couch_form, sql_form)
+            )
 
         _save_migrated_models(sql_form)
 
@@ -196,6 +291,8 @@ class CouchSqlDomainMigrator(object):
                 )
 
     def _calculate_case_diffs(self):
+        # all the diffs are calculated again if the migration is run again
+        self.diff_db.delete_diffs(CASE_DOC_TYPES + [LEDGER_DIFF_KIND])
         cases = {}
         changes = _get_case_iterator(self.domain).iter_all_changes()
         for change in self._with_progress(CASE_DOC_TYPES, changes, progress_name='Calculating diffs'):
@@ -258,22 +355,86 @@ class CouchSqlDomainMigrator(object):
             couch_state = couch_state_map.get(ledger_value.ledger_reference, None)
             diffs = json_diff(couch_state.to_json(), ledger_value.to_json(), track_list_indices=False)
             self.diff_db.add_diffs(
-                'stock state', ledger_value.ledger_reference.as_id(),
+                LEDGER_DIFF_KIND, ledger_value.ledger_reference.as_id(),
                 filter_ledger_diffs(diffs)
             )
 
-    def _with_progress(self, doc_types, iterable, progress_name='Migrating'):
+    def _with_progress(self, doc_types, iterable, progress_name='Migrating', page_size=None):
+        """
+        :param page_size: If given, the iterable yields pages of this many docs
+        """
         if self.with_progress:
             doc_count = sum([
                 get_doc_count_in_domain_by_type(self.domain, doc_type, XFormInstance.get_db())
                 for doc_type in doc_types
             ])
             prefix = "{} ({})".format(progress_name, ', '.join(doc_types))
+            if page_size:
+                doc_count = -(-doc_count // page_size)
+                prefix = "{} pages of {}".format(prefix, page_size)
             return with_progress_bar(iterable, doc_count, prefix=prefix, oneline=False)
         else:
             return iterable
 
 
+def _check_received_on_order(last_received_on, couch_form):
+    """
+    :return: the latest received_on of the forms so far
+    """
+    if couch_form.received_on is None:
+        # some legacy forms weren't given a received_on, so they can't be checked
+        return last_received_on
+    assert last_received_on <= couch_form.received_on
+    return couch_form.received_on
+
+
+def _get_form_diffs(couch_form, sql_form):
+    from corehq.apps.tzmigration.timezonemigration import json_diff
+    couch_form_json = couch_form.to_json()
+    sql_form_json = sql_form.to_json()
+    diffs = json_diff(couch_form_json, sql_form_json, track_list_indices=False)
+    return filter_form_diffs(couch_form_json, sql_form_json, diffs)
+
+
+def _get_main_form_diffs(domain_and_form_json):
+    """
+    Calculate the diffs of a main form in a worker process. The form is migrated
+    here only to be diffed, and again when it's saved.
+    """
+    domain, form_json = domain_and_form_json
+    if form_json.get('problem', None):
+        return None
+    couch_form = XFormInstance.wrap(form_json)
+    sql_form = _migrate_form(domain, couch_form)
+    _migrate_form_attachments(sql_form, couch_form)
+    _migrate_form_operations(sql_form, couch_form)
+    return _pickle_diffs(_get_form_diffs(couch_form, sql_form))
+
+
+class _Missing(object):
+    """Stands in for the Ellipsis of missing values in diffs, which can't be pickled"""
+
+
+def _pickle_diffs(diffs):
+    return [
+        diff._replace(
+            old_value=_Missing if diff.old_value is Ellipsis else diff.old_value,
+            new_value=_Missing if diff.new_value is Ellipsis else diff.new_value,
+        )
+        for diff in diffs
+    ]
+
+
+def _unpickle_diffs(diffs):
+    return [
+        diff._replace(
+            old_value=Ellipsis if diff.old_value is _Missing else diff.old_value,
+            new_value=Ellipsis if diff.new_value is _Missing else diff.new_value,
+        )
+        for diff in diffs
+    ]
+
+
 def _wrap_form(doc):
     if doc['doc_type'] in form_doc_types():
         return form_doc_types()[doc['doc_type']].wrap(doc)
@@ -494,6 +655,28 @@ def _get_main_form_iterator(domain):
     )
 
 
+def _iter_main_form_pages(domain, resume_kwargs=None):
+    """
+    Yields pages of main form rows, with their docs, in the order the forms were
+    received along with the view kwargs to get the page after them.
+
+    :param resume_kwargs: The view kwargs of the page to start from
+    """
+    couch_db = XFormInstance.get_db()
+    args_provider = MultiKeyViewArgsProvider(
+        [[domain, 'XFormInstance']], include_docs=True, chunk_size=MAIN_FORMS_PAGE_SIZE
+    )
+    args, kwargs = args_provider.get_initial_args()
+    if resume_kwargs:
+        kwargs = resume_kwargs
+    while True:
+        rows = couch_db.view('by_domain_doc_type_date/view', *args, **kwargs).all()
+        if not rows:
+            return
+        args, kwargs = args_provider.get_next_args(rows[-1], *args, **kwargs)
+        yield rows, kwargs
+
+
 def _get_unprocessed_form_iterator(domain):
     return CouchDomainDocTypeChangeProvider(
         couch_db=XFormInstance.get_db(),
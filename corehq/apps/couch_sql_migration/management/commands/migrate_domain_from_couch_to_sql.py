@@ -38,6 +38,9 @@ class Command(BaseCommand):
         parser.add_argument('--show-diffs', action='store_true', default=False)
         parser.add_argument('--no-input', action='store_true', default=False)
         parser.add_argument('--debug', action='store_true', default=False)
+        parser.add_argument('--workers', type=int, default=0,
+                            help='Diff the forms in this many worker processes while they are saved. '
+                                 'A migration run with workers can be resumed by running it again.')
 
     @staticmethod
     def require_only_option(sole_option, options):
@@ -56,8 +59,13 @@ class Command(BaseCommand):
 
         if options['MIGRATE']:
             self.require_only_option('MIGRATE', options)
-            set_couch_sql_migration_started(domain)
-            do_couch_to_sql_migration(domain, with_progress=not self.no_input, debug=self.debug)
+            if options['workers'] and couch_sql_migration_in_progress(domain):
+                print("Resuming the migration of {}".format(domain))
+            else:
+                set_couch_sql_migration_started(domain)
+            do_couch_to_sql_migration(
+                domain, with_progress=not self.no_input, debug=self.debug, workers=options['workers']
+            )
             has_diffs = self.print_stats(domain, short=True, diffs_only=True)
             if has_diffs:
                 print("\nUse '--stats-short', '--stats-long', '--show-diffs' to see more info.\n")
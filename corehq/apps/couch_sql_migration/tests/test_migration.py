@@ -8,10 +8,12 @@ from django.core.files.uploadedfile import UploadedFile
 from django.core.management import call_command
 from django.test import TestCase
 from django.test import override_settings
+from mock import patch
 
 from casexml.apps.case.mock import CaseBlock
 from corehq.apps.commtrack.helpers import make_product
-from corehq.apps.couch_sql_migration.couchsqlmigration import get_diff_db
+from corehq.apps.couch_sql_migration import couchsqlmigration
+from corehq.apps.couch_sql_migration.couchsqlmigration import CouchSqlDomainMigrator, get_diff_db
 from corehq.apps.domain.dbaccessors import get_doc_ids_in_domain_by_type
 from corehq.apps.domain.models import Domain
 from corehq.apps.domain.shortcuts import create_domain
@@ -56,9 +58,9 @@ class BaseMigrationTestCase(TestCase, TestFileMixin):
         FormProcessorTestUtils.delete_all_cases_forms_ledgers()
         self.domain.delete()
 
-    def _do_migration_and_assert_flags(self, domain):
+    def _do_migration_and_assert_flags(self, domain, workers=0):
         self.assertFalse(should_use_sql_backend(domain))
-        call_command('migrate_domain_from_couch_to_sql', domain, MIGRATE=True, no_input=True)
+        call_command('migrate_domain_from_couch_to_sql', domain, MIGRATE=True, no_input=True, workers=workers)
         self.assertTrue(should_use_sql_backend(domain))
 
     def _compare_diffs(self, expected):
@@ -93,6 +95,56 @@ class MigrationTestCase(BaseMigrationTestCase):
         self.assertEqual(1, len(self._get_form_ids()))
         self._compare_diffs([])
 
+    def test_form_migration_with_workers(self):
+        form_xml = self.get_xml('tz_form')
+        submit_form_locally(form_xml, self.domain_name)
+        create_and_save_a_form(self.domain_name)
+        self.assertEqual(2, len(self._get_form_ids()))
+        self._do_migration_and_assert_flags(self.domain_name, workers=2)
+        self.assertEqual(2, len(self._get_form_ids()))
+        self.assertEqual(1, len(self._get_case_ids()))
+        self._compare_diffs([])
+
+    def test_resume_migration_with_workers(self):
+        form = create_and_save_a_form(self.domain_name)
+        form.archive('user1')
+        create_and_save_a_case(self.domain_name, case_id=uuid.uuid4().hex, case_name='test case')
+
+        with patch.object(CouchSqlDomainMigrator, '_calculate_case_diffs', side_effect=Exception('interrupted')):
+            with self.assertRaises(Exception):
+                call_command('migrate_domain_from_couch_to_sql', self.domain_name, MIGRATE=True, no_input=True,
+                             workers=2)
+        clear_local_domain_sql_backend_override(self.domain_name)
+
+        # the forms that were already copied are skipped when it's run again
+        self._do_migration_and_assert_flags(self.domain_name, workers=2)
+        self.assertEqual(1, len(self._get_form_ids()))
+        self.assertEqual(1, len(self._get_form_ids('XFormArchived')))
+        self.assertEqual(1, len(self._get_case_ids()))
+        self._compare_diffs([])
+
+    def test_resume_migration_with_workers_mid_page(self):
+        form_ids = [create_and_save_a_form(self.domain_name).form_id for i in range(2)]
+        save_migrated_models = couchsqlmigration._save_migrated_models
+        calls = []
+
+        def save_first_form(*args, **kwargs):
+            calls.append(args)
+            if len(calls) > 1:
+                raise Exception('interrupted')
+            return save_migrated_models(*args, **kwargs)
+
+        with patch.object(couchsqlmigration, '_save_migrated_models', side_effect=save_first_form):
+            with self.assertRaises(Exception):
+                call_command('migrate_domain_from_couch_to_sql', self.domain_name, MIGRATE=True, no_input=True,
+                             workers=2)
+        clear_local_domain_sql_backend_override(self.domain_name)
+
+        # the rest of the page is migrated when it's run again
+        self._do_migration_and_assert_flags(self.domain_name, workers=2)
+        self.assertEqual(set(form_ids), set(self._get_form_ids()))
+        self._compare_diffs([])
+
     def test_form_with_not_meta_migration(self):
         xml = """<?xml version="1.0" ?>
         <n0:registration xmlns:n0="http://openrosa.org/user/registration">
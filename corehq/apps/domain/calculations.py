@@ -10,8 +10,11 @@ from django.utils.translation import ugettext as _
 
 from corehq.apps.app_manager.dbaccessors import domain_has_apps
 from corehq.apps.users.util import WEIRD_USER_IDS
-from corehq.apps.es.sms import SMSES
-from corehq.apps.es.forms import FormES
+from corehq.apps.es import filters
+from corehq.apps.es.aggregations import FilterAggregation, MaxAggregation, MinAggregation, TermsAggregation
+from corehq.apps.es.cases import CaseES, modified_range
+from corehq.apps.es.sms import SMSES, direction, received
+from corehq.apps.es.forms import FormES, j2me_submissions, submitted
 from corehq.apps.hqadmin.reporting.reports import (
     get_mobile_users,
 )
@@ -332,49 +335,158 @@ def all_domain_stats():
     }
 
 
-def calced_props(dom, id, all_stats):
-    return {
+def calced_props(dom, id, all_stats, es_stats=None):
+    """
+    :param es_stats: The domain's form, case and SMS stats from all_domain_es_stats.
+                     They're queried for this domain alone if not given.
+    """
+    if es_stats is None:
+        es_stats = all_domain_es_stats([dom])[dom]
+    props = {
         "_id": id,
         "cp_n_web_users": int(all_stats["web_users"].get(dom, 0)),
         "cp_n_active_cc_users": int(CALC_FNS["mobile_users"](dom)),
         "cp_n_cc_users": int(all_stats["commcare_users"].get(dom, 0)),
-        "cp_n_active_cases": int(CALC_FNS["cases_in_last"](dom, 120)),
         "cp_n_users_submitted_form": total_distinct_users(dom),
-        "cp_n_inactive_cases": int(CALC_FNS["inactive_cases_in_last"](dom, 120)),
-        "cp_n_30_day_cases": int(CALC_FNS["cases_in_last"](dom, 30)),
-        "cp_n_60_day_cases": int(CALC_FNS["cases_in_last"](dom, 60)),
-        "cp_n_90_day_cases": int(CALC_FNS["cases_in_last"](dom, 90)),
-        "cp_n_cases": int(CALC_FNS["cases"](dom)),
-        "cp_n_forms": int(CALC_FNS["forms"](dom)),
-        "cp_n_forms_30_d": int(CALC_FNS["forms_in_last"](dom, 30)),
-        "cp_n_forms_60_d": int(CALC_FNS["forms_in_last"](dom, 60)),
-        "cp_n_forms_90_d": int(CALC_FNS["forms_in_last"](dom, 90)),
         "cp_first_domain_for_user": CALC_FNS["first_domain_for_user"](dom),
-        "cp_first_form": CALC_FNS["first_form_submission"](dom, False),
-        "cp_last_form": CALC_FNS["last_form_submission"](dom, False),
-        "cp_is_active": CALC_FNS["active"](dom),
         "cp_has_app": CALC_FNS["has_app"](dom),
         "cp_last_updated": json_format_datetime(datetime.utcnow()),
-        "cp_n_in_sms": int(CALC_FNS["sms"](dom, "I")),
-        "cp_n_out_sms": int(CALC_FNS["sms"](dom, "O")),
-        "cp_n_sms_ever": int(CALC_FNS["sms_in_last"](dom)),
-        "cp_n_sms_30_d": int(CALC_FNS["sms_in_last"](dom, 30)),
-        "cp_n_sms_60_d": int(CALC_FNS["sms_in_last"](dom, 60)),
-        "cp_n_sms_90_d": int(CALC_FNS["sms_in_last"](dom, 90)),
-        "cp_sms_ever": int(CALC_FNS["sms_in_last_bool"](dom)),
-        "cp_sms_30_d": int(CALC_FNS["sms_in_last_bool"](dom, 30)),
-        "cp_n_sms_in_30_d": int(CALC_FNS["sms_in_in_last"](dom, 30)),
-        "cp_n_sms_in_60_d": int(CALC_FNS["sms_in_in_last"](dom, 60)),
-        "cp_n_sms_in_90_d": int(CALC_FNS["sms_in_in_last"](dom, 90)),
-        "cp_n_sms_out_30_d": int(CALC_FNS["sms_out_in_last"](dom, 30)),
-        "cp_n_sms_out_60_d": int(CALC_FNS["sms_out_in_last"](dom, 60)),
-        "cp_n_sms_out_90_d": int(CALC_FNS["sms_out_in_last"](dom, 90)),
-        "cp_n_j2me_30_d": int(CALC_FNS["j2me_forms_in_last"](dom, 30)),
-        "cp_n_j2me_60_d": int(CALC_FNS["j2me_forms_in_last"](dom, 60)),
-        "cp_n_j2me_90_d": int(CALC_FNS["j2me_forms_in_last"](dom, 90)),
-        "cp_j2me_90_d_bool": int(CALC_FNS["j2me_forms_in_last_bool"](dom, 90)),
-        "cp_300th_form": CALC_FNS["300th_form_submission"](dom)
     }
+    props.update(es_stats)
+    # only look for the 300th form of the domains that have one
+    props["cp_300th_form"] = CALC_FNS["300th_form_submission"](dom) if props["cp_n_forms"] > 300 else None
+    return props
+
+
+def all_domain_es_stats(domains):
+    """
+    Returns the calculated properties that come from the forms, cases and SMS of
+    each of the domains, keyed by domain name. They're calculated for all the
+    domains at once with a single aggregation query on each index.
+    """
+    utcnow = datetime.utcnow()
+    form_stats = _bulk_form_stats(domains, utcnow)
+    case_stats = _bulk_case_stats(domains, utcnow)
+    sms_stats = _bulk_sms_stats(domains)
+    es_stats = {}
+    for dom in domains:
+        es_stats[dom] = {}
+        es_stats[dom].update(form_stats[dom])
+        es_stats[dom].update(case_stats[dom])
+        es_stats[dom].update(sms_stats[dom])
+    return es_stats
+
+
+def _domain_buckets(query, domains, aggregations):
+    aggregation = TermsAggregation('domain', 'domain.exact', size=len(domains))
+    for sub_aggregation in aggregations:
+        aggregation.aggregation(sub_aggregation)
+    query = query.domain(domains).aggregation(aggregation).size(0)
+    return query.run().aggregations.domain.buckets_dict
+
+
+def _bulk_form_stats(domains, utcnow):
+    aggregations = [
+        MinAggregation('first_form', 'received_on'),
+        MaxAggregation('last_form', 'received_on'),
+    ]
+    for days in (30, 60, 90):
+        then = utcnow - timedelta(days=days)
+        aggregations.append(FilterAggregation('forms_{}_d'.format(days), submitted(gte=then)))
+        aggregations.append(FilterAggregation('j2me_{}_d'.format(days), j2me_submissions(gte=then)))
+    buckets = _domain_buckets(FormES(), domains, aggregations)
+
+    stats = {}
+    for dom in domains:
+        bucket = buckets.get(dom)
+        first_form = _es_datetime(bucket.first_form.value) if bucket else None
+        last_form = _es_datetime(bucket.last_form.value) if bucket else None
+        stats[dom] = {
+            "cp_n_forms": bucket.doc_count if bucket else 0,
+            "cp_first_form": display_time(first_form, False) if first_form else None,
+            "cp_last_form": display_time(last_form, False) if last_form else None,
+            "cp_is_active": bool(last_form) and utcnow <= last_form + timedelta(days=30),
+        }
+        for days in (30, 60, 90):
+            stats[dom]["cp_n_forms_{}_d".format(days)] = _bucket_count(bucket, 'forms_{}_d'.format(days))
+            stats[dom]["cp_n_j2me_{}_d".format(days)] = _bucket_count(bucket, 'j2me_{}_d'.format(days))
+        stats[dom]["cp_j2me_90_d_bool"] = int(stats[dom]["cp_n_j2me_90_d"] > 0)
+    return stats
+
+
+def _bulk_case_stats(domains, utcnow):
+    open_cases = filters.term('closed', False)
+    aggregations = [
+        FilterAggregation('inactive', filters.AND(
+            open_cases, filters.NOT(modified_range(gte=utcnow - timedelta(days=120), lte=utcnow))
+        )),
+    ]
+    for days in (30, 60, 90, 120):
+        aggregations.append(FilterAggregation('cases_{}_d'.format(days), filters.AND(
+            open_cases, modified_range(gte=utcnow - timedelta(days=days), lte=utcnow)
+        )))
+    buckets = _domain_buckets(CaseES(), domains, aggregations)
+
+    stats = {}
+    for dom in domains:
+        bucket = buckets.get(dom)
+        stats[dom] = {
+            "cp_n_cases": bucket.doc_count if bucket else 0,
+            "cp_n_active_cases": _bucket_count(bucket, 'cases_120_d'),
+            "cp_n_inactive_cases": _bucket_count(bucket, 'inactive'),
+            "cp_n_30_day_cases": _bucket_count(bucket, 'cases_30_d'),
+            "cp_n_60_day_cases": _bucket_count(bucket, 'cases_60_d'),
+            "cp_n_90_day_cases": _bucket_count(bucket, 'cases_90_d'),
+        }
+    return stats
+
+
+def _bulk_sms_stats(domains):
+    # the same filters as _sms_helper, whose date range is always the last 30 days
+    last_30_days = received(date.today() - relativedelta(days=30))
+    aggregations = [
+        FilterAggregation('incoming', direction("I")),
+        FilterAggregation('outgoing', direction("O")),
+        FilterAggregation('last_30_days', last_30_days),
+        FilterAggregation('incoming_last_30_days', filters.AND(direction("I"), last_30_days)),
+        FilterAggregation('outgoing_last_30_days', filters.AND(direction("O"), last_30_days)),
+    ]
+    buckets = _domain_buckets(SMSES(), domains, aggregations)
+
+    stats = {}
+    for dom in domains:
+        bucket = buckets.get(dom)
+        n_sms = bucket.doc_count if bucket else 0
+        n_sms_30_d = _bucket_count(bucket, 'last_30_days')
+        n_sms_in_30_d = _bucket_count(bucket, 'incoming_last_30_days')
+        n_sms_out_30_d = _bucket_count(bucket, 'outgoing_last_30_days')
+        stats[dom] = {
+            "cp_n_in_sms": _bucket_count(bucket, 'incoming'),
+            "cp_n_out_sms": _bucket_count(bucket, 'outgoing'),
+            "cp_n_sms_ever": n_sms,
+            "cp_n_sms_30_d": n_sms_30_d,
+            "cp_n_sms_60_d": n_sms_30_d,
+            "cp_n_sms_90_d": n_sms_30_d,
+            "cp_sms_ever": int(n_sms > 0),
+            "cp_sms_30_d": int(n_sms_30_d > 0),
+            "cp_n_sms_in_30_d": n_sms_in_30_d,
+            "cp_n_sms_in_60_d": n_sms_in_30_d,
+            "cp_n_sms_in_90_d": n_sms_in_30_d,
+            "cp_n_sms_out_30_d": n_sms_out_30_d,
+            "cp_n_sms_out_60_d": n_sms_out_30_d,
+            "cp_n_sms_out_90_d": n_sms_out_30_d,
+        }
+    return stats
+
+
+def _bucket_count(bucket, aggregation_name):
+    # domains without any documents don't have a bucket
+    return getattr(bucket, aggregation_name).doc_count if bucket else 0
+
+
+def _es_datetime(value):
+    # date aggregations return milliseconds since the epoch
+    return datetime.utcfromtimestamp(value / 1000.0) if value is not None else None
 
 
 def total_distinct_users(domain):
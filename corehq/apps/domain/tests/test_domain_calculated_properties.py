@@ -4,7 +4,7 @@ import json
 from django.test import TestCase
 
 from corehq.apps.domain.models import Domain
-from corehq.apps.domain.calculations import all_domain_stats, calced_props
+from corehq.apps.domain.calculations import all_domain_es_stats, all_domain_stats, calced_props
 from corehq.elastic import get_es_new
 from corehq.pillows.mappings.case_mapping import CASE_INDEX_INFO
 from corehq.pillows.mappings.sms_mapping import SMS_INDEX_INFO
@@ -39,3 +39,16 @@ class DomainCalculatedPropertiesTest(TestCase):
         self.assertFalse(props['cp_has_app'])
         # ensure serializable
         json.dumps(props)
+
+    def test_es_stats_of_several_domains(self):
+        es_stats = all_domain_es_stats([self.domain.name, 'other-b9289e19d819'])
+        self.assertEqual(set(es_stats), {self.domain.name, 'other-b9289e19d819'})
+        self.assertEqual(es_stats[self.domain.name]['cp_n_forms'], 0)
+        self.assertEqual(es_stats[self.domain.name]['cp_n_cases'], 0)
+        self.assertEqual(es_stats[self.domain.name]['cp_n_sms_ever'], 0)
+        self.assertIsNone(es_stats[self.domain.name]['cp_last_form'])
+        self.assertFalse(es_stats[self.domain.name]['cp_is_active'])
+
+        props = calced_props(self.domain.name, self.domain._id, all_domain_stats(), es_stats[self.domain.name])
+        self.assertDictContainsSubset(es_stats[self.domain.name], props)
+        self.assertIsNone(props['cp_300th_form'])
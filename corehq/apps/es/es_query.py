@@ -110,6 +110,7 @@ from corehq.elastic import (
     ESError,
     run_query,
     scroll_query,
+    parallel_scroll_query,
     SIZE_LIMIT,
     ScanResult,
     SCROLL_PAGE_SIZE_LIMIT,
@@ -245,6 +246,32 @@ class ESQuery(object):
             (ESQuerySet.normalize_result(query, r) for r in result)
         )
 
+    def parallel_scroll(self, ordered=False, buffer_size=None):
+        """
+        Like scroll, but runs a scroll for each shard of the index concurrently.
+        Useful for scanning through very large numbers of documents.
+
+        :param ordered: If True, the results of each shard are yielded together,
+                        so the order is consistent between runs, and the shards
+                        are scrolled one after the other. Otherwise they are
+                        scrolled concurrently and yielded as soon as they're available.
+        :param buffer_size: The maximum number of results to hold in memory for each shard
+        """
+        query = deepcopy(self)
+        if query._size is None:
+            query._size = SCROLL_PAGE_SIZE_LIMIT
+        result = parallel_scroll_query(
+            query.index,
+            query.raw_query,
+            es_instance_alias=self.es_instance_alias,
+            ordered=ordered,
+            buffer_size=buffer_size,
+        )
+        return ScanResult(
+            result.count,
+            (ESQuerySet.normalize_result(query, r) for r in result)
+        )
+
     @property
     def _filters(self):
         return self.es_query['query']['filtered']['filter']['and']
@@ -0,0 +1,84 @@
+from unittest import TestCase
+
+from mock import patch
+
+from corehq.elastic import parallel_scroll_query
+
+
+class FakeShardedClient(object):
+    """
+    Pretends to be an ES client for an index where each shard holds a list of docs,
+    which are returned a page at a time through the scroll api.
+    """
+
+    def __init__(self, docs_by_shard, page_size=2, fail_on_shard=None):
+        self.docs_by_shard = docs_by_shard
+        self.page_size = page_size
+        self.fail_on_shard = fail_on_shard
+        self.started_shards = []
+
+    def search_shards(self, index, doc_type):
+        # two copies of each shard
+        return {'shards': [
+            [{'shard': shard, 'primary': True}, {'shard': shard, 'primary': False}]
+            for shard in self.docs_by_shard
+        ]}
+
+    def search(self, body, scroll=None, preference=None, search_type=None, **kwargs):
+        if search_type == 'count':
+            return {'hits': {'total': sum(len(docs) for docs in self.docs_by_shard.values()), 'hits': []}}
+        shard = int(preference.split(':')[1])
+        self.started_shards.append(shard)
+        return {
+            '_scroll_id': '{}-0'.format(shard),
+            'hits': {'total': len(self.docs_by_shard[shard]), 'hits': []},
+        }
+
+    def scroll(self, scroll_id, scroll):
+        shard, page = map(int, scroll_id.split('-'))
+        if shard == self.fail_on_shard:
+            raise ValueError('scroll failed')
+        start = page * self.page_size
+        hits = [{'_source': doc} for doc in self.docs_by_shard[shard][start:start + self.page_size]]
+        return {
+            '_scroll_id': '{}-{}'.format(shard, page + 1),
+            '_shards': {'failed': 0, 'total': 1},
+            'hits': {'hits': hits},
+        }
+
+
+class TestParallelScroll(TestCase):
+    docs_by_shard = {
+        0: [{'_id': 'a'}, {'_id': 'b'}, {'_id': 'c'}],
+        1: [],
+        2: [{'_id': 'd'}, {'_id': 'e'}, {'_id': 'f'}, {'_id': 'g'}, {'_id': 'h'}],
+    }
+
+    def _scroll(self, client, **kwargs):
+        with patch('corehq.elastic.get_es_instance', return_value=client):
+            result = parallel_scroll_query('forms', {}, **kwargs)
+            return result.count, [hit['_source']['_id'] for hit in result]
+
+    def test_ordered(self):
+        count, doc_ids = self._scroll(FakeShardedClient(self.docs_by_shard), ordered=True, buffer_size=1)
+        self.assertEqual(count, 8)
+        self.assertEqual(doc_ids, ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h'])
+
+    def test_unordered(self):
+        count, doc_ids = self._scroll(FakeShardedClient(self.docs_by_shard), buffer_size=1)
+        self.assertEqual(count, 8)
+        self.assertEqual(sorted(doc_ids), ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h'])
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            self._scroll(FakeShardedClient(self.docs_by_shard, fail_on_shard=2), ordered=True)
+
+    def test_ordered_scrolls_start_in_turn(self):
+        client = FakeShardedClient(self.docs_by_shard)
+        with patch('corehq.elastic.get_es_instance', return_value=client):
+            result = iter(parallel_scroll_query('forms', {}, ordered=True))
+            self.assertEqual(next(result)['_source']['_id'], 'a')
+            # the scroll of a later shard would expire while it waited
+            self.assertEqual(client.started_shards, [0])
+            self.assertEqual([hit['_source']['_id'] for hit in result], ['b', 'c', 'd', 'e', 'f', 'g', 'h'])
+            self.assertEqual(client.started_shards, [0, 1, 2])
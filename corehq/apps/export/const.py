@@ -2,6 +2,8 @@
 Some of these constants correspond to constants set in corehq/apps/export/static/export/js/const.js
 so if changing a value, ensure that both places reflect the change
 """
+from datetime import timedelta
+
 from couchexport.deid import (
     deid_ID,
     deid_date
@@ -80,6 +82,15 @@ CASE_EXPORT = 'case'
 SMS_EXPORT = 'sms'
 MAX_EXPORTABLE_ROWS = 100000
 CASE_SCROLL_SIZE = 10000
+# number of rows to collect for a table before writing them to the export file
+EXPORT_WRITE_BATCH_SIZE = 1000
+# number of documents to fetch ahead of the ones that are being exported
+EXPORT_PREFETCH_SIZE = 1000
+# incremental daily saved exports are fully rebuilt at least this often, to drop
+# the rows of deleted documents and pick up changes to transformed values (e.g. usernames)
+INCREMENTAL_EXPORT_FULL_REBUILD_INTERVAL = timedelta(days=7)
+# how far before the last checkpoint to look for changed documents, to allow for ES refresh lag
+INCREMENTAL_EXPORT_CHECKPOINT_OVERLAP = timedelta(hours=1)
 
 # When a question is missing completely from a form/case this should be the value
 MISSING_VALUE = '---'
@@ -1,7 +1,9 @@
 from elasticsearch import ElasticsearchException
 
 from corehq.apps.es import CaseES, GroupES, LedgerES
-from corehq.apps.es import FormES
+from corehq.apps.es import FormES, filters
+from corehq.apps.es import cases as case_filters
+from corehq.apps.es import forms as form_filters
 from corehq.apps.es.sms import SMSES
 from corehq.apps.es.aggregations import AggregationTerm, NestedTermAggregationsHelper
 from corehq.elastic import get_es_new, ES_EXPORT_INSTANCE
@@ -35,6 +37,68 @@ def get_case_export_base_query(domain, case_type):
     return query
 
 
+def get_multi_form_export_base_query(domain, app_xmlns_pairs, include_errors):
+    """
+    Query for the forms of several form exports at once
+    :param app_xmlns_pairs: list of (app_id, xmlns) tuples, one for each export
+    """
+    query = (FormES(es_instance_alias=ES_EXPORT_INSTANCE)
+            .domain(domain)
+            .filter(filters.OR(*[
+                filters.AND(form_filters.app(app_id), form_filters.xmlns(xmlns))
+                for app_id, xmlns in app_xmlns_pairs
+            ]))
+            .remove_default_filter('has_user'))
+
+    if not EXPORT_NO_SORT.enabled(domain):
+        query = query.sort("received_on")
+
+    if include_errors:
+        query = query.remove_default_filter("is_xform_instance")
+        query = query.doc_type(["xforminstance", "xformarchived", "xformdeprecated", "xformduplicate"])
+    return query
+
+
+def get_multi_case_export_base_query(domain, case_types):
+    """
+    Query for the cases of several case exports at once
+    """
+    query = (CaseES(es_instance_alias=ES_EXPORT_INSTANCE)
+            .domain(domain)
+            .filter(filters.OR(*[case_filters.case_type(case_type) for case_type in case_types])))
+
+    if not EXPORT_NO_SORT.enabled(domain):
+        query = query.sort("opened_on")
+
+    return query
+
+
+def get_form_ids_inserted_since(domain, since):
+    """
+    Return the ids of all the forms in the domain that were (re)indexed since the given
+    time, including archived and error forms which aren't matched by the default filters
+    """
+    return _get_ids_inserted_since(FormES(es_instance_alias=ES_EXPORT_INSTANCE), domain, since)
+
+
+def get_case_ids_inserted_since(domain, since):
+    """
+    Return the ids of all the cases in the domain that were (re)indexed since the given
+    time, regardless of their case type
+    """
+    return _get_ids_inserted_since(CaseES(es_instance_alias=ES_EXPORT_INSTANCE), domain, since)
+
+
+def _get_ids_inserted_since(query, domain, since):
+    return (query
+            .remove_default_filters()
+            .domain(domain)
+            .filter(filters.date_range('inserted_at', gte=since))
+            .exclude_source()
+            .size(1000)
+            .scroll())
+
+
 def get_sms_export_base_query(domain):
     return (SMSES(es_instance_alias=ES_EXPORT_INSTANCE)
             .domain(domain)
@@ -1,32 +1,57 @@
 import contextlib
+import cPickle as pickle
+import gzip
+import hashlib
+import json
 import os
+import shutil
 import tempfile
+import threading
 import time
 import sys
-from collections import Counter
+from collections import Counter, OrderedDict
+from Queue import Queue, Full
 
 import datetime
 
+import six
+
 from couchdbkit import ResourceConflict
 
 from soil import DownloadBase
 
 from couchexport.export import FormattedRow, get_writer
 from couchexport.models import Format
-from corehq.toggles import PAGINATED_EXPORTS
+from corehq.toggles import (
+    INCREMENTAL_DAILY_SAVED_EXPORTS,
+    PAGINATED_EXPORTS,
+    PARALLEL_EXPORT_SCROLL,
+)
 from corehq.util.files import safe_filename
 from corehq.util.datadog.gauges import datadog_histogram
 from corehq.apps.export.esaccessors import (
     get_form_export_base_query,
     get_case_export_base_query,
     get_sms_export_base_query,
+    get_multi_form_export_base_query,
+    get_multi_case_export_base_query,
+    get_form_ids_inserted_since,
+    get_case_ids_inserted_since,
 )
+from corehq.apps.export.filters import InsertedAtRangeFilter
 from corehq.apps.export.models.new import (
     CaseExportInstance,
+    ExportRow,
     FormExportInstance,
     SMSExportInstance,
 )
-from corehq.apps.export.const import MAX_EXPORTABLE_ROWS
+from corehq.apps.export.const import (
+    MAX_EXPORTABLE_ROWS,
+    EXPORT_WRITE_BATCH_SIZE,
+    EXPORT_PREFETCH_SIZE,
+    INCREMENTAL_EXPORT_CHECKPOINT_OVERLAP,
+    INCREMENTAL_EXPORT_FULL_REBUILD_INTERVAL,
+)
 
 
 class ExportFile(object):
@@ -110,7 +135,16 @@ class _Writer(object):
         :param table: A TableConfiguration
         :param row: An ExportRow
         """
-        return self.writer.write([(table, [FormattedRow(data=row.data)])])
+        return self.write_rows(table, [row])
+
+    def write_rows(self, table, rows):
+        """
+        Write the given rows to the given table of the export.
+        _Writer must be opened first.
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
+        return self.writer.write([(table, [FormattedRow(data=row.data) for row in rows])])
 
     def get_preview(self):
         return self.writer.get_preview()
@@ -264,16 +298,34 @@ class _PaginatedWriter(object):
         :param table: A TableConfiguration
         :param row: An ExportRow
         """
-        if self.rows_written[table] >= self.page_length * (self.pages[table] + 1):
-            self.pages[table] += 1
-            self.writer.add_table(
-                self._paged_table_index(table),
-                self._get_paginated_headers()[self._paged_table_index(table)][0],
-                table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
-            )
+        self.write_rows(table, [row])
+
+    def write_rows(self, table, rows):
+        """
+        Write the given rows to the given table of the export.
+        Rows that don't fit on the current page of the table are written
+        to a new page.
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
+        rows = list(rows)
+        while rows:
+            page_end = self.page_length * (self.pages[table] + 1)
+            if self.rows_written[table] >= page_end:
+                self.pages[table] += 1
+                page_end += self.page_length
+                self.writer.add_table(
+                    self._paged_table_index(table),
+                    self._get_paginated_headers()[self._paged_table_index(table)][0],
+                    table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
+                )
 
-        self.writer.write([(self._paged_table_index(table), [FormattedRow(data=row.data)])])
-        self.rows_written[table] += 1
+            page_space = page_end - self.rows_written[table]
+            page_rows, rows = rows[:page_space], rows[page_space:]
+            self.writer.write([
+                (self._paged_table_index(table), [FormattedRow(data=row.data) for row in page_rows])
+            ])
+            self.rows_written[table] += len(page_rows)
 
     @property
     def path(self):
@@ -320,23 +372,57 @@ def get_export_file(export_instances, filters, progress_tracker=None):
 
     writer = _get_writer(export_instances)
     with writer.open(export_instances):
-        for export_instance in export_instances:
-            # TODO: Don't get the docs multiple times if you don't have to
-            docs = _get_export_documents(export_instance, filters)
-            _write_export_instance(writer, export_instance, docs, progress_tracker)
+        for instance_group in _get_export_instance_groups(export_instances):
+            if len(instance_group) == 1:
+                docs = _get_export_documents(instance_group[0], filters)
+            else:
+                docs = _get_shared_export_documents(instance_group, filters)
+            _write_export_instances(writer, instance_group, docs, progress_tracker)
 
     return ExportFile(writer.path, writer.format)
 
 
+def _get_export_instance_groups(export_instances):
+    """
+    Group the export instances that can be written from a single scan of
+    the documents e.g. the form exports of a bulk export
+    :return: A list of lists of ExportInstances
+    """
+    groups = OrderedDict()
+    for export_instance in export_instances:
+        groups.setdefault(_get_shared_scan_key(export_instance), []).append(export_instance)
+    return groups.values()
+
+
+def _get_shared_scan_key(export_instance):
+    if isinstance(export_instance, FormExportInstance):
+        return ('form', export_instance.domain, export_instance.include_errors)
+    if isinstance(export_instance, CaseExportInstance):
+        return ('case', export_instance.domain)
+    return id(export_instance)
+
+
 def _get_export_documents(export_instance, filters):
-    query = _get_base_query(export_instance)
+    return _get_filtered_documents(export_instance.domain, _get_base_query(export_instance), filters)
+
+
+def _get_shared_export_documents(export_instances, filters):
+    return _get_filtered_documents(
+        export_instances[0].domain, _get_shared_base_query(export_instances), filters
+    )
+
+
+def _get_filtered_documents(domain, query, filters):
     for filter in filters:
         query = query.filter(filter.to_es_filter())
     # size here limits each scroll request, not the total number of results
     # We believe we can occasionally hit the 5m limit to process a single scroll window
     # with a window size of 1000 (https://manage.dimagi.com/default.asp?248384).
     # Thus, smaller window size is intentional
-    return query.size(500).scroll()
+    query = query.size(500)
+    if PARALLEL_EXPORT_SCROLL.enabled(domain):
+        return query.parallel_scroll()
+    return query.scroll()
 
 
 def get_export_size(export_instance, filters):
@@ -354,6 +440,20 @@ def _write_export_instance(writer, export_instance, documents, progress_tracker=
     :param progress_tracker: A task for soil to track progress against
     :return: None
     """
+    _write_export_instances(writer, [export_instance], documents, progress_tracker)
+
+
+def _write_export_instances(writer, export_instances, documents, progress_tracker=None):
+    """
+    Write rows for several export instances from a single pass over the documents.
+    Each document is only exported by the instances that it matches (see
+    _export_instance_matches_doc) and rows are written to each table in batches.
+    :param writer: An open _Writer
+    :param export_instances: A list of ExportInstances
+    :param documents: A ScanResult, or if progress_tracker is None, any iterable yielding documents
+    :param progress_tracker: A task for soil to track progress against
+    :return: None
+    """
     if progress_tracker:
         DownloadBase.set_progress(progress_tracker, 0, documents.count)
 
@@ -363,29 +463,46 @@ def _write_export_instance(writer, export_instance, documents, progress_tracker=
     compute_total = 0
     write_total = 0
 
-    for row_number, doc in enumerate(documents):
+    row_numbers = Counter()
+    # id(table) -> (table, rows waiting to be written)
+    pending_rows = OrderedDict()
+
+    def write_pending_rows(table_id):
+        table, rows = pending_rows.pop(table_id)
+        write_start = _time_in_milliseconds()
+        writer.write_rows(table, rows)
+        return _time_in_milliseconds() - write_start
+
+    for doc_number, doc in enumerate(_iter_prefetched(documents, EXPORT_PREFETCH_SIZE)):
         total_bytes += sys.getsizeof(doc)
-        for table in export_instance.selected_tables:
-            compute_start = _time_in_milliseconds()
-            rows = table.get_rows(
-                doc,
-                row_number,
-                split_columns=export_instance.split_multiselects,
-                transform_dates=export_instance.transform_dates,
-            )
-            compute_total += _time_in_milliseconds() - compute_start
+        for instance_index, export_instance in enumerate(export_instances):
+            if len(export_instances) > 1 and not _export_instance_matches_doc(export_instance, doc):
+                continue
+
+            row_number = row_numbers[instance_index]
+            row_numbers[instance_index] += 1
+            for table in export_instance.selected_tables:
+                compute_start = _time_in_milliseconds()
+                rows = table.get_rows(
+                    doc,
+                    row_number,
+                    split_columns=export_instance.split_multiselects,
+                    transform_dates=export_instance.transform_dates,
+                )
+                compute_total += _time_in_milliseconds() - compute_start
 
-            write_start = _time_in_milliseconds()
-            for row in rows:
-                # It might be bad to write one row at a time when you can do more (from a performance perspective)
-                # Regardless, we should handle the batching of rows in the _Writer class, not here.
-                writer.write(table, row)
-            write_total += _time_in_milliseconds() - write_start
+                table_rows = pending_rows.setdefault(id(table), (table, []))[1]
+                table_rows.extend(rows)
+                if len(table_rows) >= EXPORT_WRITE_BATCH_SIZE:
+                    write_total += write_pending_rows(id(table))
 
-            total_rows += len(rows)
+                total_rows += len(rows)
 
         if progress_tracker:
-            DownloadBase.set_progress(progress_tracker, row_number + 1, documents.count)
+            DownloadBase.set_progress(progress_tracker, doc_number + 1, documents.count)
+
+    for table_id in list(pending_rows):
+        write_total += write_pending_rows(table_id)
 
     end = _time_in_milliseconds()
     tags = ['format:{}'.format(writer.format)]
@@ -394,6 +511,62 @@ def _write_export_instance(writer, export_instance, documents, progress_tracker=
     _record_datadog_export_duration(end - start, total_bytes, total_rows, tags)
 
 
+def _export_instance_matches_doc(export_instance, doc):
+    """
+    :return: True if the document is one of the documents exported by the
+             export instance (see _get_base_query)
+    """
+    if isinstance(export_instance, FormExportInstance):
+        return doc.get('xmlns') == export_instance.xmlns and doc.get('app_id') == export_instance.app_id
+    if isinstance(export_instance, CaseExportInstance):
+        return doc.get('type') == export_instance.case_type
+    return True
+
+
+def _iter_prefetched(documents, buffer_size):
+    """
+    Iterate over the documents while the next ones are fetched in a background
+    thread so that waiting on the document source (e.g. the next page of an
+    ES scroll) overlaps with generating the rows for the current documents.
+    """
+    queue = Queue(maxsize=buffer_size)
+    stopped = threading.Event()
+    end_of_documents = object()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                queue.put(item, timeout=1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def fetch():
+        try:
+            for doc in documents:
+                if not put((doc, None)):
+                    return
+        except Exception:
+            put((None, sys.exc_info()))
+        else:
+            put((end_of_documents, None))
+
+    fetch_thread = threading.Thread(target=fetch)
+    fetch_thread.daemon = True
+    fetch_thread.start()
+    try:
+        while True:
+            doc, exc_info = queue.get()
+            if exc_info:
+                six.reraise(*exc_info)
+            if doc is end_of_documents:
+                return
+            yield doc
+    finally:
+        stopped.set()
+
+
 def _time_in_milliseconds():
     return int(time.time() * 1000)
 
@@ -450,6 +623,29 @@ def _get_base_query(export_instance):
         )
 
 
+def _get_shared_base_query(export_instances):
+    """
+    Return an ESQuery object for all the documents of the given export instances.
+    The instances must all have the same _get_shared_scan_key.
+    """
+    export_instance = export_instances[0]
+    if isinstance(export_instance, FormExportInstance):
+        return get_multi_form_export_base_query(
+            export_instance.domain,
+            [(instance.app_id, instance.xmlns) for instance in export_instances],
+            export_instance.include_errors
+        )
+    if isinstance(export_instance, CaseExportInstance):
+        return get_multi_case_export_base_query(
+            export_instance.domain,
+            [instance.case_type for instance in export_instances]
+        )
+    else:
+        raise Exception(
+            "Unknown shared base query for export instance type {}".format(type(export_instance))
+        )
+
+
 def rebuild_export(export_instance, last_access_cutoff=None, filters=None):
     """
     Rebuild the given daily saved ExportInstance
@@ -457,6 +653,9 @@ def rebuild_export(export_instance, last_access_cutoff=None, filters=None):
     if _should_not_rebuild_export(export_instance, last_access_cutoff):
         return
     filters = filters or export_instance.get_filters()
+    if _can_rebuild_incrementally(export_instance):
+        _rebuild_export_incrementally(export_instance, filters or [])
+        return
     export_file = get_export_file([export_instance], filters or [])
     with export_file as payload:
         _save_export_payload(export_instance, payload)
@@ -471,14 +670,187 @@ def _should_not_rebuild_export(export, last_access_cutoff):
     )
 
 
-def _save_export_payload(export, payload):
+def _can_rebuild_incrementally(export_instance):
+    return (
+        isinstance(export_instance, (FormExportInstance, CaseExportInstance))
+        and INCREMENTAL_DAILY_SAVED_EXPORTS.enabled(export_instance.domain)
+    )
+
+
+def _rebuild_export_incrementally(export_instance, filters):
+    """
+    Rebuild a daily saved export from the rows saved by its previous rebuild and
+    only the documents that were (re)indexed since then. The rows of changed
+    documents replace their previous rows, and the rows of new documents are
+    appended. The export is rebuilt from scratch if its tables or filters changed,
+    or if it hasn't been fully rebuilt for INCREMENTAL_EXPORT_FULL_REBUILD_INTERVAL.
+    """
+    # anything indexed after this point will be picked up by the next rebuild
+    checkpoint = datetime.datetime.utcnow()
+    config_hash = _get_incremental_config_hash(export_instance, filters)
+    full_rebuild = _needs_full_rebuild(export_instance, config_hash, checkpoint)
+    if full_rebuild:
+        changed_doc_ids = set()
+        documents = _get_export_documents(export_instance, filters)
+        previous_rows = None
+    else:
+        since = export_instance.last_incremental_checkpoint - INCREMENTAL_EXPORT_CHECKPOINT_OVERLAP
+        changed_doc_ids = set(_get_doc_ids_inserted_since(export_instance, since))
+        documents = _get_export_documents(export_instance, filters + [InsertedAtRangeFilter(gte=since)])
+        previous_rows = _get_saved_rows_file(export_instance)
+
+    writer = _get_writer([export_instance])
+    fd, rows_path = tempfile.mkstemp()
+    try:
+        with writer.open([export_instance]), os.fdopen(fd, 'wb') as rows_file:
+            _write_incremental_export(writer, export_instance, documents, changed_doc_ids,
+                                      previous_rows, rows_file)
+        with ExportFile(writer.path, writer.format) as payload, open(rows_path, 'rb') as rows:
+            export_instance.last_incremental_checkpoint = checkpoint
+            export_instance.incremental_config_hash = config_hash
+            if full_rebuild:
+                export_instance.last_full_rebuild = checkpoint
+            _save_export_payload(export_instance, payload, incremental_rows=rows)
+    finally:
+        if previous_rows is not None:
+            previous_rows.close()
+        os.remove(rows_path)
+
+
+def _needs_full_rebuild(export_instance, config_hash, now):
+    return (
+        not export_instance.last_incremental_checkpoint
+        or not export_instance.last_full_rebuild
+        or not export_instance.has_incremental_rows()
+        or export_instance.incremental_config_hash != config_hash
+        or export_instance.last_full_rebuild < now - INCREMENTAL_EXPORT_FULL_REBUILD_INTERVAL
+    )
+
+
+def _get_incremental_config_hash(export_instance, filters):
+    """
+    Hash everything that the saved rows of an export depend on, other than the documents.
+    Relative date filters and filters on the members of groups and locations change this
+    hash whenever the documents they select change.
+    """
+    config = {
+        'tables': [table.to_json() for table in export_instance.selected_tables],
+        'split_multiselects': export_instance.split_multiselects,
+        'transform_dates': export_instance.transform_dates,
+        'filters': [filter.to_es_filter() for filter in filters],
+    }
+    return hashlib.md5(json.dumps(config, sort_keys=True, default=str)).hexdigest()
+
+
+def _get_doc_ids_inserted_since(export_instance, since):
+    if isinstance(export_instance, FormExportInstance):
+        return get_form_ids_inserted_since(export_instance.domain, since)
+    if isinstance(export_instance, CaseExportInstance):
+        return get_case_ids_inserted_since(export_instance.domain, since)
+    raise Exception(
+        "Unknown changed documents query for export instance type {}".format(type(export_instance))
+    )
+
+
+def _write_incremental_export(writer, export_instance, documents, changed_doc_ids, previous_rows,
+                              rows_file):
+    """
+    Write the rows of an export, and save them for the next incremental rebuild.
+    :param writer: An open _Writer
+    :param documents: The documents that changed since the previous rebuild, or all of
+                      the documents if previous_rows is None
+    :param changed_doc_ids: The ids of all the documents that changed since the previous
+                            rebuild, including the ones that are no longer part of the export
+    :param previous_rows: A file object with the rows saved by the previous rebuild, or None
+    :param rows_file: A file object to save the rows to
+    """
+    tables = export_instance.selected_tables
+    pending_rows = [[] for table in tables]
+
+    def get_rows(doc, row_number):
+        return [
+            [row.data for row in table.get_rows(
+                doc,
+                row_number,
+                split_columns=export_instance.split_multiselects,
+                transform_dates=export_instance.transform_dates,
+            )]
+            for table in tables
+        ]
+
+    def write_doc_rows(doc_id, row_number, doc_rows):
+        pickle.dump((doc_id, row_number, doc_rows), saved_rows, pickle.HIGHEST_PROTOCOL)
+        for table, table_rows, pending in zip(tables, doc_rows, pending_rows):
+            pending.extend(ExportRow(data) for data in table_rows)
+            if len(pending) >= EXPORT_WRITE_BATCH_SIZE:
+                writer.write_rows(table, pending)
+                del pending[:]
+
+    with gzip.GzipFile(fileobj=rows_file, mode='wb') as saved_rows:
+        next_row_number = 0
+        new_documents = _iter_prefetched(documents, EXPORT_PREFETCH_SIZE)
+        if previous_rows is not None:
+            changed_docs = OrderedDict((doc['_id'], doc) for doc in new_documents)
+            for doc_id, row_number, doc_rows in _iter_saved_rows(previous_rows):
+                next_row_number = max(next_row_number, row_number + 1)
+                if doc_id in changed_docs:
+                    doc_rows = get_rows(changed_docs.pop(doc_id), row_number)
+                elif doc_id in changed_doc_ids:
+                    # the document was changed so that it's no longer part of the export
+                    continue
+                write_doc_rows(doc_id, row_number, doc_rows)
+            new_documents = six.itervalues(changed_docs)
+
+        for doc in new_documents:
+            write_doc_rows(doc['_id'], next_row_number, get_rows(doc, next_row_number))
+            next_row_number += 1
+
+    for table, pending in zip(tables, pending_rows):
+        if pending:
+            writer.write_rows(table, pending)
+
+
+def _get_saved_rows_file(export_instance):
+    # GzipFile needs to be able to seek in the file it reads from
+    rows_file = tempfile.TemporaryFile()
+    saved_rows = export_instance.get_incremental_rows(stream=True)
+    try:
+        shutil.copyfileobj(saved_rows, rows_file)
+    finally:
+        saved_rows.close()
+    rows_file.seek(0)
+    return rows_file
+
+
+def _iter_saved_rows(rows_file):
+    with gzip.GzipFile(fileobj=rows_file, mode='rb') as saved_rows:
+        while True:
+            try:
+                yield pickle.load(saved_rows)
+            except EOFError:
+                return
+
+
+def _save_export_payload(export, payload, incremental_rows=None):
     """
     Save the contents of an export file to disk for later retrieval.
+    :param incremental_rows: A file object with the rows of the export, for incremental rebuilds
     """
     if export.last_accessed is None:
         export.last_accessed = datetime.datetime.utcnow()
     export.last_updated = datetime.datetime.utcnow()
 
+    if incremental_rows is not None:
+        try:
+            # the rows and the checkpoint must be saved together
+            with export.atomic_blobs():
+                export.set_payload(payload)
+                export.set_incremental_rows(incremental_rows)
+        except ResourceConflict:
+            # task was executed concurrently, so let first to finish win and abort the rest
+            pass
+        return
+
     try:
         export.save()
     except ResourceConflict:
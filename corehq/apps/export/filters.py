@@ -218,3 +218,12 @@ class SmsReceivedRangeFilter(RangeExportFilter):
 
     def to_es_filter(self):
         return sms_received(self.gt, self.gte, self.lt, self.lte)
+
+
+class InsertedAtRangeFilter(RangeExportFilter):
+    """
+    Filter on the time the document was (re)indexed in ES
+    """
+
+    def to_es_filter(self):
+        return esfilters.date_range('inserted_at', self.gt, self.gte, self.lt, self.lte)
@@ -97,6 +97,7 @@ from corehq.apps.export.utils import (
 )
 
 DAILY_SAVED_EXPORT_ATTACHMENT_NAME = "payload"
+INCREMENTAL_ROWS_ATTACHMENT_NAME = "incremental_rows"
 
 
 class PathNode(DocumentSchema):
@@ -633,6 +634,12 @@ class ExportInstance(BlobMixin, Document):
     # daily saved export fields:
     last_updated = DateTimeProperty()
     last_accessed = DateTimeProperty()
+    # incremental daily saved export fields:
+    # documents (re)indexed before this time are included in the saved rows
+    last_incremental_checkpoint = DateTimeProperty()
+    last_full_rebuild = DateTimeProperty()
+    # hash of the tables and filters that the saved rows were generated with
+    incremental_config_hash = StringProperty()
 
     class Meta:
         app_label = 'export'
@@ -878,6 +885,24 @@ class ExportInstance(BlobMixin, Document):
         """
         return self.fetch_attachment(DAILY_SAVED_EXPORT_ATTACHMENT_NAME, stream=stream)
 
+    def has_incremental_rows(self):
+        """
+        Return True if the rows of the pre-computed export are saved for incremental rebuilds.
+        """
+        return INCREMENTAL_ROWS_ATTACHMENT_NAME in self.blobs
+
+    def set_incremental_rows(self, rows):
+        """
+        Save the rows of the pre-computed export for incremental rebuilds.
+        """
+        self.put_attachment(rows, INCREMENTAL_ROWS_ATTACHMENT_NAME)
+
+    def get_incremental_rows(self, stream=False):
+        """
+        Get the saved rows of the pre-computed export (see export.rebuild_export)
+        """
+        return self.fetch_attachment(INCREMENTAL_ROWS_ATTACHMENT_NAME, stream=stream)
+
     def copy_export(self):
         export_json = self.to_json()
         del export_json['_id']
@@ -16,6 +16,8 @@ from corehq.apps.export.export import (
     _get_writer,
     _Writer,
     _write_export_instance,
+    _write_export_instances,
+    _write_incremental_export,
     ExportFile,
     get_export_file,
 )
@@ -628,6 +630,105 @@ class WriterTest(SimpleTestCase):
                 }
             )
 
+    def test_write_export_instances_single_pass(self):
+        """
+        Confirm that writing several export instances from one set of documents
+        only exports each document to the instances that it belongs to.
+        """
+        def _table(label):
+            return TableConfiguration(
+                label=label,
+                selected=True,
+                path=[],
+                columns=[
+                    ExportColumn(
+                        label="Q3",
+                        item=ScalarItem(
+                            path=[PathNode(name='form'), PathNode(name='q3')],
+                        ),
+                        selected=True,
+                    ),
+                ]
+            )
+
+        export_instances = [
+            FormExportInstance(app_id='app', xmlns='xmlns-1', tables=[_table("Form 1")]),
+            FormExportInstance(app_id='app', xmlns='xmlns-2', tables=[_table("Form 2")]),
+        ]
+        docs = [
+            dict(self.docs[0], app_id='app', xmlns='xmlns-1'),
+            dict(self.docs[1], app_id='app', xmlns='xmlns-2'),
+            dict(self.docs[1], app_id='app', xmlns='xmlns-1'),
+            dict(self.docs[0], app_id='other-app', xmlns='xmlns-2'),
+        ]
+
+        writer = _Writer(get_writer(Format.JSON))
+        with writer.open(export_instances):
+            _write_export_instances(writer, export_instances, docs)
+
+        with ExportFile(writer.path, writer.format) as export:
+            self.assertEqual(
+                json.loads(export.read()),
+                {
+                    u'Form 1': {
+                        u'headers': [u'Q3'],
+                        u'rows': [[u'baz'], [u'bop']],
+                    },
+                    u'Form 2': {
+                        u'headers': [u'Q3'],
+                        u'rows': [[u'bop']],
+                    },
+                }
+            )
+
+    def test_write_incremental_export(self):
+        """
+        Confirm that an incremental rebuild replaces the rows of changed documents,
+        drops the documents that are no longer part of the export, and appends
+        new documents.
+        """
+        export_instance = FormExportInstance(
+            export_format=Format.JSON,
+            tables=[
+                TableConfiguration(
+                    label="My table",
+                    selected=True,
+                    path=[],
+                    columns=[
+                        ExportColumn(
+                            label="Q3",
+                            item=ScalarItem(
+                                path=[PathNode(name='form'), PathNode(name='q3')],
+                            ),
+                            selected=True,
+                        ),
+                    ]
+                )
+            ]
+        )
+
+        def _write(documents, changed_doc_ids, previous_rows):
+            rows_file = StringIO()
+            writer = _Writer(get_writer(Format.JSON))
+            with writer.open([export_instance]):
+                _write_incremental_export(writer, export_instance, documents, changed_doc_ids,
+                                          previous_rows, rows_file)
+            rows_file.seek(0)
+            with ExportFile(writer.path, writer.format) as export:
+                return json.loads(export.read())[u'My table'][u'rows'], rows_file
+
+        rows, saved_rows = _write(self.docs, set(), None)
+        self.assertEqual(rows, [[u'baz'], [u'bop']])
+
+        changed_doc = dict(self.docs[0], form={'q3': 'changed'})
+        new_doc = dict(self.docs[1], _id='new', form={'q3': 'new'})
+        rows, _ = _write(
+            [changed_doc, new_doc],
+            {changed_doc['_id'], new_doc['_id'], self.docs[1]['_id']},
+            saved_rows,
+        )
+        self.assertEqual(rows, [[u'changed'], [u'new']])
+
     def test_empty_location(self):
         export_instance = FormExportInstance(
             export_format=Format.JSON,
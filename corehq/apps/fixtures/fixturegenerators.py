@@ -2,9 +2,15 @@ from collections import defaultdict
 from xml.etree import ElementTree
 
 from casexml.apps.phone.fixtures import FixtureProvider
+from casexml.apps.phone.xml import get_serialized_element, tostring
 from corehq.apps.fixtures.models import FixtureDataItem, FixtureDataType
+from corehq.apps.fixtures.utils import get_fixture_cache_version
 from corehq.apps.products.fixtures import product_fixture_generator_json
 from corehq.apps.programs.fixtures import program_fixture_generator_json
+from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
+
+GLOBAL_ITEM_LIST_CACHE_KEY_PREFIX = 'fixtures-global-item-list'
+GLOBAL_ITEM_LIST_CACHE_TIMEOUT = 24 * 60 * 60
 
 
 def item_lists_by_domain(domain):
@@ -47,6 +53,19 @@ class ItemListsProvider(FixtureProvider):
         all_types = {t._id: t for t in FixtureDataType.by_domain(restore_user.domain)}
         global_types = {id: t for id, t in all_types.items() if t.is_global}
 
+        # the items of global types are the same for every user, so their XML is cached
+        cache = get_redis_default_cache()
+        cache_keys = _get_global_item_list_cache_keys(restore_user.domain, global_types)
+        cached_item_lists = cache.get_many(cache_keys.values()) if cache_keys else {}
+        global_item_lists = {
+            data_type_id: cached_item_lists[key]
+            for data_type_id, key in cache_keys.items()
+            if key in cached_item_lists
+        }
+        uncached_global_types = {
+            id: t for id, t in global_types.items() if id not in global_item_lists
+        }
+
         items_by_type = defaultdict(list)
 
         def _set_cached_type(item, data_type):
@@ -54,10 +73,11 @@ class ItemListsProvider(FixtureProvider):
             # have to do another db trip later
             item._data_type = data_type
 
-        items = FixtureDataItem.by_data_types(restore_user.domain, global_types)
-        for item in items:
-            _set_cached_type(item, global_types[item.data_type_id])
-            items_by_type[item.data_type_id].append(item)
+        if uncached_global_types:
+            items = FixtureDataItem.by_data_types(restore_user.domain, uncached_global_types)
+            for item in items:
+                _set_cached_type(item, global_types[item.data_type_id])
+                items_by_type[item.data_type_id].append(item)
 
         if set(all_types) - set(global_types):
             # only query ownership models if there are non-global types
@@ -73,27 +93,53 @@ class ItemListsProvider(FixtureProvider):
                 items_by_type[item.data_type_id].append(item)
 
         fixtures = []
+        item_lists_to_cache = {}
         types_sorted_by_tag = sorted(all_types.iteritems(), key=lambda (id_, type_): type_.tag)
         for data_type_id, data_type in types_sorted_by_tag:
             if data_type.is_indexed:
                 fixtures.append(self._get_schema_element(data_type))
-            items = sorted(items_by_type.get(data_type_id, []), key=lambda x: x.sort_key)
-            fixtures.append(self._get_fixture_element(data_type, restore_user.user_id, items))
+            if data_type_id in global_types:
+                if data_type_id not in global_item_lists:
+                    items = sorted(items_by_type.get(data_type_id, []), key=lambda x: x.sort_key)
+                    item_list = tostring(self._get_item_list_element(data_type, items))
+                    global_item_lists[data_type_id] = item_list
+                    item_lists_to_cache[cache_keys[data_type_id]] = item_list
+                fixtures.append(self._get_serialized_fixture(
+                    data_type, restore_user.user_id, global_item_lists[data_type_id]
+                ))
+            else:
+                items = sorted(items_by_type.get(data_type_id, []), key=lambda x: x.sort_key)
+                fixtures.append(self._get_fixture_element(data_type, restore_user.user_id, items))
+
+        if item_lists_to_cache:
+            cache.set_many(item_lists_to_cache, timeout=GLOBAL_ITEM_LIST_CACHE_TIMEOUT)
         return fixtures
 
-    def _get_fixture_element(self, data_type, user_id, items):
+    def _get_fixture_attrib(self, data_type, user_id):
         attrib = {
             'id': ':'.join((self.id, data_type.tag)),
             'user_id': user_id
         }
         if data_type.is_indexed:
             attrib['indexed'] = 'true'
-        fixture_element = ElementTree.Element('fixture', attrib=attrib)
+        return attrib
+
+    def _get_fixture_element(self, data_type, user_id, items):
+        fixture_element = ElementTree.Element('fixture', attrib=self._get_fixture_attrib(data_type, user_id))
+        fixture_element.append(self._get_item_list_element(data_type, items))
+        return fixture_element
+
+    def _get_serialized_fixture(self, data_type, user_id, item_list):
+        """
+        Get the fixture as serialized XML from the already serialized item list
+        """
+        return get_serialized_element('fixture', self._get_fixture_attrib(data_type, user_id), [item_list])
+
+    def _get_item_list_element(self, data_type, items):
         item_list_element = ElementTree.Element('%s_list' % data_type.tag)
-        fixture_element.append(item_list_element)
         for item in items:
             item_list_element.append(item.to_xml())
-        return fixture_element
+        return item_list_element
 
     def _get_schema_element(self, data_type):
         schema_element = ElementTree.Element(
@@ -108,4 +154,17 @@ class ItemListsProvider(FixtureProvider):
         return schema_element
 
 
+def _get_global_item_list_cache_keys(domain, global_types):
+    """
+    :return: dict of data type id -> key of the cached item list XML
+    """
+    if not global_types:
+        return {}
+    version = get_fixture_cache_version(domain)
+    return {
+        data_type_id: '{}-{}-{}-{}'.format(GLOBAL_ITEM_LIST_CACHE_KEY_PREFIX, domain, version, data_type_id)
+        for data_type_id in global_types
+    }
+
+
 item_lists = ItemListsProvider()
@@ -10,7 +10,7 @@ from corehq.apps.fixtures.dbaccessors import (
 )
 from corehq.apps.fixtures.exceptions import FixtureException, FixtureTypeCheckError
 from corehq.apps.fixtures.utils import clean_fixture_field_name, \
-    get_fields_without_attributes
+    get_fields_without_attributes, bump_fixture_cache_version
 from corehq.apps.users.models import CommCareUser
 from corehq.apps.fixtures.exceptions import FixtureVersionError
 from dimagi.ext.couchdbkit import Document, DocumentSchema, DictProperty, StringProperty, StringListProperty, SchemaListProperty, IntegerProperty, BooleanProperty
@@ -99,6 +99,7 @@ class FixtureDataType(QuickCachedDocumentMixin, Document):
     def clear_caches(self):
         super(FixtureDataType, self).clear_caches()
         get_fixture_data_types_in_domain.clear(self.domain)
+        bump_fixture_cache_version(self.domain)
 
 
 class FixtureItemField(DocumentSchema):
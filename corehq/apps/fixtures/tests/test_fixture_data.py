@@ -1,5 +1,7 @@
 from xml.etree import ElementTree
 from django.test import TestCase
+from mock import patch
+from casexml.apps.phone.fixtures import generator
 from casexml.apps.case.tests.util import check_xml_line_by_line
 from casexml.apps.phone.tests.utils import call_fixture_generator
 from corehq.apps.fixtures import fixturegenerators
@@ -8,6 +10,7 @@ from corehq.apps.fixtures.dbaccessors import delete_all_fixture_data_types, \
 from corehq.apps.fixtures.exceptions import FixtureVersionError
 from corehq.apps.fixtures.models import FixtureDataType, FixtureTypeField, \
     FixtureDataItem, FieldList, FixtureItemField, FixtureOwnership
+from corehq.apps.fixtures.utils import bump_fixture_cache_version
 from corehq.apps.users.dbaccessors.all_commcare_users import delete_all_users
 from corehq.apps.users.models import CommCareUser
 
@@ -246,3 +249,38 @@ class FixtureDataTest(TestCase):
             """.format(self.user.user_id),
             '<f>{}\n{}\n</f>'.format(*[ElementTree.tostring(fixture) for fixture in fixtures])
         )
+
+    def test_global_fixture_is_cached(self):
+        self.data_type.is_global = True
+        self.data_type.save()
+        get_fixture_data_types_in_domain.clear(self.domain)
+        restore_user = self.user.to_ota_restore_user()
+
+        def get_fixture():
+            with patch.object(FixtureDataItem, 'by_data_types', wraps=FixtureDataItem.by_data_types) as mock:
+                fixture = generator.get_fixture_by_id('item-list:district', restore_user)
+            return ElementTree.tostring(fixture), mock.call_count
+
+        expected = """
+        <fixture id="item-list:district" user_id="{}">
+            <district_list>
+                <district>
+                    <state_name>Delhi_state</state_name>
+                    <district_name lang="hin">Delhi_in_HIN</district_name>
+                    <district_name lang="eng">Delhi_in_ENG</district_name>
+                    <district_id>Delhi_id</district_id>
+                </district>
+            </district_list>
+        </fixture>
+        """.format(self.user.user_id)
+        fixture, loaded = get_fixture()
+        self.assertEqual(loaded, 1)
+        check_xml_line_by_line(self, expected, fixture)
+
+        cached_fixture, loaded = get_fixture()
+        self.assertEqual(loaded, 0)
+        check_xml_line_by_line(self, expected, cached_fixture)
+
+        bump_fixture_cache_version(self.domain)
+        _, loaded = get_fixture()
+        self.assertEqual(loaded, 1)
@@ -1,8 +1,13 @@
 import re
+import uuid
 from xml.etree import ElementTree
 
+from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
+
 BAD_SLUG_PATTERN = r"([/\\<>\s])"
 
+FIXTURE_CACHE_VERSION_KEY_PREFIX = 'fixtures-version'
+
 
 def clean_fixture_field_name(field_name):
     """Effectively slugifies a fixture's field name so that we don't send
@@ -39,3 +44,25 @@ def get_fields_without_attributes(fields):
     for fixture_field in fields:
         fields_without_attributes.append(fixture_field.field_name)
     return fields_without_attributes
+
+
+def get_fixture_cache_version(domain):
+    """
+    Get the version of the domain's lookup tables, which changes every time
+    they are uploaded or edited. It's used to key caches of lookup table data.
+    """
+    cache = get_redis_default_cache()
+    key = _get_fixture_cache_version_key(domain)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(key, version, timeout=None)
+    return version
+
+
+def bump_fixture_cache_version(domain):
+    get_redis_default_cache().set(_get_fixture_cache_version_key(domain), uuid.uuid4().hex, timeout=None)
+
+
+def _get_fixture_cache_version_key(domain):
+    return '{}-{}'.format(FIXTURE_CACHE_VERSION_KEY_PREFIX, domain)
@@ -27,7 +27,7 @@ from corehq.apps.fixtures.exceptions import (
 from corehq.apps.fixtures.models import FixtureDataType, FixtureDataItem, FieldList, FixtureTypeField
 from corehq.apps.fixtures.fixturegenerators import item_lists_by_domain
 from corehq.apps.fixtures.upload import upload_fixture_file, validate_fixture_file_format
-from corehq.apps.fixtures.utils import is_identifier_invalid
+from corehq.apps.fixtures.utils import is_identifier_invalid, bump_fixture_cache_version
 from corehq.apps.reports.datatables import DataTablesHeader, DataTablesColumn
 from corehq.apps.reports.util import format_datatables_data
 from corehq.apps.users.models import Permissions
@@ -105,6 +105,7 @@ def update_tables(request, domain, data_type_id, test_patch=None):
         elif request.method == 'DELETE':
             with CouchTransaction() as transaction:
                 data_type.recursive_delete(transaction)
+            bump_fixture_cache_version(domain)
             return json_response({})
         elif not request.method == 'PUT':
             return HttpResponseBadRequest()
@@ -147,6 +148,7 @@ def update_tables(request, domain, data_type_id, test_patch=None):
                     return HttpResponseBadRequest("DuplicateFixture")
                 else:
                     data_type = create_types(fields_patches, domain, data_tag, is_global, transaction)
+        bump_fixture_cache_version(domain)
         return json_response(strip_json(data_type))
 
 
@@ -1,11 +1,23 @@
+import hashlib
+import json
 from itertools import groupby
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from xml.etree.ElementTree import Element
 
 from casexml.apps.phone.fixtures import FixtureProvider
+from casexml.apps.phone.xml import get_serialized_element, tostring
 from corehq.apps.custom_data_fields.dbaccessors import get_by_domain_and_type
 from corehq.apps.locations.models import SQLLocation, LocationType, LocationFixtureConfiguration
 from corehq import toggles
+from dimagi.utils.chunked import chunked
+from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
+
+FLAT_LOCATION_CACHE_KEY_PREFIX = 'flat-location-fixture'
+FLAT_LOCATION_CACHE_TIMEOUT = 24 * 60 * 60
+FLAT_LOCATION_CACHE_CHUNK_SIZE = 1000
+
+# the fields of a location that determine where it is in the hierarchy and when it last changed
+LocationRow = namedtuple('LocationRow', 'pk location_id parent_id last_modified type_code')
 
 
 class LocationSet(object):
@@ -107,52 +119,101 @@ class FlatLocationSerializer(object):
 
     def get_xml_nodes(self, fixture_id, restore_user, locations_queryset, data_fields):
 
-        all_types = LocationType.objects.filter(domain=restore_user.domain).values_list(
-            'code', flat=True
-        )
-        location_type_attrs = ['{}_id'.format(t) for t in all_types if t is not None]
+        all_types = list(LocationType.objects.filter(domain=restore_user.domain).values_list(
+            'code', 'last_modified'
+        ))
+        location_type_attrs = ['{}_id'.format(code) for code, _ in all_types if code is not None]
         attrs_to_index = location_type_attrs + ['id', 'type']
+        # location type names and codes are part of each location's XML
+        types_last_modified = max(last_modified for _, last_modified in all_types) if all_types else None
+        cache_version = _get_flat_location_cache_version(
+            restore_user.domain, types_last_modified, location_type_attrs, data_fields
+        )
 
         return [self._get_schema_node(fixture_id, attrs_to_index),
-                self._get_fixture_node(fixture_id, restore_user, locations_queryset, location_type_attrs, data_fields)]
-
-    def _get_fixture_node(self, fixture_id, restore_user, locations_queryset, location_type_attrs, data_fields):
-        root_node = Element('fixture', {'id': fixture_id, 'user_id': restore_user.user_id, 'indexed': 'true'})
-        outer_node = Element('locations')
-        root_node.append(outer_node)
-        all_locations = list(locations_queryset.order_by('site_code'))
-        locations_by_id = {location.pk: location for location in all_locations}
-        for location in all_locations:
-            attrs = {
-                'type': location.location_type.code,
-                'id': location.location_id,
-            }
-            attrs.update({attr: '' for attr in location_type_attrs})
-            attrs['{}_id'.format(location.location_type.code)] = location.location_id
-
-            current_location = location
-            while current_location.parent_id:
-                try:
-                    current_location = locations_by_id[current_location.parent_id]
-                except KeyError:
-                    current_location = current_location.parent
-
-                    # For some reason this wasn't included in the locations we already fetched
-                    from corehq.util.soft_assert import soft_assert
-                    _soft_assert = soft_assert('{}@{}.com'.format('frener', 'dimagi'))
-                    message = """
-                        The flat location fixture didn't prefetch all parent locations:
-                        {domain}: {location_id}
-                    """.format(current_location.domain, current_location.location_id)
-                    _soft_assert(False, msg=message)
-
-                attrs['{}_id'.format(current_location.location_type.code)] = current_location.location_id
-
-            location_node = Element('location', attrs)
-            _fill_in_location_element(location_node, location, data_fields)
-            outer_node.append(location_node)
-
-        return root_node
+                self._get_fixture_node(fixture_id, restore_user, locations_queryset, location_type_attrs,
+                                       data_fields, cache_version)]
+
+    def _get_fixture_node(self, fixture_id, restore_user, locations_queryset, location_type_attrs, data_fields,
+                          cache_version):
+        """
+        Get the fixture as serialized XML.
+
+        The XML of each location is cached, keyed on when the location was last
+        modified and on its ancestors, and is shared by all users that sync it.
+        Only locations that changed since they were last serialized are loaded
+        from the database and serialized again.
+        """
+        rows = [
+            LocationRow(*row) for row in
+            locations_queryset.prefetch_related(None).order_by('site_code')
+            .values_list('pk', 'location_id', 'parent_id', 'last_modified', 'location_type__code')
+        ]
+        rows_by_pk = {row.pk: row for row in rows}
+        attrs_by_pk = {
+            row.pk: self._get_location_attrs(restore_user.domain, row, rows_by_pk, location_type_attrs)
+            for row in rows
+        }
+        cache_keys = {
+            row.pk: _get_flat_location_cache_key(cache_version, row, attrs_by_pk[row.pk])
+            for row in rows
+        }
+
+        cache = get_redis_default_cache()
+        location_xml_by_pk = {}
+        for chunk in chunked(rows, FLAT_LOCATION_CACHE_CHUNK_SIZE):
+            cached_xml = cache.get_many([cache_keys[row.pk] for row in chunk])
+            location_xml_by_pk.update({
+                row.pk: cached_xml[cache_keys[row.pk]]
+                for row in chunk if cache_keys[row.pk] in cached_xml
+            })
+
+        uncached_pks = [row.pk for row in rows if row.pk not in location_xml_by_pk]
+        for chunk in chunked(uncached_pks, FLAT_LOCATION_CACHE_CHUNK_SIZE):
+            xml_to_cache = {}
+            for location in SQLLocation.objects.filter(pk__in=chunk).select_related('location_type'):
+                location_node = Element('location', attrs_by_pk[location.pk])
+                _fill_in_location_element(location_node, location, data_fields)
+                location_xml_by_pk[location.pk] = tostring(location_node)
+                xml_to_cache[cache_keys[location.pk]] = location_xml_by_pk[location.pk]
+            cache.set_many(xml_to_cache, timeout=FLAT_LOCATION_CACHE_TIMEOUT)
+
+        locations_xml = get_serialized_element('locations', {}, [location_xml_by_pk[row.pk] for row in rows])
+        return get_serialized_element(
+            'fixture',
+            {'id': fixture_id, 'user_id': restore_user.user_id, 'indexed': 'true'},
+            [locations_xml]
+        )
+
+    def _get_location_attrs(self, domain, row, rows_by_pk, location_type_attrs):
+        attrs = {
+            'type': row.type_code,
+            'id': row.location_id,
+        }
+        attrs.update({attr: '' for attr in location_type_attrs})
+        attrs['{}_id'.format(row.type_code)] = row.location_id
+
+        current_row = row
+        while current_row.parent_id:
+            try:
+                current_row = rows_by_pk[current_row.parent_id]
+            except KeyError:
+                current_row = LocationRow(*SQLLocation.objects.values_list(
+                    'pk', 'location_id', 'parent_id', 'last_modified', 'location_type__code'
+                ).get(pk=current_row.parent_id))
+                rows_by_pk[current_row.pk] = current_row
+
+                # For some reason this wasn't included in the locations we already fetched
+                from corehq.util.soft_assert import soft_assert
+                _soft_assert = soft_assert('{}@{}.com'.format('frener', 'dimagi'))
+                message = """
+                    The flat location fixture didn't prefetch all parent locations:
+                    {domain}: {location_id}
+                """.format(domain=domain, location_id=current_row.location_id)
+                _soft_assert(False, msg=message)
+
+            attrs['{}_id'.format(current_row.type_code)] = current_row.location_id
+        return attrs
 
     def _get_schema_node(self, fixture_id, attrs_to_index):
         indices_node = Element('indices')
@@ -165,6 +226,25 @@ class FlatLocationSerializer(object):
         return node
 
 
+def _get_flat_location_cache_version(domain, types_last_modified, location_type_attrs, data_fields):
+    return hashlib.md5(json.dumps([
+        domain,
+        types_last_modified.isoformat() if types_last_modified else None,
+        sorted(location_type_attrs),
+        sorted(data_fields),
+    ])).hexdigest()
+
+
+def _get_flat_location_cache_key(cache_version, row, attrs):
+    # the attributes include the ids of the location's ancestors, so moving it changes the key
+    location_version = hashlib.md5(json.dumps([
+        cache_version,
+        row.last_modified.isoformat(),
+        sorted(attrs.items()),
+    ])).hexdigest()
+    return '{}-{}-{}'.format(FLAT_LOCATION_CACHE_KEY_PREFIX, row.location_id, location_version)
+
+
 def should_sync_hierarchical_fixture(project):
     # Sync hierarchical fixture for domains with fixture toggle enabled for migration and
     # configuration set to use hierarchical fixture
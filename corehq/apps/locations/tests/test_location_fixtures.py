@@ -29,7 +29,7 @@ from .util import (
 )
 from ..fixtures import _location_to_fixture, LocationSet, should_sync_locations, location_fixture_generator, \
     flat_location_fixture_generator, should_sync_flat_fixture, should_sync_hierarchical_fixture, \
-    _get_location_data_fields
+    _get_location_data_fields, _fill_in_location_element
 from ..models import SQLLocation, LocationType, make_location, LocationFixtureConfiguration
 
 
@@ -456,6 +456,34 @@ class LocationFixturesDataTest(LocationHierarchyTestCase, FixtureHasLocationsMix
             ).text
         )
 
+    def test_location_xml_is_cached(self):
+        mass = self.locations['Massachusetts']
+        self.user._couch_user.set_location(mass)
+
+        def get_fixture():
+            self.user = self.user._couch_user.to_ota_restore_user()
+            with mock.patch('corehq.apps.locations.fixtures._fill_in_location_element',
+                            wraps=_fill_in_location_element) as fill_in:
+                fixture = call_fixture_generator(flat_location_fixture_generator, self.user)[1]
+            return ElementTree.tostring(fixture), fill_in.call_count
+
+        fixture, _ = get_fixture()
+        cached_fixture, serialized = get_fixture()
+        self.assertEqual(0, serialized)
+        self.assertXmlEqual(fixture, cached_fixture)
+
+        mass.metadata = {'baseball_team': 'Red Sox'}
+        mass.save()
+
+        def _clear_metadata():
+            mass.metadata = {}
+            mass.save()
+
+        self.addCleanup(_clear_metadata)
+        fixture, serialized = get_fixture()
+        self.assertEqual(1, serialized)
+        self.assertIn('Red Sox', fixture)
+
 
 @mock.patch.object(Domain, 'uses_locations', lambda: True)  # removes dependency on accounting
 class WebUserLocationFixturesTest(LocationHierarchyTestCase, FixtureHasLocationsMixin):
@@ -28,20 +28,20 @@ from couchexport.tasks import cache_file_to_be_served
 from couchforms.analytics import app_has_been_submitted_to_in_last_30_days
 from dimagi.utils.couch.cache.cache_core import get_redis_client
 from corehq.util.log import send_HTML_email
+from dimagi.utils.chunked import chunked
 from dimagi.utils.logging import notify_exception
 from dimagi.utils.parsing import json_format_datetime
 from soil import DownloadBase
 from soil.util import expose_file_download, expose_cached_download
 
 from corehq.apps.domain.calculations import (
+    all_domain_es_stats,
     all_domain_stats,
     calced_props,
-    CALC_FNS,
 )
 from corehq.apps.es.domains import DomainES
 from corehq.elastic import (
     stream_es_query,
-    send_to_elasticsearch,
     get_es_new, ES_META)
 from corehq.pillows.mappings.app_mapping import APP_INDEX
 from corehq.util.files import file_extention_from_filename
@@ -63,6 +63,7 @@ from .scheduled import get_scheduled_report_ids
 
 logging = get_task_logger(__name__)
 EXPIRE_TIME = 60 * 60 * 24
+CALCULATED_PROPERTIES_CHUNK_SIZE = 500
 
 
 def send_delayed_report(report_id):
@@ -169,22 +170,54 @@ def rebuild_export_async(config, schema):
 def update_calculated_properties():
     results = DomainES().fields(["name", "_id", "cp_last_updated"]).scroll()
     all_stats = all_domain_stats()
-    for r in results:
-        dom = r["name"]
+    for chunk in chunked(results, CALCULATED_PROPERTIES_CHUNK_SIZE):
+        domains = [r["name"] for r in chunk]
         try:
-            last_form_submission = CALC_FNS["last_form_submission"](dom, False)
-            if _skip_updating_domain_stats(r.get("cp_last_updated"), last_form_submission):
-                continue
-            props = calced_props(dom, r["_id"], all_stats)
-            if props['cp_first_form'] is None:
-                del props['cp_first_form']
-            if props['cp_last_form'] is None:
-                del props['cp_last_form']
-            if props['cp_300th_form'] is None:
-                del props['cp_300th_form']
-            send_to_elasticsearch("domains", props, es_merge_update=True)
+            es_stats = all_domain_es_stats(domains)
         except Exception as e:
-            notify_exception(None, message='Domain {} failed on stats calculations with {}'.format(dom, e))
+            notify_exception(None, message='Domains {} failed on stats calculations with {}'.format(domains, e))
+            continue
+
+        updates = []
+        for r in chunk:
+            dom = r["name"]
+            try:
+                last_form_submission = es_stats[dom]["cp_last_form"]
+                if _skip_updating_domain_stats(r.get("cp_last_updated"), last_form_submission):
+                    continue
+                props = calced_props(dom, r["_id"], all_stats, es_stats[dom])
+                if props['cp_first_form'] is None:
+                    del props['cp_first_form']
+                if props['cp_last_form'] is None:
+                    del props['cp_last_form']
+                if props['cp_300th_form'] is None:
+                    del props['cp_300th_form']
+                updates.append(props)
+            except Exception as e:
+                notify_exception(None, message='Domain {} failed on stats calculations with {}'.format(dom, e))
+        _bulk_update_domains(updates)
+
+
+def _bulk_update_domains(updates):
+    """
+    Merge the calculated properties into the domains' docs in elasticsearch
+    """
+    if not updates:
+        return
+    body = []
+    for props in updates:
+        props = props.copy()
+        body.append({'update': {
+            '_index': ES_META['domains'].index,
+            '_type': ES_META['domains'].type,
+            '_id': props.pop('_id'),
+        }})
+        body.append({'doc': props})
+    response = get_es_new().bulk(body=body)
+    for item in response.get('items', []):
+        if item['update'].get('error'):
+            notify_exception(None, message='Domain {} failed on stats update with {}'.format(
+                item['update']['_id'], item['update']['error']))
 
 
 def _skip_updating_domain_stats(last_updated=None, last_form_submission=None):
@@ -229,50 +229,110 @@ def send_message_via_backend(msg, backend=None, orig_phone_number=None):
       is sent in if the backend supports load balancing
     """
     try:
-        msg.text = clean_text(msg.text)
-    except Exception:
-        logging.exception("Could not clean text for sms dated '%s' in domain '%s'" % (msg.date, msg.domain))
-    try:
-        # We need to send SMS when msg.domain is None to support sending to
-        # people who opt in without being tied to a domain
-        if msg.domain and not domain_has_privilege(msg.domain, privileges.OUTBOUND_SMS):
-            raise Exception(
-                ("Domain '%s' does not have permission to send SMS."
-                 "  Please investigate why this function was called.") % msg.domain
-            )
-
-        phone_obj = PhoneBlacklist.get_by_phone_number_or_none(msg.phone_number)
-        if phone_obj and not phone_obj.send_sms:
-            if msg.ignore_opt_out and phone_obj.can_opt_in:
-                # If ignore_opt_out is True on the message, then we'll still
-                # send it. However, if we're not letting the phone number
-                # opt back in and it's in an opted-out state, we will not
-                # send anything to it no matter the state of the ignore_opt_out
-                # flag.
-                pass
-            else:
-                msg.set_system_error(SMS.ERROR_PHONE_NUMBER_OPTED_OUT)
-                return False
+        if not _prepare_outbound_message(msg):
+            return False
 
         if not backend:
             backend = msg.outbound_backend
 
-        if backend.domain_is_authorized(msg.domain):
-            backend.send(msg, orig_phone_number=orig_phone_number)
-        else:
-            raise BackendAuthorizationException(
-                "Domain '%s' is not authorized to use backend '%s'" % (msg.domain, backend.pk)
-            )
-
-        msg.backend_api = backend.hq_api_id
-        msg.backend_id = backend.couch_id
-        msg.save()
+        _check_backend_authorization(msg, backend)
+        backend.send(msg, orig_phone_number=orig_phone_number)
+        _save_sent_message(msg, backend)
         return True
     except Exception:
         log_sms_exception(msg)
         return False
 
 
+def send_messages_via_backend(msgs, backend):
+    """send a batch of sms using a specific backend
+
+    msgs - list of outbound message objects
+    backend - backend to use for sending; if it supports bulk send, all the
+      messages that can be sent are passed to its send_multiple() at once
+
+    Returns a list with the result of send_message_via_backend() for each message.
+    """
+    if not backend.supports_bulk_send:
+        return [send_message_via_backend(msg, backend=backend) for msg in msgs]
+
+    results = [False] * len(msgs)
+    to_send = []
+    for i, msg in enumerate(msgs):
+        try:
+            if _prepare_outbound_message(msg):
+                _check_backend_authorization(msg, backend)
+                to_send.append((i, msg))
+        except Exception:
+            log_sms_exception(msg)
+
+    if not to_send:
+        return results
+
+    try:
+        backend.send_multiple([msg for i, msg in to_send])
+    except Exception:
+        for i, msg in to_send:
+            log_sms_exception(msg)
+        return results
+
+    for i, msg in to_send:
+        try:
+            _save_sent_message(msg, backend)
+            results[i] = True
+        except Exception:
+            log_sms_exception(msg)
+    return results
+
+
+def _prepare_outbound_message(msg):
+    """
+    Cleans the message's text and checks that it can be sent. Returns False if
+    the phone number opted out, and raises an exception if the domain can't
+    send SMS.
+    """
+    try:
+        msg.text = clean_text(msg.text)
+    except Exception:
+        logging.exception("Could not clean text for sms dated '%s' in domain '%s'" % (msg.date, msg.domain))
+
+    # We need to send SMS when msg.domain is None to support sending to
+    # people who opt in without being tied to a domain
+    if msg.domain and not domain_has_privilege(msg.domain, privileges.OUTBOUND_SMS):
+        raise Exception(
+            ("Domain '%s' does not have permission to send SMS."
+             "  Please investigate why this function was called.") % msg.domain
+        )
+
+    phone_obj = PhoneBlacklist.get_by_phone_number_or_none(msg.phone_number)
+    if phone_obj and not phone_obj.send_sms:
+        if msg.ignore_opt_out and phone_obj.can_opt_in:
+            # If ignore_opt_out is True on the message, then we'll still
+            # send it. However, if we're not letting the phone number
+            # opt back in and it's in an opted-out state, we will not
+            # send anything to it no matter the state of the ignore_opt_out
+            # flag.
+            pass
+        else:
+            msg.set_system_error(SMS.ERROR_PHONE_NUMBER_OPTED_OUT)
+            return False
+
+    return True
+
+
+def _check_backend_authorization(msg, backend):
+    if not backend.domain_is_authorized(msg.domain):
+        raise BackendAuthorizationException(
+            "Domain '%s' is not authorized to use backend '%s'" % (msg.domain, backend.pk)
+        )
+
+
+def _save_sent_message(msg, backend):
+    msg.backend_api = backend.hq_api_id
+    msg.backend_id = backend.couch_id
+    msg.save()
+
+
 def random_password():
     """
     This method creates a random password for an sms user registered via sms
@@ -1,9 +1,14 @@
+import math
+
 from django.conf import settings
+from django.db.models import Count
 
 from corehq.toggles import DATA_MIGRATION
+from dimagi.utils.couch import release_lock
+from dimagi.utils.couch.cache.cache_core import get_redis_client
 from dimagi.utils.parsing import json_format_datetime
-from corehq.apps.sms.models import QueuedSMS
-from corehq.apps.sms.tasks import process_sms
+from corehq.apps.sms.models import QueuedSMS, OUTGOING
+from corehq.apps.sms.tasks import process_sms, process_sms_batch
 from hqscripts.generic_queue import GenericEnqueuingOperation
 
 
@@ -17,7 +22,11 @@ class SMSEnqueuingOperation(GenericEnqueuingOperation):
         return settings.SMS_QUEUE_ENQUEUING_TIMEOUT
 
     def get_items_to_be_processed(self, utcnow):
-        for sms in QueuedSMS.get_queued_sms():
+        queued_sms = QueuedSMS.get_queued_sms()
+        if settings.SMS_QUEUE_USE_BATCHES:
+            # Outgoing SMS are enqueued by enqueue_batches()
+            queued_sms = queued_sms.exclude(direction=OUTGOING)
+        for sms in queued_sms:
             if DATA_MIGRATION.enabled(sms.domain):
                 continue
             yield {
@@ -25,6 +34,45 @@ class SMSEnqueuingOperation(GenericEnqueuingOperation):
                 'key': json_format_datetime(sms.datetime_to_process),
             }
 
+    def populate_queue(self):
+        super(SMSEnqueuingOperation, self).populate_queue()
+        if settings.SMS_QUEUE_USE_BATCHES:
+            self.enqueue_batches()
+
+    def enqueue_batches(self):
+        """
+        Enqueues enough process_sms_batch tasks to claim all the due outgoing
+        SMS of each backend. Since the tasks claim their messages when they
+        run, a task that finds none left to claim just does nothing.
+        """
+        queued_sms = QueuedSMS.get_queued_sms().filter(direction=OUTGOING)
+        # The tasks leave the messages of domains that are being migrated in
+        # the queue, so there's no need to enqueue tasks for them
+        excluded_domains = [
+            domain for domain in queued_sms.values_list('domain', flat=True).distinct()
+            if DATA_MIGRATION.enabled(domain)
+        ]
+        if excluded_domains:
+            queued_sms = queued_sms.exclude(domain__in=excluded_domains)
+
+        counts = queued_sms.order_by().values('backend_id').annotate(count=Count('pk'))
+        for row in counts:
+            self.enqueue_batch(row['backend_id'], row['count'])
+
+    def enqueue_batch(self, backend_id, count=1):
+        client = get_redis_client()
+        enqueuing_lock = client.lock(
+            "%s-batch-enqueuing-%s" % (self.get_queue_name(), backend_id),
+            timeout=settings.SMS_QUEUE_BATCH_ENQUEUING_INTERVAL * 60
+        )
+        if enqueuing_lock.acquire(blocking=False):
+            try:
+                for i in range(int(math.ceil(count / float(settings.SMS_QUEUE_BATCH_SIZE)))):
+                    process_sms_batch.delay(backend_id)
+            except:
+                # We couldn't enqueue, so release the lock
+                release_lock(enqueuing_lock, True)
+
     def use_queue(self):
         return settings.SMS_QUEUE_ENABLED
 
@@ -38,7 +86,10 @@ class SMSEnqueuingOperation(GenericEnqueuingOperation):
         thread.
         """
         try:
-            self.enqueue(sms.pk, json_format_datetime(sms.datetime_to_process))
+            if settings.SMS_QUEUE_USE_BATCHES and sms.direction == OUTGOING:
+                self.enqueue_batch(sms.backend_id)
+            else:
+                self.enqueue(sms.pk, json_format_datetime(sms.datetime_to_process))
         except:
             # If anything goes wrong here, no problem, the handle() thread will
             # pick it up later and enqueue.
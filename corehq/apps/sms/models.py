@@ -2167,6 +2167,18 @@ class SQLSMSBackend(SQLMobileBackend):
     def send(self, msg, *args, **kwargs):
         raise NotImplementedError("Please implement this method.")
 
+    # Set to True in backends that implement send_multiple()
+    supports_bulk_send = False
+
+    def send_multiple(self, msgs, *args, **kwargs):
+        """
+        Override to send a batch of messages using the gateway's bulk send API
+        when the SMS queue processes messages in batches. As with send(),
+        set_system_error() can be called on any messages that can't be sent,
+        and an exception should be raised if the batch couldn't be sent at all.
+        """
+        raise NotImplementedError("Please implement this method.")
+
     @classmethod
     def get_opt_in_keywords(cls):
         """
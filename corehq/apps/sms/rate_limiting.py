@@ -0,0 +1,89 @@
+import json
+from datetime import datetime, timedelta
+
+from dimagi.utils.couch.cache.cache_core import get_redis_client
+
+EPOCH = datetime(1970, 1, 1)
+
+# Number of seconds a reserved send time is kept after it has passed, in
+# case the queue is slow to get to the message
+RESERVATION_TIMEOUT = 60 * 60
+
+
+class SMSSendScheduler(object):
+    """
+    Schedules outgoing SMS so that no more than sms_rate_limit of them are sent
+    in any 60 second window. The last sms_rate_limit send times are kept, and
+    a send can only take place once the one sms_rate_limit sends before it is
+    a minute old, so up to a minute's worth of SMS can still be sent at once.
+
+    The send times are kept in redis so that all the SMS queue workers share
+    them, but each message's send time is computed up front, so that the messages
+    over the limit can wait in the queue until their time instead of being retried. The
+    time reserved for a message is also kept in redis so that it doesn't reserve
+    another one when it's processed again.
+    """
+
+    def __init__(self, redis_key, sms_rate_limit):
+        self.redis_key = redis_key
+        self.sms_rate_limit = sms_rate_limit
+
+    def get_send_times(self, msgs, utcnow):
+        """
+        Returns the time (a naive UTC datetime) at which each of the messages can
+        be sent. A message that already has a reserved time keeps it.
+        """
+        client = get_redis_client().client.get_client()
+        now = _to_timestamp(utcnow)
+        reservation_keys = [self._get_reservation_key(msg) for msg in msgs]
+        send_times = [
+            float(reservation) if reservation is not None else None
+            for reservation in client.mget(reservation_keys)
+        ]
+
+        to_reserve = [i for i, send_time in enumerate(send_times) if send_time is None]
+        if to_reserve:
+            for i, send_time in zip(to_reserve, self._reserve(client, len(to_reserve), now)):
+                send_times[i] = send_time
+
+        pipe = client.pipeline(transaction=False)
+        for key, send_time in zip(reservation_keys, send_times):
+            if send_time > now:
+                pipe.set(key, repr(send_time), ex=int(send_time - now) + RESERVATION_TIMEOUT)
+            else:
+                # the reservation is used up now
+                pipe.delete(key)
+        pipe.execute()
+
+        return [_from_timestamp(send_time) for send_time in send_times]
+
+    def _reserve(self, client, count, now):
+        def reserve(pipe):
+            # the last sms_rate_limit send times, in order
+            value = pipe.get(self.redis_key)
+            reserved = json.loads(value) if value is not None else []
+            send_times = []
+            for i in range(count):
+                send_time = now
+                if reserved:
+                    send_time = max(send_time, reserved[-1])
+                if len(reserved) >= self.sms_rate_limit:
+                    send_time = max(send_time, reserved[-self.sms_rate_limit] + 60)
+                reserved = (reserved + [send_time])[-self.sms_rate_limit:]
+                send_times.append(send_time)
+            pipe.multi()
+            pipe.set(self.redis_key, json.dumps(reserved), ex=int(reserved[-1] - now) + 60)
+            return send_times
+
+        return client.transaction(reserve, self.redis_key, value_from_callable=True)
+
+    def _get_reservation_key(self, msg):
+        return '%s-sms-%s' % (self.redis_key, msg.pk)
+
+
+def _to_timestamp(utcnow):
+    return (utcnow - EPOCH).total_seconds()
+
+
+def _from_timestamp(timestamp):
+    return EPOCH + timedelta(seconds=timestamp)
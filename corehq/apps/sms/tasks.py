@@ -1,4 +1,5 @@
 import math
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from celery.task import task
 from corehq.apps.sms.mixin import (InvalidFormatException,
@@ -6,8 +7,8 @@ from corehq.apps.sms.mixin import (InvalidFormatException,
     apply_leniency)
 from corehq.apps.sms.models import (OUTGOING, INCOMING, SMS,
     PhoneLoadBalancingMixin, QueuedSMS, PhoneNumber, MigrationStatus)
-from corehq.apps.sms.api import (send_message_via_backend, process_incoming,
-    log_sms_exception, create_billable_for_sms, get_utcnow)
+from corehq.apps.sms.api import (send_message_via_backend, send_messages_via_backend,
+    process_incoming, log_sms_exception, create_billable_for_sms, get_utcnow)
 from django.db import transaction, DataError
 from django.conf import settings
 from corehq import privileges
@@ -16,14 +17,15 @@ from corehq.apps.domain.models import Domain
 from corehq.apps.smsbillables.exceptions import RetryBillableTaskException
 from corehq.apps.smsbillables.models import SmsBillable
 from corehq.apps.sms.change_publishers import publish_sms_saved
+from corehq.apps.sms.rate_limiting import SMSSendScheduler
 from corehq.apps.sms.util import is_contact_active
 from corehq.apps.users.models import CouchUser, CommCareUser
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
+from corehq.toggles import DATA_MIGRATION
 from corehq.util.celery_utils import no_result_task
 from corehq.util.timezones.conversions import ServerTime
 from dimagi.utils.couch.cache.cache_core import get_redis_client
 from dimagi.utils.couch import release_lock, CriticalSection
-from dimagi.utils.rate_limit import rate_limit
 
 
 def remove_from_queue(queued_sms):
@@ -125,37 +127,52 @@ def message_is_stale(msg, utcnow):
         return True
 
 
-def handle_outgoing(msg):
+def schedule_outgoing(msgs, backend, utcnow, orig_phone_number=None):
     """
-    Should return a requeue flag, so if it returns True, the message will be
-    requeued and processed again immediately, and if it returns False, it will
-    not be queued again.
+    Applies the backend's rate limit to the messages. Returns the messages
+    that can be sent now, and moves the datetime_to_process of the others to
+    the time they can be sent.
     """
-    backend = msg.outbound_backend
     sms_rate_limit = backend.get_sms_rate_limit()
-    use_rate_limit = sms_rate_limit is not None
-    use_load_balancing = isinstance(backend, PhoneLoadBalancingMixin)
+    if sms_rate_limit is None:
+        return msgs
+
+    if orig_phone_number:
+        redis_key = 'sms-rate-limit-backend-%s-phone-%s' % (backend.pk, orig_phone_number)
+    else:
+        redis_key = 'sms-rate-limit-backend-%s' % backend.pk
+
+    to_send = []
+    send_times = SMSSendScheduler(redis_key, sms_rate_limit).get_send_times(msgs, utcnow)
+    for msg, send_time in zip(msgs, send_times):
+        if send_time > utcnow:
+            msg.datetime_to_process = send_time
+            QueuedSMS.objects.filter(pk=msg.pk).update(datetime_to_process=send_time)
+        else:
+            to_send.append(msg)
+    return to_send
+
+
+def handle_outgoing(msg):
+    backend = msg.outbound_backend
     orig_phone_number = None
 
-    if use_load_balancing:
+    if isinstance(backend, PhoneLoadBalancingMixin):
         orig_phone_number = backend.get_next_phone_number(msg.phone_number)
 
-    if use_rate_limit:
-        if use_load_balancing:
-            redis_key = 'sms-rate-limit-backend-%s-phone-%s' % (backend.pk, orig_phone_number)
-        else:
-            redis_key = 'sms-rate-limit-backend-%s' % backend.pk
-
-        if not rate_limit(redis_key, actions_allowed=sms_rate_limit, how_often=60):
-            # Requeue the message and try it again shortly
-            return True
+    if not schedule_outgoing([msg], backend, get_utcnow(), orig_phone_number=orig_phone_number):
+        # The message will be processed again when it can be sent
+        return
 
     result = send_message_via_backend(
         msg,
         backend=backend,
         orig_phone_number=orig_phone_number
     )
+    handle_send_result(msg, result)
+
 
+def handle_send_result(msg, result):
     if msg.error:
         remove_from_queue(msg)
     else:
@@ -165,8 +182,6 @@ def handle_outgoing(msg):
         else:
             handle_unsuccessful_processing_attempt(msg)
 
-    return False
-
 
 def handle_incoming(msg):
     try:
@@ -211,7 +226,6 @@ def process_sms(queued_sms_pk):
                 release_lock(message_lock, True)
                 return
 
-        requeue = False
         # Process inbound SMS from a single contact one at a time
         recipient_block = msg.direction == INCOMING
         if (isinstance(msg.processed, bool)
@@ -233,7 +247,7 @@ def process_sms(queued_sms_pk):
                     msg.set_system_error(SMS.ERROR_CONTACT_IS_INACTIVE)
                     remove_from_queue(msg)
                 else:
-                    requeue = handle_outgoing(msg)
+                    handle_outgoing(msg)
             elif msg.direction == INCOMING:
                 handle_incoming(msg)
             else:
@@ -244,8 +258,150 @@ def process_sms(queued_sms_pk):
                 release_lock(recipient_lock, True)
 
         release_lock(message_lock, True)
-        if requeue:
-            process_sms.delay(queued_sms_pk)
+
+
+def claim_sms_batch(backend_id, utcnow, limit, excluded_domains=None):
+    """
+    Claims up to limit of the due outgoing SMS with the given backend_id (None
+    for the messages that use the default backend for their phone number),
+    skipping any that are locked by another task claiming them at the same time.
+
+    A message is claimed by moving its datetime_to_process past the processing
+    lock timeout, so it's processed again if the task dies before handling it.
+    The returned messages have the claimed datetime_to_process too, so saving
+    them while they're sent doesn't make them due again; their original one is
+    kept in unclaimed_datetime_to_process for release_sms_claim().
+    """
+    # Django 1.10's select_for_update() doesn't support SKIP LOCKED
+    conditions = [
+        'direction = %s',
+        'processed = false',
+        'error = false',
+        'datetime_to_process <= %s',
+    ]
+    params = [OUTGOING, utcnow]
+    if backend_id is None:
+        conditions.append('backend_id IS NULL')
+    else:
+        conditions.append('backend_id = %s')
+        params.append(backend_id)
+    if excluded_domains:
+        conditions.append('(domain IS NULL OR NOT domain = ANY(%s))')
+        params.append(list(excluded_domains))
+    params.append(limit)
+
+    claimed_until = utcnow + timedelta(minutes=settings.SMS_QUEUE_PROCESSING_LOCK_TIMEOUT)
+    with transaction.atomic():
+        batch = list(QueuedSMS.objects.raw(
+            'SELECT * FROM sms_queued WHERE {} ORDER BY datetime_to_process LIMIT %s '
+            'FOR UPDATE SKIP LOCKED'.format(' AND '.join(conditions)),
+            params
+        ))
+        QueuedSMS.objects.filter(pk__in=[msg.pk for msg in batch]).update(datetime_to_process=claimed_until)
+    for msg in batch:
+        msg.unclaimed_datetime_to_process = msg.datetime_to_process
+        msg.datetime_to_process = claimed_until
+    return batch
+
+
+def release_sms_claim(msg):
+    msg.datetime_to_process = msg.unclaimed_datetime_to_process
+    QueuedSMS.objects.filter(pk=msg.pk).update(datetime_to_process=msg.datetime_to_process)
+
+
+def claim_sms_batch_to_process(backend_id, utcnow):
+    """
+    Claims a batch of SMS with claim_sms_batch(), leaving the messages of
+    domains that are being migrated in the queue, since run_sms_queue doesn't
+    enqueue their messages either.
+    The batch is filled up with other messages in place of the ones released.
+    """
+    batch = []
+    excluded_domains = set()
+    while len(batch) < settings.SMS_QUEUE_BATCH_SIZE:
+        claimed = claim_sms_batch(
+            backend_id, utcnow, settings.SMS_QUEUE_BATCH_SIZE - len(batch), excluded_domains
+        )
+        migrating_domains = {
+            domain for domain in set(msg.domain for msg in claimed if msg.domain)
+            if DATA_MIGRATION.enabled(domain)
+        }
+        for msg in claimed:
+            if msg.domain in migrating_domains:
+                release_sms_claim(msg)
+            else:
+                batch.append(msg)
+
+        if not migrating_domains:
+            break
+        excluded_domains |= migrating_domains
+    return batch
+
+
+def get_outbound_backend_for_batch(msg, utcnow, domains, contacts_active):
+    """
+    Does the checks that process_sms() does before sending an outgoing SMS,
+    using the domains and contact statuses already looked up for the batch.
+
+    Returns the backend to send the message with, or None if it should not
+    be sent now.
+    """
+    if message_is_stale(msg, utcnow):
+        msg.set_system_error(SMS.ERROR_MESSAGE_IS_STALE)
+        remove_from_queue(msg)
+        return None
+
+    if msg.domain:
+        if msg.domain not in domains:
+            domains[msg.domain] = Domain.get_by_name(msg.domain)
+        domain_object = domains[msg.domain]
+        if domain_object and handle_domain_specific_delays(msg, domain_object, utcnow):
+            return None
+
+    if msg.domain and msg.couch_recipient_doc_type and msg.couch_recipient:
+        contact = (msg.domain, msg.couch_recipient_doc_type, msg.couch_recipient)
+        if contact not in contacts_active:
+            contacts_active[contact] = is_contact_active(*contact)
+        if not contacts_active[contact]:
+            msg.set_system_error(SMS.ERROR_CONTACT_IS_INACTIVE)
+            remove_from_queue(msg)
+            return None
+
+    return msg.outbound_backend
+
+
+@no_result_task(queue="sms_queue", acks_late=True)
+def process_sms_batch(backend_id):
+    """
+    backend_id - the backend_id of the outgoing QueuedSMS entries to process
+    """
+    utcnow = get_utcnow()
+    domains = {}
+    contacts_active = {}
+    # backend pk -> (backend, messages to send with it)
+    batches = OrderedDict()
+
+    for msg in claim_sms_batch_to_process(backend_id, utcnow):
+        try:
+            backend = get_outbound_backend_for_batch(msg, utcnow, domains, contacts_active)
+        except Exception:
+            log_sms_exception(msg)
+            handle_unsuccessful_processing_attempt(msg)
+            continue
+        if backend:
+            batches.setdefault(backend.pk, (backend, []))[1].append(msg)
+
+    for backend, msgs in batches.values():
+        if isinstance(backend, PhoneLoadBalancingMixin):
+            # Each phone number is rate limited separately
+            for msg in msgs:
+                handle_outgoing(msg)
+            continue
+
+        msgs = schedule_outgoing(msgs, backend, utcnow)
+        if msgs:
+            for msg, result in zip(msgs, send_messages_via_backend(msgs, backend)):
+                handle_send_result(msg, result)
 
 
 @no_result_task(default_retry_delay=10 * 60, max_retries=10, bind=True)
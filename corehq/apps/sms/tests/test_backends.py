@@ -1208,13 +1208,15 @@ class LoadBalancingAndRateLimitingTestCase(BaseSMSTest):
         sms.save()
         return sms
 
-    def assertRequeue(self, backend, phone_number):
-        requeue_flag = handle_outgoing(self.create_outgoing_sms(backend, phone_number))
-        self.assertTrue(requeue_flag)
+    def assertDelayed(self, backend, phone_number):
+        sms = self.create_outgoing_sms(backend, phone_number)
+        handle_outgoing(sms)
+        self.assertGreater(QueuedSMS.objects.get(pk=sms.pk).datetime_to_process, datetime.utcnow())
 
-    def assertNotRequeue(self, backend, phone_number):
-        requeue_flag = handle_outgoing(self.create_outgoing_sms(backend, phone_number))
-        self.assertFalse(requeue_flag)
+    def assertNotDelayed(self, backend, phone_number):
+        sms = self.create_outgoing_sms(backend, phone_number)
+        handle_outgoing(sms)
+        self.assertFalse(QueuedSMS.objects.filter(pk=sms.pk).exists())
 
     def test_load_balance(self):
         backend = LoadBalanceBackend.objects.create(
@@ -1227,19 +1229,19 @@ class LoadBalancingAndRateLimitingTestCase(BaseSMSTest):
 
         for i in range(2):
             with patch('corehq.apps.sms.tests.test_backends.LoadBalanceBackend.send') as mock_send:
-                self.assertNotRequeue(backend, '+9991111111')
+                self.assertNotDelayed(backend, '+9991111111')
                 self.assertTrue(mock_send.called)
                 self.assertEqual(mock_send.call_args[1]['orig_phone_number'], '+9990002')
 
         for i in range(2):
             with patch('corehq.apps.sms.tests.test_backends.LoadBalanceBackend.send') as mock_send:
-                self.assertNotRequeue(backend, '+9992222222')
+                self.assertNotDelayed(backend, '+9992222222')
                 self.assertTrue(mock_send.called)
                 self.assertEqual(mock_send.call_args[1]['orig_phone_number'], '+9990001')
 
         for i in range(2):
             with patch('corehq.apps.sms.tests.test_backends.LoadBalanceBackend.send') as mock_send:
-                self.assertNotRequeue(backend, '+9993333333')
+                self.assertNotDelayed(backend, '+9993333333')
                 self.assertTrue(mock_send.called)
                 self.assertEqual(mock_send.call_args[1]['orig_phone_number'], '+9990003')
 
@@ -1251,15 +1253,15 @@ class LoadBalancingAndRateLimitingTestCase(BaseSMSTest):
         )
         self.addCleanup(backend.delete)
 
-        # Requeue flag should be False until we hit the limit
+        # Messages should be sent right away until we hit the limit
         for i in range(backend.get_sms_rate_limit()):
             with patch('corehq.apps.sms.tests.test_backends.RateLimitBackend.send') as mock_send:
-                self.assertNotRequeue(backend, '+9991111111')
+                self.assertNotDelayed(backend, '+9991111111')
                 self.assertTrue(mock_send.called)
 
-        # Requeue flag should be True after hitting the limit
+        # Messages should be delayed after hitting the limit
         with patch('corehq.apps.sms.tests.test_backends.RateLimitBackend.send') as mock_send:
-            self.assertRequeue(backend, '+9991111111')
+            self.assertDelayed(backend, '+9991111111')
             self.assertFalse(mock_send.called)
 
     def test_load_balance_and_rate_limit(self):
@@ -1273,30 +1275,30 @@ class LoadBalancingAndRateLimitingTestCase(BaseSMSTest):
 
         for i in range(backend.get_sms_rate_limit()):
             with patch('corehq.apps.sms.tests.test_backends.LoadBalanceAndRateLimitBackend.send') as mock_send:
-                self.assertNotRequeue(backend, '+9991111111')
+                self.assertNotDelayed(backend, '+9991111111')
                 self.assertTrue(mock_send.called)
                 self.assertEqual(mock_send.call_args[1]['orig_phone_number'], '+9990002')
 
             with patch('corehq.apps.sms.tests.test_backends.LoadBalanceAndRateLimitBackend.send') as mock_send:
-                self.assertNotRequeue(backend, '+9992222222')
+                self.assertNotDelayed(backend, '+9992222222')
                 self.assertTrue(mock_send.called)
                 self.assertEqual(mock_send.call_args[1]['orig_phone_number'], '+9990001')
 
             with patch('corehq.apps.sms.tests.test_backends.LoadBalanceAndRateLimitBackend.send') as mock_send:
-                self.assertNotRequeue(backend, '+9993333333')
+                self.assertNotDelayed(backend, '+9993333333')
                 self.assertTrue(mock_send.called)
                 self.assertEqual(mock_send.call_args[1]['orig_phone_number'], '+9990003')
 
         with patch('corehq.apps.sms.tests.test_backends.LoadBalanceAndRateLimitBackend.send') as mock_send:
-            self.assertRequeue(backend, '+9991111111')
+            self.assertDelayed(backend, '+9991111111')
             self.assertFalse(mock_send.called)
 
         with patch('corehq.apps.sms.tests.test_backends.LoadBalanceAndRateLimitBackend.send') as mock_send:
-            self.assertRequeue(backend, '+9992222222')
+            self.assertDelayed(backend, '+9992222222')
             self.assertFalse(mock_send.called)
 
         with patch('corehq.apps.sms.tests.test_backends.LoadBalanceAndRateLimitBackend.send') as mock_send:
-            self.assertRequeue(backend, '+9993333333')
+            self.assertDelayed(backend, '+9993333333')
             self.assertFalse(mock_send.called)
 
 
@@ -1,14 +1,16 @@
 from corehq.apps.domain.models import Domain
 from corehq.apps.sms.api import send_sms, incoming
 from corehq.apps.sms.models import SMS, QueuedSMS
-from corehq.apps.sms.tasks import process_sms
+from corehq.apps.sms.tasks import process_sms, process_sms_batch, claim_sms_batch, release_sms_claim
 from corehq.apps.sms.tests.util import (BaseSMSTest, setup_default_sms_test_backend,
     delete_domain_phone_numbers)
 from corehq.apps.smsbillables.models import SmsBillable
 from corehq.apps.users.models import CommCareUser
+from corehq.util.test_utils import flag_enabled
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.test.utils import override_settings
+from dimagi.utils.couch.cache.cache_core import get_redis_client
 from mock import Mock, patch
 
 
@@ -40,6 +42,13 @@ def patch_error_send():
     )
 
 
+def patch_rate_limit(sms_rate_limit):
+    return patch(
+        'corehq.messaging.smsbackends.test.models.SQLTestSMSBackend.get_sms_rate_limit',
+        new=Mock(return_value=sms_rate_limit)
+    )
+
+
 @patch('corehq.apps.sms.management.commands.run_sms_queue.SMSEnqueuingOperation.enqueue_directly', autospec=True)
 @patch('corehq.apps.sms.tasks.process_sms.delay', autospec=True)
 @override_settings(SMS_QUEUE_ENABLED=True)
@@ -255,6 +264,84 @@ class QueueingTestCase(BaseSMSTest):
         self.assertEqual(process_sms_delay_mock.call_count, 0)
         self.assertBillableDoesNotExist(couch_id)
 
+    @override_settings(SMS_QUEUE_USE_BATCHES=True)
+    def test_outgoing_batch(self, process_sms_delay_mock, enqueue_directly_mock):
+        send_sms(self.domain, None, '+999123', 'test outgoing 1')
+        send_sms(self.domain, None, '+999123', 'test outgoing 2')
+
+        self.assertEqual(enqueue_directly_mock.call_count, 2)
+        self.assertEqual(self.queued_sms_count, 2)
+        couch_ids = set(QueuedSMS.objects.values_list('couch_id', flat=True))
+
+        with patch_successful_send() as send_mock, \
+                patch('corehq.apps.sms.tasks.Domain.get_by_name', wraps=Domain.get_by_name) as get_domain_mock, \
+                patch('corehq.apps.sms.tasks.process_sms_batch.delay') as process_sms_batch_delay_mock:
+            process_sms_batch(None)
+
+        self.assertEqual(send_mock.call_count, 2)
+        self.assertEqual(get_domain_mock.call_count, 1)
+        self.assertEqual(self.queued_sms_count, 0)
+        self.assertEqual(self.reporting_sms_count, 2)
+        self.assertEqual(set(SMS.objects.filter(domain=self.domain).values_list('couch_id', flat=True)), couch_ids)
+        for couch_id in couch_ids:
+            self.assertBillableExists(couch_id)
+
+        self.assertEqual(process_sms_batch_delay_mock.call_count, 0)
+        self.assertEqual(process_sms_delay_mock.call_count, 0)
+
+    @override_settings(SMS_QUEUE_USE_BATCHES=True)
+    def test_outgoing_batch_data_migration(self, process_sms_delay_mock, enqueue_directly_mock):
+        send_sms(self.domain, None, '+999123', 'test outgoing')
+        queued_sms = self.get_queued_sms()
+
+        with patch_successful_send() as send_mock, flag_enabled('DATA_MIGRATION'):
+            process_sms_batch(None)
+
+        self.assertEqual(send_mock.call_count, 0)
+        self.assertEqual(self.reporting_sms_count, 0)
+        # the message is left in the queue for when the migration is done
+        self.assertEqual(self.get_queued_sms().datetime_to_process, queued_sms.datetime_to_process)
+
+    @override_settings(SMS_QUEUE_USE_BATCHES=True)
+    def test_outgoing_batch_saved_while_sending(self, process_sms_delay_mock, enqueue_directly_mock):
+        send_sms(self.domain, None, '+999123', 'test outgoing')
+        queued_sms = self.get_queued_sms()
+        utcnow = datetime.utcnow()
+
+        [msg] = claim_sms_batch(None, utcnow, 10)
+        # sending a message saves it before its result is handled
+        msg.save()
+
+        self.assertEqual(claim_sms_batch(None, utcnow, 10), [])
+        self.assertGreater(self.get_queued_sms().datetime_to_process, utcnow)
+
+        release_sms_claim(msg)
+        self.assertEqual(self.get_queued_sms().datetime_to_process, queued_sms.datetime_to_process)
+
+    @override_settings(SMS_QUEUE_USE_BATCHES=True)
+    def test_outgoing_batch_rate_limited(self, process_sms_delay_mock, enqueue_directly_mock):
+        send_sms(self.domain, None, '+999123', 'test outgoing 1')
+        send_sms(self.domain, None, '+999123', 'test outgoing 2')
+        get_redis_client().client.get_client().delete('sms-rate-limit-backend-%s' % self.backend.pk)
+
+        with patch_successful_send() as send_mock, patch_rate_limit(1):
+            process_sms_batch(None)
+
+        self.assertEqual(send_mock.call_count, 1)
+        self.assertEqual(self.reporting_sms_count, 1)
+        # the other message waits in the queue until the rate limit allows sending it
+        queued_sms = self.get_queued_sms()
+        self.assertGreater(queued_sms.datetime_to_process, datetime.utcnow() + timedelta(seconds=50))
+        self.assertEqual(queued_sms.num_processing_attempts, 0)
+
+        with patch_successful_send() as send_mock, patch_rate_limit(1), \
+                patch_datetime_tasks(queued_sms.datetime_to_process + timedelta(seconds=1)):
+            process_sms_batch(None)
+
+        self.assertEqual(send_mock.call_count, 1)
+        self.assertEqual(self.queued_sms_count, 0)
+        self.assertEqual(self.reporting_sms_count, 2)
+
     def test_incoming(self, process_sms_delay_mock, enqueue_directly_mock):
         incoming('999123', 'inbound test', self.backend.get_api_id())
 
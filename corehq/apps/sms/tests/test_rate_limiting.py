@@ -0,0 +1,56 @@
+import uuid
+from datetime import datetime, timedelta
+
+from django.test import SimpleTestCase
+from mock import Mock
+
+from corehq.apps.sms.rate_limiting import SMSSendScheduler
+from dimagi.utils.couch.cache.cache_core import get_redis_client
+
+
+class SMSSendSchedulerTest(SimpleTestCase):
+
+    def setUp(self):
+        self.redis_key = 'sms-send-scheduler-test-%s' % uuid.uuid4().hex
+        self.client = get_redis_client().client.get_client()
+        self.addCleanup(self.client.delete, self.redis_key)
+        self.msgs = [Mock(pk=pk) for pk in range(10)]
+        self.addCleanup(self.client.delete, *[
+            '%s-sms-%s' % (self.redis_key, msg.pk) for msg in self.msgs
+        ])
+
+    def test_send_times(self):
+        utcnow = datetime(2017, 6, 1, 12, 0)
+        scheduler = SMSSendScheduler(self.redis_key, 2)
+        self.assertEqual(scheduler.get_send_times(self.msgs[:4], utcnow), [
+            utcnow,
+            utcnow,
+            utcnow + timedelta(seconds=60),
+            utcnow + timedelta(seconds=60),
+        ])
+
+        # messages that were already scheduled keep their time
+        later = utcnow + timedelta(seconds=30)
+        self.assertEqual(scheduler.get_send_times(self.msgs[2:4], later), [
+            utcnow + timedelta(seconds=60),
+            utcnow + timedelta(seconds=60),
+        ])
+
+    def test_bucket_refills(self):
+        utcnow = datetime(2017, 6, 1, 12, 0)
+        scheduler = SMSSendScheduler(self.redis_key, 2)
+        scheduler.get_send_times(self.msgs[:2], utcnow)
+
+        later = utcnow + timedelta(seconds=90)
+        self.assertEqual(scheduler.get_send_times(self.msgs[2:4], later), [later, later])
+
+    def test_sliding_window_maximum(self):
+        utcnow = datetime(2017, 6, 1, 12, 0)
+        scheduler = SMSSendScheduler(self.redis_key, 3)
+        send_times = []
+        for i, msg in enumerate(self.msgs):
+            send_times.extend(scheduler.get_send_times([msg], utcnow + timedelta(seconds=10 * i)))
+
+        for send_time in send_times:
+            window = [t for t in send_times if send_time <= t < send_time + timedelta(seconds=60)]
+            self.assertLessEqual(len(window), 3)
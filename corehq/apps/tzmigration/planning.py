@@ -77,6 +77,22 @@ class PlanningStockReportHelper(Base):
     stock_report_helper_json = Column(UnicodeText, nullable=False)
 
 
+class PlanningCheckpoint(Base):
+    __tablename__ = 'checkpoint'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), nullable=False, unique=True)
+    value_json = Column(UnicodeText, nullable=False)
+
+
+class PlanningFlaggedDoc(Base):
+    __tablename__ = 'flagged_doc'
+
+    id = Column(Integer, primary_key=True)
+    flag = Column(String(50), nullable=False)
+    doc_id = Column(String(50), nullable=False)
+
+
 class BaseDB(object):
 
     def __init__(self, db_filepath):
@@ -121,10 +137,60 @@ class DiffDB(BaseDB):
                 new_value=json_dumps_or_none(d.new_value)))
         session.commit()
 
+    def replace_diffs(self, kind, doc_id, doc_diffs):
+        """
+        Like add_diffs, but removes the doc's diffs of the same kind first
+        """
+        session = self.Session()
+        (session.query(PlanningDiff)
+         .filter(PlanningDiff.kind == kind, PlanningDiff.doc_id == doc_id)
+         .delete(synchronize_session=False))
+        session.commit()
+        self.add_diffs(kind, doc_id, doc_diffs)
+
+    def delete_diffs(self, kinds):
+        session = self.Session()
+        (session.query(PlanningDiff)
+         .filter(PlanningDiff.kind.in_(kinds))
+         .delete(synchronize_session=False))
+        session.commit()
+
     def get_diffs(self):
         session = self.Session()
         return session.query(PlanningDiff).all()
 
+    def get_checkpoint(self, name):
+        session = self.Session()
+        try:
+            checkpoint = (session.query(PlanningCheckpoint)
+                          .filter(PlanningCheckpoint.name == name).one())
+        except NoResultFound:
+            return None
+        return json.loads(checkpoint.value_json)
+
+    def set_checkpoint(self, name, value):
+        session = self.Session()
+        value_json = json.dumps(value)
+        updated = (session.query(PlanningCheckpoint)
+                   .filter(PlanningCheckpoint.name == name)
+                   .update({'value_json': value_json}))
+        if not updated:
+            session.add(PlanningCheckpoint(name=name, value_json=value_json))
+        session.commit()
+
+    def add_flagged_doc_ids(self, flag, doc_ids):
+        session = self.Session()
+        for doc_id in doc_ids:
+            session.add(PlanningFlaggedDoc(flag=flag, doc_id=doc_id))
+        session.commit()
+
+    def get_flagged_doc_ids(self, flag):
+        session = self.Session()
+        query = (session.query(PlanningFlaggedDoc)
+                 .with_entities(PlanningFlaggedDoc.doc_id)
+                 .filter(PlanningFlaggedDoc.flag == flag))
+        return {doc_id for (doc_id,) in query.all()}
+
     def get_diff_stats(self):
         """
         :return: {
@@ -1,4 +1,5 @@
 from __future__ import absolute_import
+from corehq import toggles
 from dimagi.utils.decorators.memoized import memoized
 from dimagi.utils.logging import notify_exception
 from corehq.util.test_utils import unit_testing_only
@@ -42,6 +43,8 @@ class IndicatorAdapter(object):
             self.handle_exception(doc, e)
         else:
             self._best_effort_save_rows(indicator_rows, doc)
+            if indicator_rows:
+                self.rows_changed()
 
     def _best_effort_save_rows(self, rows, doc):
         """
@@ -49,6 +52,77 @@ class IndicatorAdapter(object):
         """
         raise NotImplementedError
 
+    def best_effort_bulk_save(self, docs, eval_contexts=None):
+        """
+        Like ``best_effort_save`` but for multiple documents at once. The rows for all the
+        documents are written together, falling back to saving one document at a time
+        if that fails.
+
+        :param eval_contexts: optional dict of doc ID to ``EvaluationContext``
+        """
+        eval_contexts = eval_contexts or {}
+        # if a doc is in the list more than once only its last version is saved
+        docs_by_id = {doc['_id']: doc for doc in docs}
+        if toggles.UCR_BATCH_LOOKUPS.enabled(self.config.domain):
+            eval_contexts = self._get_batch_eval_contexts(docs_by_id, eval_contexts)
+        doc_rows = []
+        for doc_id, doc in docs_by_id.items():
+            eval_context = eval_contexts.get(doc_id)
+            try:
+                doc_rows.append((doc, self.get_all_values(doc, eval_context)))
+            except Exception as e:
+                self.handle_exception(doc, e)
+            finally:
+                if eval_context:
+                    eval_context.reset_iteration()
+        self._best_effort_bulk_save_rows(doc_rows)
+        if any(rows for doc, rows in doc_rows):
+            self.rows_changed()
+
+    def _get_batch_eval_contexts(self, docs_by_id, eval_contexts):
+        """
+        Get evaluation contexts for the documents that share a cache of the lookups
+        their expressions make, and prefetch those lookups for all the documents at once.
+        """
+        from corehq.apps.userreports.expressions.batch import BatchLookupCache
+        from corehq.apps.userreports.specs import EvaluationContext
+        batch_cache = BatchLookupCache()
+        batch_contexts = {}
+        for doc_id, doc in docs_by_id.items():
+            eval_context = eval_contexts.get(doc_id) or EvaluationContext(doc)
+            eval_context.batch_cache = batch_cache
+            batch_contexts[doc_id] = eval_context
+
+        if self.config.has_prefetchable_lookups:
+            batch_cache.collecting = True
+            try:
+                for doc in docs_by_id.values():
+                    try:
+                        # a separate context so that nothing evaluated without the lookups is kept
+                        self.get_all_values(doc, EvaluationContext(doc, batch_cache=batch_cache))
+                    except Exception:
+                        # errors are handled when the document is evaluated with its lookups
+                        pass
+            finally:
+                batch_cache.collecting = False
+        return batch_contexts
+
+    def _best_effort_bulk_save_rows(self, doc_rows):
+        try:
+            self._bulk_save_rows(doc_rows)
+        except Exception:
+            for doc, rows in doc_rows:
+                self._best_effort_save_rows(rows, doc)
+
+    def _bulk_save_rows(self, doc_rows):
+        """
+        Saves the rows for multiple documents.
+
+        :param doc_rows: list of ``(doc, rows)`` tuples
+        """
+        for doc, rows in doc_rows:
+            self._save_rows(rows, doc)
+
     def handle_exception(self, doc, exception):
         from corehq.util.cache_utils import is_rate_limited
         ex_clss = exception.__class__
@@ -75,6 +149,18 @@ class IndicatorAdapter(object):
         """
         indicator_rows = self.get_all_values(doc, eval_context)
         self._save_rows(indicator_rows, doc)
+        if indicator_rows:
+            self.rows_changed()
+
+    def rows_changed(self):
+        """
+        Advances the data source's version, which invalidates cached report data.
+        Should be called after any change to the rows. Only domains that cache
+        mobile report rows use the version, so it's left alone for the others.
+        """
+        from corehq.apps.userreports.util import bump_data_source_version
+        if toggles.MOBILE_UCR_CACHE_ROWS.enabled(self.config.domain):
+            bump_data_source_version(self.config._id)
 
     def get_all_values(self, doc, eval_context=None):
         "Gets all the values from a document to save"
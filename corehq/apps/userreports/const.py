@@ -44,4 +44,19 @@ VALID_REFERENCED_DOC_TYPES = [
 ASYNC_INDICATOR_QUEUE_TIME = timedelta(minutes=5)
 ASYNC_INDICATOR_CHUNK_SIZE = 20
 
+# number of documents whose indicator rows are written together when rebuilding a table
+UCR_BULK_SAVE_CHUNK_SIZE = 100
+
+# default number of parallel tasks used by rebuild_indicators_in_shards
+UCR_REBUILD_SHARDS = 16
+
 XFORM_CACHE_KEY_PREFIX = 'xform_to_json_cache'
+
+# maximum number of lookups kept by the cache shared by a batch of documents
+UCR_BATCH_LOOKUP_CACHE_SIZE = 5000
+
+# expressions whose lookups are fetched in bulk for a batch of documents
+PREFETCHABLE_EXPRESSION_TYPES = ('related_doc', 'get_subcases')
+
+# redis key prefix for the versions of data sources' rows, used to key caches of report data
+DATA_SOURCE_VERSION_KEY_PREFIX = 'ucr-data-source-version'
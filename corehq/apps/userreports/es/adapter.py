@@ -207,6 +207,24 @@ class IndicatorESAdapter(IndicatorAdapter):
                 id=normalize_id(primary_key_values), doc_type="indicator"
             )
 
+    def _bulk_save_rows(self, doc_rows):
+        body = []
+        for doc, rows in doc_rows:
+            for row in rows:
+                primary_key_values = [str(i.value) for i in row if i.column.is_primary_key]
+                body.append({'index': {
+                    '_index': self.table_name,
+                    '_type': 'indicator',
+                    '_id': normalize_id(primary_key_values),
+                }})
+                body.append({i.column.database_column_name: i.value for i in row})
+        if not body:
+            return
+
+        response = get_es_new().bulk(body=body)
+        if response.get('errors'):
+            raise ESError(u'Bulk save to UCR index {} failed'.format(self.table_name))
+
     def doc_exists(self, doc):
         return self.es.exists(self.table_name, 'indicator', doc['_id'])
 
@@ -0,0 +1,105 @@
+from __future__ import absolute_import
+from collections import OrderedDict, defaultdict
+
+from corehq.apps.userreports.const import UCR_BATCH_LOOKUP_CACHE_SIZE
+from corehq.apps.userreports.document_stores import get_document_store
+from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
+from corehq.form_processor.interfaces.processor import FormProcessorInterface
+from pillowtop.dao.exceptions import DocumentNotFoundError
+
+
+class BatchLookupCache(object):
+    """
+    A cache of the lookups made by expressions, shared by the evaluation contexts
+    of a batch of documents.
+
+    A batch is evaluated in two phases. While ``collecting``, expressions only
+    request the documents they need instead of fetching them. All the requested
+    lookups of a kind are then fetched in bulk the first time any of them is needed.
+
+    The least recently used lookups are evicted once the cache is full.
+    """
+
+    def __init__(self, max_size=UCR_BATCH_LOOKUP_CACHE_SIZE):
+        self.max_size = max_size
+        self.collecting = False
+        self._cache = OrderedDict()
+        self._requested = defaultdict(set)
+
+    def request_document(self, domain, doc_type, doc_id):
+        self._request(('document', domain, doc_type), doc_id)
+
+    def request_subcases(self, domain, case_id):
+        self._request(('subcases', domain), case_id)
+
+    def get_document(self, domain, doc_type, doc_id):
+        doc = self._get(('document', domain, doc_type), doc_id, self._fetch_documents)
+        if doc is None:
+            raise DocumentNotFoundError(u'{} {} not found'.format(doc_type, doc_id))
+        return doc
+
+    def get_subcases(self, domain, case_id):
+        return self._get(('subcases', domain), case_id, self._fetch_subcases)
+
+    def get_case_forms(self, domain, case_id):
+        # the forms of several cases can't be fetched at once, but they're still shared by the batch
+        return self._get(('case_forms', domain), case_id, self._fetch_case_forms)
+
+    def _request(self, kind, key):
+        if (kind, key) not in self._cache:
+            self._requested[kind].add(key)
+
+    def _get(self, kind, key, fetch):
+        if (kind, key) not in self._cache:
+            keys = self._requested.pop(kind, set()) - {key}
+            fetched = fetch(kind, keys | {key})
+            for fetched_key in keys:
+                self._set((kind, fetched_key), fetched[fetched_key])
+            # set last so that it's not evicted by the other lookups
+            self._set((kind, key), fetched[key])
+        value = self._cache.pop((kind, key))
+        self._cache[(kind, key)] = value
+        return value
+
+    def _set(self, cache_key, value):
+        self._cache.pop(cache_key, None)
+        self._cache[cache_key] = value
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def _fetch_documents(self, kind, doc_ids):
+        _, domain, doc_type = kind
+        document_store = get_document_store(domain, doc_type)
+        if doc_type == 'XFormInstance':
+            # forms fetched in bulk from the SQL document store don't include their attachments
+            return {doc_id: _get_document_or_none(document_store, doc_id) for doc_id in doc_ids}
+
+        docs = {doc_id: None for doc_id in doc_ids}
+        docs.update({
+            doc['_id']: doc
+            for doc in document_store.iter_documents(list(doc_ids))
+            if doc['_id'] in docs
+        })
+        return docs
+
+    def _fetch_subcases(self, kind, case_ids):
+        _, domain = kind
+        subcases = {case_id: [] for case_id in case_ids}
+        for case in CaseAccessors(domain).get_reverse_indexed_cases(list(case_ids)):
+            case_json = case.to_json()
+            for referenced_id in {index.referenced_id for index in case.indices}:
+                if referenced_id in subcases:
+                    subcases[referenced_id].append(case_json)
+        return subcases
+
+    def _fetch_case_forms(self, kind, case_ids):
+        _, domain = kind
+        interface = FormProcessorInterface(domain)
+        return {case_id: interface.get_case_forms(case_id) for case_id in case_ids}
+
+
+def _get_document_or_none(document_store, doc_id):
+    try:
+        return document_store.get_document(doc_id)
+    except DocumentNotFoundError:
+        return None
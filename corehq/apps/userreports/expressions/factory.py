@@ -35,10 +35,15 @@ def _simple_expression_generator(wrapper_class, spec, context):
     return wrapper_class.wrap(spec)
 
 
+def _configured_expression_generator(wrapper_class, spec, context):
+    wrapped = wrapper_class.wrap(spec)
+    wrapped.configure()
+    return wrapped
+
+
 _identity_expression = functools.partial(_simple_expression_generator, IdentityExpressionSpec)
-_constant_expression = functools.partial(_simple_expression_generator, ConstantGetterSpec)
-_property_name_expression = functools.partial(_simple_expression_generator, PropertyNameGetterSpec)
-_property_path_expression = functools.partial(_simple_expression_generator, PropertyPathGetterSpec)
+_constant_expression = functools.partial(_configured_expression_generator, ConstantGetterSpec)
+_property_path_expression = functools.partial(_configured_expression_generator, PropertyPathGetterSpec)
 _iteration_number_expression = functools.partial(_simple_expression_generator, IterationNumberExpressionSpec)
 
 
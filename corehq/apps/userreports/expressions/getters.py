@@ -160,19 +160,25 @@ def transform_array(item):
     return [item]
 
 
+def _identity(item):
+    return item
+
+
+_TRANSFORMS_BY_DATATYPE = {
+    'date': transform_date,
+    'datetime': transform_datetime,
+    'decimal': transform_decimal,
+    'integer': transform_int,
+    'string': transform_unicode,
+    'array': transform_array,
+}
+
+
 def transform_from_datatype(datatype):
     """
     Given a datatype, return a transform for that type.
     """
-    identity = lambda x: x
-    return {
-        'date': transform_date,
-        'datetime': transform_datetime,
-        'decimal': transform_decimal,
-        'integer': transform_int,
-        'string': transform_unicode,
-        'array': transform_array,
-    }.get(datatype) or identity
+    return _TRANSFORMS_BY_DATATYPE.get(datatype) or _identity
 
 
 def getter_from_property_reference(spec):
@@ -20,7 +20,7 @@ from corehq.apps.userreports.specs import TypeProperty, EvaluationContext
 from corehq.form_processor.interfaces.processor import FormProcessorInterface
 from dimagi.ext.jsonobject import JsonObject, StringProperty, ListProperty, DictProperty
 from pillowtop.dao.exceptions import DocumentNotFoundError
-from .utils import eval_statements
+from .utils import eval_statements, parse_statement
 
 
 class IdentityExpressionSpec(JsonObject):
@@ -47,8 +47,11 @@ class ConstantGetterSpec(JsonObject):
             raise BadSpecError('"constant" property is required!')
         return super(ConstantGetterSpec, self).wrap(obj)
 
+    def configure(self):
+        self._constant = self.constant
+
     def __call__(self, item, context=None):
-        return self.constant
+        return self._constant
 
 
 class PropertyNameGetterSpec(JsonObject):
@@ -58,10 +61,20 @@ class PropertyNameGetterSpec(JsonObject):
 
     def configure(self, property_name_expression):
         self._property_name_expression = property_name_expression
+        # the name is almost always a constant, which doesn't need to be evaluated for every item
+        self._is_constant_property_name = isinstance(property_name_expression, ConstantGetterSpec)
+        if self._is_constant_property_name:
+            self._property_name = property_name_expression.constant
+        self._transform = transform_from_datatype(self.datatype)
 
     def __call__(self, item, context=None):
-        raw_value = item.get(self._property_name_expression(item, context)) if isinstance(item, dict) else None
-        return transform_from_datatype(self.datatype)(raw_value)
+        if not isinstance(item, dict):
+            raw_value = None
+        elif self._is_constant_property_name:
+            raw_value = item.get(self._property_name)
+        else:
+            raw_value = item.get(self._property_name_expression(item, context))
+        return self._transform(raw_value)
 
 
 class PropertyPathGetterSpec(JsonObject):
@@ -69,9 +82,12 @@ class PropertyPathGetterSpec(JsonObject):
     property_path = ListProperty(six.text_type, required=True)
     datatype = DataTypeProperty(required=False)
 
+    def configure(self):
+        self._property_path = list(self.property_path)
+        self._transform = transform_from_datatype(self.datatype)
+
     def __call__(self, item, context=None):
-        transform = transform_from_datatype(self.datatype)
-        return transform(safe_recursive_lookup(item, self.property_path))
+        return self._transform(safe_recursive_lookup(item, self._property_path))
 
 
 class NamedExpressionSpec(JsonObject):
@@ -221,20 +237,28 @@ class RelatedDocExpressionSpec(JsonObject):
     def get_value(self, doc_id, context):
         try:
             assert context.root_doc['domain']
-            document_store = get_document_store(context.root_doc['domain'], self.related_doc_type)
+            domain = context.root_doc['domain']
 
             doc = context.get_cache_value(self._context_cache_key(doc_id))
             if not doc:
-                doc = document_store.get_document(doc_id)
+                if context.collecting_lookups:
+                    context.batch_cache.request_document(domain, self.related_doc_type, doc_id)
+                    return None
+                doc = self._get_document(domain, doc_id, context)
                 context.set_cache_value(self._context_cache_key(doc_id), doc)
             # ensure no cross-domain lookups of different documents
             if context.root_doc['domain'] != doc.get('domain'):
                 return None
             # explicitly use a new evaluation context since this is a new document
-            return self._value_expression(doc, EvaluationContext(doc, 0))
+            return self._value_expression(doc, EvaluationContext(doc, 0, batch_cache=context.batch_cache))
         except DocumentNotFoundError:
             return None
 
+    def _get_document(self, domain, doc_id, context):
+        if context.batch_cache:
+            return context.batch_cache.get_document(domain, self.related_doc_type, doc_id)
+        return get_document_store(domain, self.related_doc_type).get_document(doc_id)
+
 
 class NestedExpressionSpec(JsonObject):
     type = TypeProperty('nested')
@@ -275,12 +299,19 @@ class EvalExpressionSpec(JsonObject):
 
     def configure(self, context_variables):
         self._context_variables = context_variables
+        self._statement = self.statement
+        try:
+            self._parsed_statement = parse_statement(self._statement)
+        except Exception:
+            # leave it to eval_statements to fail in the same way every time it's evaluated
+            self._parsed_statement = None
+        self._transform = transform_from_datatype(self.datatype)
 
     def __call__(self, item, context=None):
         var_dict = self.get_variables(item, context)
         try:
-            untransformed_value = eval_statements(self.statement, var_dict)
-            return transform_from_datatype(self.datatype)(untransformed_value)
+            untransformed_value = eval_statements(self._statement, var_dict, self._parsed_statement)
+            return self._transform(untransformed_value)
         except (InvalidExpression, SyntaxError, TypeError, ZeroDivisionError):
             return None
 
@@ -311,6 +342,8 @@ class FormsExpressionSpec(JsonObject):
 
     def _get_forms(self, case_id, context):
         domain = context.root_doc['domain']
+        if context.collecting_lookups:
+            return []
 
         cache_key = (self.__class__.__name__, case_id, tuple(self.xmlns))
         if context.get_cache_value(cache_key) is not None:
@@ -331,7 +364,10 @@ class FormsExpressionSpec(JsonObject):
             return context.get_cache_value(cache_key)
 
         domain = context.root_doc['domain']
-        xforms = FormProcessorInterface(domain).get_case_forms(case_id)
+        if context.batch_cache:
+            xforms = context.batch_cache.get_case_forms(domain, case_id)
+        else:
+            xforms = FormProcessorInterface(domain).get_case_forms(case_id)
         context.set_cache_value(cache_key, xforms)
         return xforms
 
@@ -366,7 +402,13 @@ class SubcasesExpressionSpec(JsonObject):
         if context.get_cache_value(cache_key) is not None:
             return context.get_cache_value(cache_key)
 
-        subcases = [c.to_json() for c in CaseAccessors(domain).get_reverse_indexed_cases([case_id])]
+        if context.collecting_lookups:
+            context.batch_cache.request_subcases(domain, case_id)
+            return []
+        if context.batch_cache:
+            subcases = context.batch_cache.get_subcases(domain, case_id)
+        else:
+            subcases = [c.to_json() for c in CaseAccessors(domain).get_reverse_indexed_cases([case_id])]
         context.set_cache_value(cache_key, subcases)
         return subcases
 
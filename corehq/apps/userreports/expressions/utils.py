@@ -46,12 +46,20 @@ class EvalNoMethods(SimpleEval):
         return super(EvalNoMethods, self)._eval_call(node)
 
 
-def eval_statements(statement, variable_context):
+def parse_statement(statement):
+    """Parses a statement the way ``SimpleEval.eval`` does, so that it can be
+    parsed once and passed to ``eval_statements`` many times
+    """
+    return ast.parse(statement.strip()).body[0].value
+
+
+def eval_statements(statement, variable_context, parsed_statement=None):
     """Evaluates math statements and returns the value
 
     args
         statement: a simple python-like math statement
         variable_context: a dict with variable names as key and assigned values as dict values
+        parsed_statement: optionally, the statement already parsed by ``parse_statement``
     """
     # variable values should be numbers
     var_types = set(type(value) for value in variable_context.values())
@@ -59,7 +67,11 @@ def eval_statements(statement, variable_context):
         raise InvalidExpression('Context contains disallowed types')
 
     evaluator = EvalNoMethods(operators=SAFE_OPERATORS, names=variable_context, functions=FUNCTIONS)
-    return evaluator.eval(statement)
+    if parsed_statement is None:
+        return evaluator.eval(statement)
+    # the rest of SimpleEval.eval, without parsing the statement again
+    evaluator.expr = statement
+    return evaluator._eval(parsed_statement)
 
 
 SUM = 'sum'
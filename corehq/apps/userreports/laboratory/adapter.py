@@ -53,6 +53,14 @@ class IndicatorLaboratoryAdapter(IndicatorAdapter):
             self.es_adapter._best_effort_save_rows(indicator_rows, doc)
             self.sql_adapter._best_effort_save_rows(indicator_rows, doc)
 
+    def _best_effort_bulk_save_rows(self, doc_rows):
+        self.es_adapter._best_effort_bulk_save_rows(doc_rows)
+        self.sql_adapter._best_effort_bulk_save_rows(doc_rows)
+
+    def _bulk_save_rows(self, doc_rows):
+        self.es_adapter._bulk_save_rows(doc_rows)
+        self.sql_adapter._bulk_save_rows(doc_rows)
+
     def _save_rows(self, rows, doc):
         self.es_adapter._save_rows(rows, doc)
         self.sql_adapter._save_rows(rows, doc)
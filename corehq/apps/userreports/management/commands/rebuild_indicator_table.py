@@ -7,6 +7,23 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('indicator_config_id')
+        parser.add_argument(
+            '--shards',
+            type=int,
+            default=0,
+            help='Rebuild the table with a parallel celery task for each of this many ranges of doc ids',
+        )
+        parser.add_argument(
+            '--resume-shards',
+            action='store_true',
+            default=False,
+            help="Restart the shards of the table's last sharded rebuild that haven't finished",
+        )
 
     def handle(self, indicator_config_id, **options):
-        tasks.rebuild_indicators(indicator_config_id)
+        if options['resume_shards']:
+            tasks.resume_building_indicators_in_shards(indicator_config_id)
+        elif options['shards']:
+            tasks.rebuild_indicators_in_shards(indicator_config_id, options['shards'])
+        else:
+            tasks.rebuild_indicators(indicator_config_id)
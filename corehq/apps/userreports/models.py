@@ -16,6 +16,7 @@ from dimagi.ext.couchdbkit import (
     DateTimeProperty,
     Document,
     DocumentSchema,
+    SchemaListProperty,
     SchemaProperty,
     StringListProperty,
 )
@@ -31,7 +32,8 @@ from corehq.apps.cachehq.mixins import (
     CachedCouchDocumentMixin,
     QuickCachedDocumentMixin,
 )
-from corehq.apps.userreports.const import UCR_SQL_BACKEND, VALID_REFERENCED_DOC_TYPES
+from corehq.apps.userreports.const import UCR_SQL_BACKEND, VALID_REFERENCED_DOC_TYPES, \
+    PREFETCHABLE_EXPRESSION_TYPES
 from corehq.apps.userreports.dbaccessors import get_number_of_report_configs_by_data_source, \
     get_report_configs_for_domain, get_datasources_for_domain
 from corehq.apps.userreports.exceptions import (
@@ -66,6 +68,18 @@ class ElasticSearchIndexSettings(DocumentSchema):
     number_of_shards = IntegerProperty(default=2)
 
 
+class DataSourceShardBuildInformation(DocumentSchema):
+    """
+    Build progress of one shard of a table that is rebuilt in parallel.
+    """
+    shard = IntegerProperty()
+    initiated = DateTimeProperty()
+    finished = BooleanProperty(default=False)
+    # the range of the document store's docs that the shard builds,
+    # if the store can split its docs into ranges
+    id_range = DictProperty()
+
+
 class DataSourceBuildInformation(DocumentSchema):
     """
     A class to encapsulate meta information about the process through which
@@ -84,6 +98,8 @@ class DataSourceBuildInformation(DocumentSchema):
     # same as previous attributes but used for rebuilding tables in place
     finished_in_place = BooleanProperty(default=False)
     initiated_in_place = DateTimeProperty()
+    # progress of each shard if the table is being rebuilt in parallel
+    shards = SchemaListProperty(DataSourceShardBuildInformation)
 
 
 class DataSourceMeta(DocumentSchema):
@@ -260,6 +276,15 @@ class DataSourceConfiguration(UnicodeMixIn, CachedCouchDocumentMixin, Document):
             return ExpressionFactory.from_spec(self.base_item_expression, context=self.get_factory_context())
         return None
 
+    @property
+    @memoized
+    def has_prefetchable_lookups(self):
+        """
+        Whether any of the expressions look up documents that can be fetched
+        in bulk for a batch of documents (see ``BatchLookupCache``)
+        """
+        return _has_expression_type(self.to_json(), PREFETCHABLE_EXPRESSION_TYPES)
+
     def get_columns(self):
         return self.indicators.get_columns()
 
@@ -783,6 +808,16 @@ class AsyncIndicator(models.Model):
         return indicator
 
 
+def _has_expression_type(spec, expression_types):
+    if isinstance(spec, dict):
+        return spec.get('type') in expression_types or any(
+            _has_expression_type(value, expression_types) for value in spec.values()
+        )
+    elif isinstance(spec, list):
+        return any(_has_expression_type(value, expression_types) for value in spec)
+    return False
+
+
 def get_datasource_config(config_id, domain):
     def _raise_not_found():
         raise DataSourceConfigurationNotFoundError(_(
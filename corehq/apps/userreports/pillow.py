@@ -15,6 +15,7 @@ from corehq.apps.userreports.const import (
 from corehq.apps.userreports.data_source_providers import DynamicDataSourceProvider, StaticDataSourceProvider
 from corehq.apps.userreports.exceptions import TableRebuildError, StaleRebuildError
 from corehq.apps.userreports.models import AsyncIndicator
+from corehq.apps.userreports.routing import DataSourceRouter, RoutingValuesStore
 from corehq.apps.userreports.specs import EvaluationContext
 from corehq.apps.userreports.sql import metadata
 from corehq.apps.userreports.tasks import rebuild_indicators
@@ -31,10 +32,11 @@ from fluff.signals import (
     reformat_alembic_diffs
 )
 from pillowtop.checkpoints.manager import KafkaPillowCheckpoint
+from pillowtop.const import DEFAULT_PROCESSOR_CHUNK_TIMEOUT_MS
 from pillowtop.logger import pillow_logging
 from pillowtop.pillow.interface import ConstructedPillow
-from pillowtop.processors import PillowProcessor
-from pillowtop.utils import ensure_matched_revisions, ensure_document_exists
+from pillowtop.processors import BulkPillowProcessor
+from pillowtop.utils import ensure_matched_revisions, ensure_document_exists, ChangeError
 
 REBUILD_CHECK_INTERVAL = 60 * 60  # in seconds
 LONG_UCR_LOGGING_THRESHOLD = 0.5
@@ -140,6 +142,11 @@ class ConfigurableReportTableManagerMixin(object):
                 get_indicator_adapter(config, can_handle_laboratory=True)
             )
 
+        self.routers_by_domain = {
+            domain: DataSourceRouter(adapters)
+            for domain, adapters in self.table_adapters_by_domain.items()
+        }
+
         self.rebuild_tables_if_necessary()
         self.bootstrapped = True
         self.last_bootstrapped = datetime.utcnow()
@@ -207,10 +214,15 @@ class ConfigurableReportTableManagerMixin(object):
             rebuild_indicators.delay(adapter.config.get_id)
 
 
-class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, PillowProcessor):
+class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, BulkPillowProcessor):
 
     domain_timing_context = Counter()
 
+    def __init__(self, *args, **kwargs):
+        super(ConfigurableReportPillowProcessor, self).__init__(*args, **kwargs)
+        # pillow id -> RoutingValuesStore
+        self._routing_values_stores = {}
+
     @time_ucr_process_change
     def _save_doc_to_table(self, table, doc, eval_context):
         # best effort will swallow errors in the table
@@ -229,7 +241,6 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Pil
             # if no domain we won't save to any UCR table
             return
 
-        async_tables = []
         doc = change.get_document()
         ensure_document_exists(change)
         ensure_matched_revisions(change)
@@ -237,26 +248,156 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Pil
         if doc is None:
             return
 
+        routing_states, routing_values_to_record = self._get_routing_states(pillow_instance, domain, [doc])
         with TimingContext() as timer:
             eval_context = EvaluationContext(doc)
-            for table in self.table_adapters_by_domain[domain]:
-                if table.config.filter(doc):
-                    if table.run_asynchronous:
-                        async_tables.append(table.config._id)
-                    else:
-                        self._save_doc_to_table(table, doc, eval_context)
-                        eval_context.reset_iteration()
-                elif table.config.deleted_filter(doc) or table.doc_exists(doc):
-                    table.delete(doc)
+            tables, async_tables = self._get_tables_to_save(domain, doc, *routing_states[doc['_id']])
+            for table in tables:
+                self._save_doc_to_table(table, doc, eval_context)
+                eval_context.reset_iteration()
 
             if async_tables:
                 AsyncIndicator.update_indicators(change, async_tables)
 
+        self._get_routing_values_store(pillow_instance).record_values(routing_values_to_record)
         self.domain_timing_context.update(**{
             domain: timer.duration
         })
 
+    def process_changes_chunk(self, pillow_instance, changes_chunk):
+        self.bootstrap_if_needed()
+        change_errors = []
+        changes_by_domain = defaultdict(list)
+        for change in changes_chunk:
+            domain = change.metadata.domain
+            if change.deleted or not domain or domain not in self.table_adapters_by_domain:
+                continue
+
+            try:
+                ensure_document_exists(change)
+                ensure_matched_revisions(change)
+            except Exception as e:
+                change_errors.append(ChangeError(change, e))
+                continue
+
+            if change.get_document() is not None:
+                changes_by_domain[domain].append(change)
+
+        for domain, changes in changes_by_domain.items():
+            routing_states, routing_values_to_record = self._get_routing_states(
+                pillow_instance, domain, [change.get_document() for change in changes]
+            )
+            with TimingContext() as timer:
+                docs_by_table = defaultdict(list)
+                eval_contexts = {}
+                for change in changes:
+                    doc = change.get_document()
+                    eval_contexts[doc['_id']] = EvaluationContext(doc)
+                    tables, async_tables = self._get_tables_to_save(domain, doc, *routing_states[doc['_id']])
+                    for table in tables:
+                        docs_by_table[table].append(doc)
+                    if async_tables:
+                        AsyncIndicator.update_indicators(change, async_tables)
+
+                for table, docs in docs_by_table.items():
+                    # best effort will swallow errors in the table
+                    table.best_effort_bulk_save(docs, eval_contexts)
+
+            self._get_routing_values_store(pillow_instance).record_values(routing_values_to_record)
+            self.domain_timing_context.update(**{
+                domain: timer.duration
+            })
+
+        return change_errors
+
+    def _get_routing_values_store(self, pillow_instance):
+        pillow_id = pillow_instance.pillow_id
+        if pillow_id not in self._routing_values_stores:
+            self._routing_values_stores[pillow_id] = RoutingValuesStore(pillow_id)
+        return self._routing_values_stores[pillow_id]
+
+    def _get_routing_states(self, pillow_instance, domain, docs):
+        """
+        Compares the docs' mutable routing values (e.g. case type) with the ones the
+        pillow last processed them with
+
+        :return: tuple of (dict of doc id to (whether the doc may already be in tables,
+                                              whether its routing values changed),
+                           dict of doc id to the routing values to record once the docs are processed)
+        """
+        router = self.routers_by_domain[domain]
+        routing_values_by_doc_id = {}
+        for doc in docs:
+            routing_values = router.get_mutable_routing_values(doc)
+            if routing_values is not None:
+                routing_values_by_doc_id[doc['_id']] = routing_values
+
+        recorded_values = {}
+        if routing_values_by_doc_id:
+            store = self._get_routing_values_store(pillow_instance)
+            recorded_values = store.get_recorded_values(list(routing_values_by_doc_id))
+
+        routing_states = {}
+        routing_values_to_record = {}
+        for doc in docs:
+            doc_id = doc['_id']
+            if doc_id not in routing_values_by_doc_id:
+                # no data source routes docs of its type on mutable values, so none are recorded
+                routing_states[doc_id] = (True, False)
+            elif doc_id not in recorded_values:
+                routing_values_to_record[doc_id] = routing_values_by_doc_id[doc_id]
+                if _is_new_doc(doc):
+                    routing_states[doc_id] = (False, False)
+                else:
+                    # processed before its values were recorded, or so long ago that they've expired
+                    routing_states[doc_id] = (True, True)
+            else:
+                changed = recorded_values[doc_id] != routing_values_by_doc_id[doc_id]
+                routing_states[doc_id] = (True, changed)
+                if changed:
+                    routing_values_to_record[doc_id] = routing_values_by_doc_id[doc_id]
+        return routing_states, routing_values_to_record
+
+    def _get_tables_to_save(self, domain, doc, may_exist=True, routing_values_changed=True):
+        """
+        Deletes the doc from any tables it no longer belongs in
+
+        :param may_exist: whether the doc may already be in tables, False if the pillow
+                          hasn't processed it before
+        :param routing_values_changed: whether the doc's mutable routing values changed,
+                                       in which case it's deleted from the tables it
+                                       could only have matched before
+        :return: tuple of (list of tables the doc should be saved to,
+                           list of IDs of the data sources that should be processed asynchronously)
+        """
+        tables = []
+        async_tables = []
+        router = self.routers_by_domain[domain]
+        for table in router.get_adapters(doc):
+            if table.config.filter(doc):
+                if table.run_asynchronous:
+                    async_tables.append(table.config._id)
+                else:
+                    tables.append(table)
+            elif may_exist and table.doc_exists(doc):
+                # the doc may have matched the data source before this change
+                table.delete(doc)
+
+        if may_exist and routing_values_changed:
+            for table in router.get_previously_matching_adapters(doc):
+                if table.doc_exists(doc):
+                    table.delete(doc)
+
+        for table in router.get_deleted_adapters(doc):
+            if table.config.deleted_filter(doc):
+                table.delete(doc)
+
+        return tables, async_tables
+
     def checkpoint_updated(self):
+        for store in self._routing_values_stores.values():
+            store.flush()
+
         total_duration = sum(self.domain_timing_context.values())
         duration_seen = 0
         top_half_domains = {}
@@ -273,6 +414,14 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Pil
         self.domain_timing_context.clear()
 
 
+def _is_new_doc(doc):
+    """
+    Whether the doc was created by the change being processed, so that it can't
+    be in any table yet: only one form has touched the case.
+    """
+    return len(doc.get('xform_ids') or []) <= 1
+
+
 class ConfigurableReportKafkaPillow(ConstructedPillow):
     # the only reason this is a class is to avoid exposing processors
     # for tests to be able to call bootstrap on it.
@@ -283,9 +432,10 @@ class ConfigurableReportKafkaPillow(ConstructedPillow):
     # doc save errors and data source config errors
     retry_errors = False
 
-    def __init__(self, processor, pillow_name, topics, num_processes, process_num):
+    def __init__(self, processor, pillow_name, topics, num_processes, process_num, processor_chunk_size=0):
         change_feed = KafkaChangeFeed(
-            topics, group_id=pillow_name, num_processes=num_processes, process_num=process_num
+            topics, group_id=pillow_name, num_processes=num_processes, process_num=process_num,
+            idle_timeout_ms=DEFAULT_PROCESSOR_CHUNK_TIMEOUT_MS if processor_chunk_size else None,
         )
         checkpoint = KafkaPillowCheckpoint(pillow_name, topics)
         event_handler = KafkaCheckpointEventHandler(
@@ -297,7 +447,8 @@ class ConfigurableReportKafkaPillow(ConstructedPillow):
             change_feed=change_feed,
             processor=processor,
             checkpoint=checkpoint,
-            change_processed_event_handler=event_handler
+            change_processed_event_handler=event_handler,
+            processor_chunk_size=processor_chunk_size,
         )
         # set by the superclass constructor
         assert self.processors is not None
@@ -314,7 +465,7 @@ class ConfigurableReportKafkaPillow(ConstructedPillow):
 
 def get_kafka_ucr_pillow(pillow_id='kafka-ucr-main', ucr_division=None,
                          include_ucrs=None, exclude_ucrs=None, topics=None,
-                         num_processes=1, process_num=0, **kwargs):
+                         num_processes=1, process_num=0, processor_chunk_size=0, **kwargs):
     topics = topics or KAFKA_TOPICS
     topics = [kafka_bytestring(t) for t in topics]
     return ConfigurableReportKafkaPillow(
@@ -329,12 +480,13 @@ def get_kafka_ucr_pillow(pillow_id='kafka-ucr-main', ucr_division=None,
         topics=topics,
         num_processes=num_processes,
         process_num=process_num,
+        processor_chunk_size=processor_chunk_size,
     )
 
 
 def get_kafka_ucr_static_pillow(pillow_id='kafka-ucr-static', ucr_division=None,
                                 include_ucrs=None, exclude_ucrs=None, topics=None,
-                                num_processes=1, process_num=0, **kwargs):
+                                num_processes=1, process_num=0, processor_chunk_size=0, **kwargs):
     topics = topics or KAFKA_TOPICS
     topics = [kafka_bytestring(t) for t in topics]
     return ConfigurableReportKafkaPillow(
@@ -349,4 +501,5 @@ def get_kafka_ucr_static_pillow(pillow_id='kafka-ucr-static', ucr_division=None,
         topics=topics,
         num_processes=num_processes,
         process_num=process_num,
+        processor_chunk_size=processor_chunk_size,
     )
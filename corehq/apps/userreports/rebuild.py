@@ -1,22 +1,41 @@
 from __future__ import absolute_import
+import hashlib
+import json
+
+import six
+
 from corehq.apps.userreports.models import id_is_static
 from dimagi.utils.couch import get_redis_client
 
 
-def get_redis_key_for_config(config):
+def get_redis_key_for_config(config, shard=None):
     if id_is_static(config._id):
         rev = 'static'
     else:
         rev = config._rev
-    return 'ucr_queue-{}:{}'.format(config._id, rev)
+    key = 'ucr_queue-{}:{}'.format(config._id, rev)
+    if shard is not None:
+        key = '{}:shard-{}'.format(key, shard)
+    return key
+
+
+def get_doc_id_shard(doc_id, num_shards):
+    """
+    Split the doc ID space into ``num_shards`` equally sized ranges of hashed doc IDs
+    and return the range that the doc ID falls in.
+    """
+    if isinstance(doc_id, six.text_type):
+        doc_id = doc_id.encode('utf-8')
+    hashed_id = int(hashlib.md5(doc_id).hexdigest()[:8], 16)
+    return hashed_id * num_shards // 0x100000000
 
 
 class DataSourceResumeHelper(object):
 
-    def __init__(self, config):
+    def __init__(self, config, shard=None):
         self.config = config
         self._client = get_redis_client().client.get_client()
-        self._key = get_redis_key_for_config(config)
+        self._key = get_redis_key_for_config(config, shard)
 
     def get_ids_to_resume_from(self):
         return self._client.lrange(self._key, 0, -1)
@@ -35,3 +54,50 @@ class DataSourceResumeHelper(object):
 
     def has_resume_info(self):
         return self._client.exists(self._key)
+
+
+class StaticShardedBuildHelper(object):
+    """
+    Keeps track of the shards of a sharded rebuild that haven't finished yet for
+    static data sources, which can't store their build information in their config.
+    """
+
+    def __init__(self, config):
+        self._client = get_redis_client().client.get_client()
+        key = get_redis_key_for_config(config)
+        self._shards_key = '{}:unfinished-shards'.format(key)
+        self._num_shards_key = '{}:num-shards'.format(key)
+        self._id_ranges_key = '{}:id-ranges'.format(key)
+
+    def start_build(self, num_shards, id_ranges=None):
+        pipe = self._client.pipeline()
+        pipe.delete(self._shards_key, self._id_ranges_key)
+        pipe.sadd(self._shards_key, *range(num_shards))
+        pipe.set(self._num_shards_key, num_shards)
+        if id_ranges:
+            pipe.set(self._id_ranges_key, json.dumps(id_ranges))
+        pipe.execute()
+
+    def clear_build(self):
+        self._client.delete(self._shards_key, self._num_shards_key, self._id_ranges_key)
+
+    def get_id_range(self, shard):
+        id_ranges = self._client.get(self._id_ranges_key)
+        return json.loads(id_ranges)[shard] if id_ranges else None
+
+    def get_num_shards(self):
+        num_shards = self._client.get(self._num_shards_key)
+        return int(num_shards) if num_shards is not None else None
+
+    def get_unfinished_shards(self):
+        return sorted(int(shard) for shard in self._client.smembers(self._shards_key))
+
+    def finish_shard(self, shard):
+        """
+        :return: True if this was the last shard of the build to finish
+        """
+        pipe = self._client.pipeline()
+        pipe.srem(self._shards_key, shard)
+        pipe.scard(self._shards_key)
+        removed, remaining = pipe.execute()
+        return bool(removed) and remaining == 0
@@ -0,0 +1,230 @@
+from __future__ import absolute_import
+from collections import defaultdict
+
+import six
+from django.core.cache import cache
+
+from corehq.pillows.utils import get_deleted_doc_types
+
+# document properties that data source filters are commonly keyed on
+# (case type for cases and xmlns for forms)
+ROUTING_PROPERTIES = ('type', 'xmlns')
+
+# routing properties that can change over the life of a document
+# (a case's type can be updated but a form's xmlns can't)
+MUTABLE_ROUTING_PROPERTIES = ('type',)
+
+# how long the mutable routing values a pillow last processed a document with are kept
+ROUTING_VALUES_CACHE_TIMEOUT = 30 * 24 * 60 * 60
+
+# number of documents whose routing values are buffered before they're written to the cache
+ROUTING_VALUES_BATCH_SIZE = 100
+
+
+class DataSourceRouter(object):
+    """
+    An index of table adapters by the documents their data source filters could
+    possibly match.
+
+    Every data source filter requires a specific ``doc_type`` and most also require a
+    specific case type or form xmlns. Looking adapters up by those properties means
+    that a document only has to be evaluated against the handful of data sources that
+    could match it, instead of every data source in the domain.
+    """
+
+    def __init__(self, adapters):
+        self._adapter_order = {}
+        self._adapters_by_doc_type = defaultdict(list)
+        self._adapters_by_property = defaultdict(list)
+        self._mutable_adapters_by_doc_type = defaultdict(list)
+        self._deleted_adapters_by_doc_type = defaultdict(list)
+        for adapter in adapters:
+            self.add_adapter(adapter)
+
+    def add_adapter(self, adapter):
+        config = adapter.config
+        self._adapter_order[id(adapter)] = len(self._adapter_order)
+
+        routing_values = get_filter_routing_values(config.configured_filter, config.named_filters)
+        if routing_values is None:
+            self._adapters_by_doc_type[config.referenced_doc_type].append(adapter)
+        else:
+            property_name, values = routing_values
+            for value in values:
+                key = (config.referenced_doc_type, property_name, value)
+                self._adapters_by_property[key].append(adapter)
+            if property_name in MUTABLE_ROUTING_PROPERTIES:
+                self._mutable_adapters_by_doc_type[config.referenced_doc_type].append(adapter)
+
+        for doc_type in get_deleted_doc_types(config.referenced_doc_type):
+            self._deleted_adapters_by_doc_type[doc_type].append(adapter)
+
+    def get_adapters(self, doc):
+        """
+        :return: the adapters whose main filter could match the document
+        """
+        doc_type = doc.get('doc_type')
+        adapters = list(self._adapters_by_doc_type.get(doc_type, []))
+        for property_name in ROUTING_PROPERTIES:
+            value = doc.get(property_name)
+            if isinstance(value, six.string_types):
+                adapters.extend(self._adapters_by_property.get((doc_type, property_name, value), []))
+        return self._ordered(adapters)
+
+    def get_mutable_routing_values(self, doc):
+        """
+        :return: the values of the document's mutable routing properties (e.g. its case
+                 type), or None if no data source routes documents of its type on them
+        """
+        if not self._mutable_adapters_by_doc_type.get(doc.get('doc_type')):
+            return None
+        return tuple(doc.get(property_name) for property_name in MUTABLE_ROUTING_PROPERTIES)
+
+    def get_previously_matching_adapters(self, doc):
+        """
+        :return: the adapters that the document can't match now but could have matched
+                 before one of its mutable routing properties changed (e.g. its case type).
+                 Only worth checking when the values recorded by ``RoutingValuesStore`` say they did.
+        """
+        current_adapters = {id(adapter) for adapter in self.get_adapters(doc)}
+        return [
+            adapter for adapter in self._mutable_adapters_by_doc_type.get(doc.get('doc_type'), [])
+            if id(adapter) not in current_adapters
+        ]
+
+    def get_deleted_adapters(self, doc):
+        """
+        :return: the adapters whose deleted filter could match the document
+        """
+        return list(self._deleted_adapters_by_doc_type.get(doc.get('doc_type'), []))
+
+    def _ordered(self, adapters):
+        # keep the order the adapters were added in, and remove any duplicates
+        unique_adapters = {id(adapter): adapter for adapter in adapters}
+        return sorted(unique_adapters.values(), key=lambda adapter: self._adapter_order[id(adapter)])
+
+
+class RoutingValuesStore(object):
+    """
+    The mutable routing values a pillow last processed each document with.
+
+    The values are read from the cache with one request per batch of documents.
+    Recorded values are buffered and written with one request per batch as well,
+    when enough of them have been recorded or the pillow's checkpoint is updated
+    (see ``flush``). Buffered values are read from memory.
+    """
+
+    def __init__(self, pillow_id):
+        self.pillow_id = pillow_id
+        self._unsaved_values = {}
+
+    def get_recorded_values(self, doc_ids):
+        """
+        :return: dict of doc id to the routing values recorded for the document,
+                 leaving out the documents the pillow hasn't recorded values for
+        """
+        recorded_values = {
+            doc_id: self._unsaved_values[doc_id]
+            for doc_id in doc_ids if doc_id in self._unsaved_values
+        }
+        cache_keys = {
+            doc_id: _get_routing_values_cache_key(self.pillow_id, doc_id)
+            for doc_id in doc_ids if doc_id not in recorded_values
+        }
+        if cache_keys:
+            cached_values = cache.get_many(list(cache_keys.values()))
+            for doc_id, cache_key in cache_keys.items():
+                if cache_key in cached_values:
+                    recorded_values[doc_id] = cached_values[cache_key]
+        return recorded_values
+
+    def record_values(self, routing_values_by_doc_id):
+        self._unsaved_values.update(routing_values_by_doc_id)
+        if len(self._unsaved_values) >= ROUTING_VALUES_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self._unsaved_values:
+            cache.set_many({
+                _get_routing_values_cache_key(self.pillow_id, doc_id): routing_values
+                for doc_id, routing_values in self._unsaved_values.items()
+            }, timeout=ROUTING_VALUES_CACHE_TIMEOUT)
+            self._unsaved_values = {}
+
+
+def _get_routing_values_cache_key(pillow_id, doc_id):
+    return u'ucr-routing-values/{}/{}'.format(pillow_id, doc_id)
+
+
+def get_filter_routing_values(filter_spec, named_filters=None):
+    """
+    Work out which values of a routing property (e.g. ``type`` or ``xmlns``) a document
+    must have in order to match the filter spec.
+
+    :return: ``(property_name, set_of_values)`` or ``None`` if the filter doesn't
+             require the document to have specific values for any routing property
+    """
+    if not filter_spec:
+        return None
+
+    named_filters = named_filters or {}
+    filter_type = filter_spec.get('type')
+    if filter_type == 'property_match':
+        property_name = _get_property_match_property_name(filter_spec)
+        value = filter_spec.get('property_value')
+        if property_name in ROUTING_PROPERTIES and isinstance(value, six.string_types):
+            return property_name, {value}
+    elif filter_type == 'boolean_expression':
+        property_name = _get_expression_property_name(filter_spec.get('expression'))
+        operator = filter_spec.get('operator')
+        value = filter_spec.get('property_value')
+        if property_name in ROUTING_PROPERTIES:
+            if operator == 'eq' and isinstance(value, six.string_types):
+                return property_name, {value}
+            elif (operator == 'in' and isinstance(value, list)
+                    and all(isinstance(v, six.string_types) for v in value)):
+                return property_name, set(value)
+    elif filter_type == 'and':
+        # every sub filter has to match, so any constrained one will do
+        for sub_spec in filter_spec.get('filters') or []:
+            routing_values = get_filter_routing_values(sub_spec, named_filters)
+            if routing_values is not None:
+                return routing_values
+    elif filter_type == 'or':
+        # only routable if every sub filter is constrained on the same property
+        sub_values = [
+            get_filter_routing_values(sub_spec, named_filters)
+            for sub_spec in filter_spec.get('filters') or []
+        ]
+        if sub_values and all(value is not None for value in sub_values):
+            property_names = {property_name for property_name, values in sub_values}
+            if len(property_names) == 1:
+                return property_names.pop(), set.union(*[values for property_name, values in sub_values])
+    elif filter_type == 'named':
+        name = filter_spec.get('name')
+        if name in named_filters:
+            return get_filter_routing_values(named_filters[name], named_filters)
+    return None
+
+
+def _get_property_match_property_name(filter_spec):
+    property_path = filter_spec.get('property_path')
+    if filter_spec.get('property_name'):
+        return filter_spec['property_name']
+    elif property_path and len(property_path) == 1:
+        return property_path[0]
+    return None
+
+
+def _get_expression_property_name(expression):
+    if (isinstance(expression, dict)
+            and expression.get('type') == 'property_name'
+            and not expression.get('datatype')
+            and isinstance(expression.get('property_name'), six.string_types)):
+        return expression['property_name']
+    elif (isinstance(expression, dict)
+            and expression.get('type') == 'property_path'
+            and not expression.get('datatype')
+            and len(expression.get('property_path') or []) == 1):
+        return expression['property_path'][0]
+    return None
@@ -24,14 +24,21 @@ class EvaluationContext(object):
     """
     An evaluation context. Necessary for repeats to pass both the row of the repeat as well
     as the root document and the iteration number.
+
+    :param batch_cache: optional ``BatchLookupCache`` shared by the contexts of a batch of documents
     """
 
-    def __init__(self, root_doc, iteration=0):
+    def __init__(self, root_doc, iteration=0, batch_cache=None):
         self.root_doc = root_doc
         self.iteration = iteration
         self.inserted_timestamp = datetime.utcnow()
         self.cache = {}
         self.iteration_cache = {}
+        self.batch_cache = batch_cache
+
+    @property
+    def collecting_lookups(self):
+        return self.batch_cache is not None and self.batch_cache.collecting
 
     def exists_in_cache(self, key):
         return key in self.cache or key in self.iteration_cache
@@ -10,12 +10,16 @@ from corehq.apps.userreports.sql.connection import get_engine_id
 from corehq.apps.userreports.util import get_table_name
 from corehq.sql_db.connections import connection_manager
 from corehq.util.test_utils import unit_testing_only
+from dimagi.utils.chunked import chunked
 from dimagi.utils.decorators.memoized import memoized
 from dimagi.utils.logging import notify_exception
 
 
 metadata = sqlalchemy.MetaData()
 
+# max number of rows in a single multi-row insert statement
+BULK_INSERT_CHUNK_SIZE = 1000
+
 
 class IndicatorSqlAdapter(IndicatorAdapter):
 
@@ -37,6 +41,7 @@ class IndicatorSqlAdapter(IndicatorAdapter):
             raise TableRebuildError('problem rebuilding UCR table {}: {}'.format(self.config, e))
         finally:
             self.session_helper.Session.commit()
+        self.rows_changed()
 
     def build_table(self):
         self.session_helper.Session.remove()
@@ -66,6 +71,7 @@ class IndicatorSqlAdapter(IndicatorAdapter):
         with self.engine.begin() as connection:
             delete = table.delete()
             connection.execute(delete)
+        self.rows_changed()
 
     def get_query_object(self):
         """
@@ -117,11 +123,33 @@ class IndicatorSqlAdapter(IndicatorAdapter):
                 insert = table.insert().values(**all_values)
                 connection.execute(insert)
 
+    def _bulk_save_rows(self, doc_rows):
+        doc_rows = [(doc, rows) for doc, rows in doc_rows if rows]
+        if not doc_rows:
+            return
+
+        table = self.get_table()
+        doc_ids = [doc['_id'] for doc, rows in doc_rows]
+        all_values = [
+            {i.column.database_column_name: i.value for i in row}
+            for doc, rows in doc_rows
+            for row in rows
+        ]
+        with self.engine.begin() as connection:
+            # delete all existing rows for these docs to ensure we aren't left with stale data
+            delete = table.delete(table.c.doc_id.in_(doc_ids))
+            connection.execute(delete)
+            for values_chunk in chunked(all_values, BULK_INSERT_CHUNK_SIZE):
+                insert = table.insert().values(list(values_chunk))
+                connection.execute(insert)
+
     def delete(self, doc):
         table = self.get_table()
         with self.engine.begin() as connection:
             delete = table.delete(table.c.doc_id == doc['_id'])
-            connection.execute(delete)
+            result = connection.execute(delete)
+        if result.rowcount:
+            self.rows_changed()
 
     def doc_exists(self, doc):
         with self.session_helper.session_context() as session:
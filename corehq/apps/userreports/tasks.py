@@ -16,14 +16,20 @@ from restkit import RequestError
 from corehq import toggles
 from corehq.apps.userreports.const import (
     UCR_ES_BACKEND, UCR_SQL_BACKEND, UCR_CELERY_QUEUE, UCR_INDICATOR_CELERY_QUEUE,
-    ASYNC_INDICATOR_QUEUE_TIME, ASYNC_INDICATOR_CHUNK_SIZE
+    ASYNC_INDICATOR_QUEUE_TIME, ASYNC_INDICATOR_CHUNK_SIZE, UCR_BULK_SAVE_CHUNK_SIZE,
+    UCR_REBUILD_SHARDS,
 )
 from corehq.apps.userreports.document_stores import get_document_store
-from corehq.apps.userreports.rebuild import DataSourceResumeHelper
+from corehq.apps.userreports.rebuild import (
+    DataSourceResumeHelper,
+    StaticShardedBuildHelper,
+    get_doc_id_shard,
+)
 from corehq.apps.userreports.specs import EvaluationContext
 from corehq.apps.userreports.models import (
     AsyncIndicator,
     DataSourceConfiguration,
+    DataSourceShardBuildInformation,
     StaticDataSourceConfiguration,
     id_is_static,
     get_report_config,
@@ -34,6 +40,7 @@ from corehq.elastic import ESError
 from corehq.util.context_managers import notify_someone
 from corehq.util.datadog.gauges import datadog_gauge
 from corehq.util.quickcache import quickcache
+from dimagi.utils.chunked import chunked
 from dimagi.utils.couch import CriticalSection
 from dimagi.utils.couch.pagination import DatatablesParams
 from pillowtop.dao.couch import ID_CHUNK_SIZE
@@ -50,11 +57,12 @@ def _build_indicators(config, document_store, relevant_ids, resume_helper):
     adapter = get_indicator_adapter(config, raise_errors=True, can_handle_laboratory=True)
 
     last_id = None
-    for doc in document_store.iter_documents(relevant_ids):
+    for docs in chunked(document_store.iter_documents(relevant_ids), UCR_BULK_SAVE_CHUNK_SIZE):
         # save is a noop if the filter doesn't match
-        adapter.best_effort_save(doc)
-        last_id = doc.get('_id')
-        resume_helper.remove_id(last_id)
+        adapter.best_effort_bulk_save(docs)
+        for doc in docs:
+            last_id = doc.get('_id')
+            resume_helper.remove_id(last_id)
 
     if last_id:
         resume_helper.add_id(last_id)
@@ -73,7 +81,10 @@ def rebuild_indicators(indicator_config_id, initiated_by=None):
             # able to see if the rebuild started a long time ago without finishing.
             config.meta.build.initiated = datetime.utcnow()
             config.meta.build.finished = False
+            config.meta.build.shards = []
             config.save()
+        else:
+            StaticShardedBuildHelper(config).clear_build()
 
         adapter.rebuild_table()
         iteratively_build_table(config)
@@ -113,13 +124,154 @@ def resume_building_indicators(indicator_config_id, initiated_by=None):
             iteratively_build_table(config, last_id, resume_helper)
 
 
-def iteratively_build_table(config, last_id=None, resume_helper=None, in_place=False):
-    resume_helper = resume_helper or DataSourceResumeHelper(config)
-    indicator_config_id = config._id
+@task(queue=UCR_CELERY_QUEUE, ignore_result=True)
+def rebuild_indicators_in_shards(indicator_config_id, num_shards=UCR_REBUILD_SHARDS, initiated_by=None):
+    """
+    Rebuild the table in parallel. The docs are split into ``num_shards`` ranges of the
+    document store's keys, or by the hash of their IDs if the store can't split them,
+    and each range is built by its own ``build_indicators_for_shard`` task.
+    """
+    config = _get_config_by_id(indicator_config_id)
+    adapter = get_indicator_adapter(config, can_handle_laboratory=True)
+    document_store = get_document_store(config.domain, config.referenced_doc_type)
+    id_ranges = document_store.get_id_ranges(num_shards)
+    if not id_is_static(indicator_config_id):
+        initiated = datetime.utcnow()
+        config.meta.build.initiated = initiated
+        config.meta.build.finished = False
+        config.meta.build.shards = [
+            DataSourceShardBuildInformation(
+                shard=shard,
+                initiated=initiated,
+                id_range=id_ranges[shard] if id_ranges else {},
+            )
+            for shard in range(num_shards)
+        ]
+        config.save()
 
-    relevant_ids = []
+    else:
+        StaticShardedBuildHelper(config).start_build(num_shards, id_ranges)
+
+    adapter.rebuild_table()
+    for shard in range(num_shards):
+        resume_helper = DataSourceResumeHelper(config, shard=shard)
+        resume_helper.clear_ids()
+        build_indicators_for_shard.delay(indicator_config_id, shard, num_shards, initiated_by)
+
+
+def get_unfinished_shards(config):
+    """
+    :return: tuple of (the number of shards of the config's last sharded rebuild,
+                       the shards of it that haven't finished)
+             or (None, []) if its last rebuild wasn't sharded
+    """
+    if id_is_static(config._id):
+        # static data sources don't store their build info in their config
+        helper = StaticShardedBuildHelper(config)
+        num_shards = helper.get_num_shards()
+        return num_shards, helper.get_unfinished_shards() if num_shards else []
+    elif config.meta.build.shards:
+        shards = config.meta.build.shards
+        return len(shards), [shard.shard for shard in shards if not shard.finished]
+    return None, []
+
+
+@task(queue=UCR_CELERY_QUEUE, ignore_result=True)
+def resume_building_indicators_in_shards(indicator_config_id, initiated_by=None):
+    """
+    Restart the shards of a sharded rebuild that haven't finished
+    """
+    config = _get_config_by_id(indicator_config_id)
+    num_shards, shards = get_unfinished_shards(config)
+    for shard in shards:
+        build_indicators_for_shard.delay(indicator_config_id, shard, num_shards, initiated_by)
+
+
+@task(queue=UCR_CELERY_QUEUE, ignore_result=True, acks_late=True)
+def build_indicators_for_shard(indicator_config_id, shard, num_shards, initiated_by=None):
+    """
+    Build the indicators for the docs in one shard of a sharded rebuild, resuming from
+    where the shard got to if it has been run before. The last shard to finish lets
+    ``initiated_by`` know that the rebuild is complete.
+    """
+    config = _get_config_by_id(indicator_config_id)
+    success = _('Your UCR table {} has finished rebuilding').format(config.table_id)
+    failure = _('There was an error rebuilding Your UCR table {}.').format(config.table_id)
+    send = toggles.SEND_UCR_REBUILD_INFO.enabled(initiated_by)
+    with notify_someone(initiated_by, success_message=None, error_message=failure, send=send):
+        last_shard = _build_shard(config, shard, num_shards)
+
+    if last_shard:
+        with notify_someone(initiated_by, success_message=success, error_message=failure, send=send):
+            adapter = get_indicator_adapter(config, raise_errors=True, can_handle_laboratory=True)
+            adapter.after_table_build()
+
+
+def _build_shard(config, shard, num_shards):
+    """
+    :return: True if this was the last shard of the build to finish
+    """
+    resume_helper = DataSourceResumeHelper(config, shard=shard)
     document_store = get_document_store(config.domain, config.referenced_doc_type)
-    for relevant_id in document_store.iter_document_ids(last_id):
+
+    last_id = None
+    relevant_ids = resume_helper.get_ids_to_resume_from()
+    if relevant_ids:
+        _build_indicators(config, document_store, relevant_ids, resume_helper)
+        last_id = relevant_ids[-1]
+
+    id_range = _get_shard_id_range(config, shard)
+    if id_range:
+        shard_ids = document_store.iter_document_ids_in_range(id_range, last_id)
+    else:
+        shard_ids = (
+            doc_id for doc_id in document_store.iter_document_ids(last_id)
+            if get_doc_id_shard(doc_id, num_shards) == shard
+        )
+    _iteratively_build_indicators(config, document_store, shard_ids, resume_helper)
+
+    resume_helper.clear_ids()
+    if id_is_static(config._id):
+        return StaticShardedBuildHelper(config).finish_shard(shard)
+    return _mark_shard_finished(config, shard)
+
+
+def _get_shard_id_range(config, shard):
+    if id_is_static(config._id):
+        return StaticShardedBuildHelper(config).get_id_range(shard)
+    for shard_info in config.meta.build.shards:
+        if shard_info.shard == shard:
+            return shard_info.id_range
+    return None
+
+
+def _mark_shard_finished(config, shard):
+    """
+    :return: True if this was the last shard of the build to finish
+    """
+    initiated = config.meta.build.initiated
+    while True:
+        current_config = DataSourceConfiguration.get(config._id)
+        if current_config.meta.build.initiated != initiated:
+            # a new build has started since this one
+            return False
+
+        for shard_info in current_config.meta.build.shards:
+            if shard_info.shard == shard:
+                shard_info.finished = True
+        all_finished = all(shard_info.finished for shard_info in current_config.meta.build.shards)
+        current_config.meta.build.finished = all_finished
+        try:
+            current_config.save()
+        except ResourceConflict:
+            # another shard finished at the same time
+            continue
+        return all_finished
+
+
+def _iteratively_build_indicators(config, document_store, doc_ids, resume_helper):
+    relevant_ids = []
+    for relevant_id in doc_ids:
         relevant_ids.append(relevant_id)
         if len(relevant_ids) >= ID_CHUNK_SIZE:
             resume_helper.set_ids_to_resume_from(relevant_ids)
@@ -130,6 +282,16 @@ def iteratively_build_table(config, last_id=None, resume_helper=None, in_place=F
         resume_helper.set_ids_to_resume_from(relevant_ids)
         _build_indicators(config, document_store, relevant_ids, resume_helper)
 
+
+def iteratively_build_table(config, last_id=None, resume_helper=None, in_place=False):
+    resume_helper = resume_helper or DataSourceResumeHelper(config)
+    indicator_config_id = config._id
+
+    document_store = get_document_store(config.domain, config.referenced_doc_type)
+    _iteratively_build_indicators(
+        config, document_store, document_store.iter_document_ids(last_id), resume_helper
+    )
+
     if not id_is_static(indicator_config_id):
         resume_helper.clear_ids()
         if in_place:
@@ -0,0 +1,74 @@
+from django.test import SimpleTestCase
+from mock import patch
+
+from corehq.apps.userreports.expressions.batch import BatchLookupCache
+from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.specs import EvaluationContext
+from pillowtop.dao.exceptions import DocumentNotFoundError
+
+
+class FakeDocumentStore(object):
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.fetched = []
+
+    def get_document(self, doc_id):
+        self.fetched.append([doc_id])
+        try:
+            return self.docs[doc_id]
+        except KeyError:
+            raise DocumentNotFoundError(doc_id)
+
+    def iter_documents(self, ids):
+        self.fetched.append(sorted(ids))
+        for doc_id in ids:
+            if doc_id in self.docs:
+                yield self.docs[doc_id]
+
+
+class BatchLookupCacheTest(SimpleTestCase):
+    domain = 'batch-lookups'
+
+    def setUp(self):
+        self.store = FakeDocumentStore({
+            'parent1': {'_id': 'parent1', 'domain': self.domain, 'name': 'Parent 1'},
+            'parent2': {'_id': 'parent2', 'domain': self.domain, 'name': 'Parent 2'},
+        })
+        patcher = patch('corehq.apps.userreports.expressions.batch.get_document_store', return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.expression = ExpressionFactory.from_spec({
+            'type': 'related_doc',
+            'related_doc_type': 'CommCareCase',
+            'doc_id_expression': {'type': 'property_name', 'property_name': 'parent_id'},
+            'value_expression': {'type': 'property_name', 'property_name': 'name'},
+        })
+        self.docs = [
+            {'_id': 'child1', 'domain': self.domain, 'parent_id': 'parent1'},
+            {'_id': 'child2', 'domain': self.domain, 'parent_id': 'parent2'},
+            {'_id': 'child3', 'domain': self.domain, 'parent_id': 'parent1'},
+            {'_id': 'child4', 'domain': self.domain, 'parent_id': 'missing'},
+        ]
+
+    def _evaluate(self, batch_cache):
+        return [self.expression(doc, EvaluationContext(doc, batch_cache=batch_cache)) for doc in self.docs]
+
+    def test_lookups_are_fetched_in_bulk(self):
+        batch_cache = BatchLookupCache()
+        batch_cache.collecting = True
+        self.assertEqual([None, None, None, None], self._evaluate(batch_cache))
+        self.assertEqual([], self.store.fetched)
+
+        batch_cache.collecting = False
+        self.assertEqual(['Parent 1', 'Parent 2', 'Parent 1', None], self._evaluate(batch_cache))
+        self.assertEqual([['missing', 'parent1', 'parent2']], self.store.fetched)
+
+    def test_lookups_without_collecting(self):
+        self.assertEqual(['Parent 1', 'Parent 2', 'Parent 1', None], self._evaluate(BatchLookupCache()))
+        self.assertEqual([['parent1'], ['parent2'], ['missing']], self.store.fetched)
+
+    def test_least_recently_used_are_evicted(self):
+        batch_cache = BatchLookupCache(max_size=1)
+        self.assertEqual(['Parent 1', 'Parent 2', 'Parent 1', None], self._evaluate(batch_cache))
+        self.assertEqual([['parent1'], ['parent2'], ['parent1'], ['missing']], self.store.fetched)
@@ -5,6 +5,7 @@ from datetime import date, datetime
 from decimal import Decimal
 from django.test import SimpleTestCase, TestCase, override_settings
 from fakecouch import FakeCouchDb
+from mock import patch
 from simpleeval import InvalidExpression
 from casexml.apps.case.const import CASE_INDEX_EXTENSION
 from casexml.apps.case.mock import CaseStructure, CaseFactory, CaseIndex
@@ -1067,6 +1068,28 @@ class TestEvaluatorTypes(SimpleTestCase):
         self.assertEqual(type(ExpressionFactory.from_spec(spec)({})), int)
 
 
+class TestEvaluatorParsing(SimpleTestCase):
+
+    def test_statement_is_parsed_once(self):
+        expression = ExpressionFactory.from_spec({
+            "type": "evaluator",
+            "statement": "a + b",
+            "context_variables": {"a": 1, "b": 2}
+        })
+        with patch('corehq.apps.userreports.expressions.utils.ast.parse') as parse:
+            self.assertEqual(expression({}), 3)
+            self.assertEqual(expression({}), 3)
+        parse.assert_not_called()
+
+    def test_invalid_syntax(self):
+        expression = ExpressionFactory.from_spec({
+            "type": "evaluator",
+            "statement": "a +",
+            "context_variables": {"a": 1}
+        })
+        self.assertEqual(expression({}), None)
+
+
 @override_settings(TESTS_SHOULD_USE_SQL_BACKEND=False)
 class TestFormsExpressionSpec(TestCase):
 
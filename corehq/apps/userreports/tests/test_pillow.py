@@ -23,7 +23,10 @@ from corehq.apps.userreports.exceptions import StaleRebuildError
 from corehq.apps.userreports.models import DataSourceConfiguration, AsyncIndicator
 from corehq.apps.userreports.pillow import REBUILD_CHECK_INTERVAL, \
     ConfigurableReportTableManagerMixin, get_kafka_ucr_pillow, get_kafka_ucr_static_pillow
-from corehq.apps.userreports.tasks import rebuild_indicators, queue_async_indicators
+from corehq.apps.userreports.tasks import (
+    rebuild_indicators, queue_async_indicators, rebuild_indicators_in_shards,
+    resume_building_indicators_in_shards, build_indicators_for_shard, get_unfinished_shards,
+)
 from corehq.apps.userreports.tests.utils import get_sample_data_source, get_sample_doc_and_indicators, \
     doc_to_change, get_data_source_with_related_doc_type
 from corehq.apps.userreports.util import get_indicator_adapter, get_table_name
@@ -123,6 +126,54 @@ class IndicatorPillowTest(TestCase):
         rebuild_indicators(self.config._id)
         self._check_sample_doc_state(expected_indicators)
 
+    def _save_sample_docs(self, count):
+        doc_ids = []
+        for i in range(count):
+            sample_doc, _ = get_sample_doc_and_indicators(self.fake_time_now)
+            CommCareCase.get_db().save_doc(sample_doc)
+            self.addCleanup(lambda id: CommCareCase.get_db().delete_doc(id), sample_doc['_id'])
+            doc_ids.append(sample_doc['_id'])
+        return doc_ids
+
+    def test_rebuild_indicators_in_shards(self):
+        self._save_sample_docs(4)
+        rebuild_indicators_in_shards(self.config._id, num_shards=2)
+
+        self.adapter.refresh_table()
+        self.assertEqual(4, self.adapter.get_query_object().count())
+        config = DataSourceConfiguration.get(self.config._id)
+        self.assertTrue(config.meta.build.finished)
+        self.assertEqual([True, True], [shard.finished for shard in config.meta.build.shards])
+        # each shard read its own range of the docs
+        self.assertTrue(all(shard.id_range for shard in config.meta.build.shards))
+
+    def test_resume_building_indicators_in_shards(self):
+        self._save_sample_docs(4)
+
+        def build_first_shard_only(indicator_config_id, shard, num_shards, initiated_by=None):
+            # as if the task for the second shard died
+            if shard == 0:
+                build_indicators_for_shard(indicator_config_id, shard, num_shards, initiated_by)
+
+        with patch('corehq.apps.userreports.tasks.build_indicators_for_shard.delay',
+                   side_effect=build_first_shard_only):
+            rebuild_indicators_in_shards(self.config._id, num_shards=2)
+
+        self.adapter.refresh_table()
+        # the docs are split into two ranges of the same size
+        self.assertEqual(2, self.adapter.get_query_object().count())
+        config = DataSourceConfiguration.get(self.config._id)
+        self.assertFalse(config.meta.build.finished)
+        self.assertEqual((2, [1]), get_unfinished_shards(config))
+
+        resume_building_indicators_in_shards(self.config._id)
+
+        self.adapter.refresh_table()
+        self.assertEqual(4, self.adapter.get_query_object().count())
+        config = DataSourceConfiguration.get(self.config._id)
+        self.assertTrue(config.meta.build.finished)
+        self.assertEqual((2, []), get_unfinished_shards(config))
+
     def test_bad_integer_datatype(self):
         bad_ints = ['a', '', None]
         for bad_value in bad_ints:
@@ -1,7 +1,7 @@
 from __future__ import absolute_import
 import uuid
 from django.test import SimpleTestCase
-from corehq.apps.userreports.rebuild import DataSourceResumeHelper
+from corehq.apps.userreports.rebuild import DataSourceResumeHelper, StaticShardedBuildHelper, get_doc_id_shard
 from corehq.apps.userreports.tests.utils import get_sample_data_source
 from six.moves import range
 
@@ -55,3 +55,54 @@ class DataSourceResumeBuildTest(SimpleTestCase):
     def test_has_resume_info_true(self):
         self._resume_helper.set_ids_to_resume_from([uuid.uuid4().hex for i in range(5)])
         self.assertEqual(True, self._resume_helper.has_resume_info())
+
+
+class DocIdShardTest(SimpleTestCase):
+
+    def test_shard_in_range(self):
+        for i in range(100):
+            shard = get_doc_id_shard(uuid.uuid4().hex, 16)
+            self.assertTrue(0 <= shard < 16)
+
+    def test_shard_is_stable(self):
+        doc_id = uuid.uuid4().hex
+        self.assertEqual(get_doc_id_shard(doc_id, 16), get_doc_id_shard(doc_id, 16))
+
+    def test_single_shard(self):
+        self.assertEqual(0, get_doc_id_shard(uuid.uuid4().hex, 1))
+
+    def test_shard_resume_ids_are_separate(self):
+        data_source = get_sample_data_source()
+        shard_0 = DataSourceResumeHelper(data_source, shard=0)
+        shard_1 = DataSourceResumeHelper(data_source, shard=1)
+        shard_0.clear_ids()
+        shard_1.clear_ids()
+        ids = [uuid.uuid4().hex for i in range(5)]
+        shard_0.set_ids_to_resume_from(ids)
+        self.assertEqual(ids, shard_0.get_ids_to_resume_from())
+        self.assertEqual([], shard_1.get_ids_to_resume_from())
+        shard_0.clear_ids()
+
+
+class StaticShardedBuildTest(SimpleTestCase):
+
+    def setUp(self):
+        super(StaticShardedBuildTest, self).setUp()
+        self.helper = StaticShardedBuildHelper(get_sample_data_source())
+        self.addCleanup(self.helper.clear_build)
+
+    def test_no_build(self):
+        self.helper.clear_build()
+        self.assertIsNone(self.helper.get_num_shards())
+        self.assertEqual([], self.helper.get_unfinished_shards())
+
+    def test_finish_shards(self):
+        self.helper.start_build(3)
+        self.assertEqual(3, self.helper.get_num_shards())
+        self.assertFalse(self.helper.finish_shard(1))
+        self.assertEqual([0, 2], self.helper.get_unfinished_shards())
+        self.assertFalse(self.helper.finish_shard(0))
+        self.assertTrue(self.helper.finish_shard(2))
+        # finishing a shard again doesn't make it the last one again
+        self.assertFalse(self.helper.finish_shard(2))
+        self.assertEqual([], self.helper.get_unfinished_shards())
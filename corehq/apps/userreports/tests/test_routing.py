@@ -0,0 +1,176 @@
+from __future__ import absolute_import
+import uuid
+
+from django.test import SimpleTestCase
+from mock import Mock
+
+from corehq.apps.userreports.models import DataSourceConfiguration
+from corehq.apps.userreports.routing import (
+    DataSourceRouter,
+    RoutingValuesStore,
+    get_filter_routing_values,
+)
+
+
+def _make_adapter(referenced_doc_type, configured_filter=None, named_filters=None):
+    config = DataSourceConfiguration(
+        domain='routing-domain',
+        referenced_doc_type=referenced_doc_type,
+        table_id='routing-table',
+        configured_filter=configured_filter or {},
+        named_filters=named_filters or {},
+    )
+    return Mock(config=config)
+
+
+def _case_type_filter(case_type):
+    return {
+        'type': 'boolean_expression',
+        'expression': {'type': 'property_name', 'property_name': 'type'},
+        'operator': 'eq',
+        'property_value': case_type,
+    }
+
+
+def _xmlns_filter(xmlns):
+    return {
+        'type': 'property_match',
+        'property_name': 'xmlns',
+        'property_value': xmlns,
+    }
+
+
+class FilterRoutingValuesTest(SimpleTestCase):
+
+    def test_empty(self):
+        self.assertIsNone(get_filter_routing_values({}))
+
+    def test_property_match(self):
+        self.assertEqual(('xmlns', {'http://a'}), get_filter_routing_values(_xmlns_filter('http://a')))
+
+    def test_boolean_expression(self):
+        self.assertEqual(('type', {'ticket'}), get_filter_routing_values(_case_type_filter('ticket')))
+
+    def test_in_operator(self):
+        spec = _case_type_filter(['a', 'b'])
+        spec['operator'] = 'in'
+        self.assertEqual(('type', {'a', 'b'}), get_filter_routing_values(spec))
+
+    def test_other_property(self):
+        spec = _case_type_filter('ticket')
+        spec['expression']['property_name'] = 'owner_id'
+        self.assertIsNone(get_filter_routing_values(spec))
+
+    def test_not_eq(self):
+        spec = _case_type_filter('ticket')
+        spec['operator'] = 'not_eq'
+        self.assertIsNone(get_filter_routing_values(spec))
+
+    def test_and(self):
+        spec = {
+            'type': 'and',
+            'filters': [
+                {'type': 'boolean_expression', 'operator': 'eq', 'property_value': 'yes',
+                 'expression': {'type': 'property_name', 'property_name': 'closed'}},
+                _case_type_filter('ticket'),
+            ]
+        }
+        self.assertEqual(('type', {'ticket'}), get_filter_routing_values(spec))
+
+    def test_or(self):
+        spec = {'type': 'or', 'filters': [_case_type_filter('a'), _case_type_filter('b')]}
+        self.assertEqual(('type', {'a', 'b'}), get_filter_routing_values(spec))
+
+    def test_or_unconstrained(self):
+        spec = {
+            'type': 'or',
+            'filters': [_case_type_filter('a'), {'type': 'not', 'filter': _case_type_filter('b')}]
+        }
+        self.assertIsNone(get_filter_routing_values(spec))
+
+    def test_not(self):
+        self.assertIsNone(get_filter_routing_values({'type': 'not', 'filter': _case_type_filter('b')}))
+
+    def test_named(self):
+        spec = {'type': 'named', 'name': 'is_ticket'}
+        self.assertEqual(
+            ('type', {'ticket'}),
+            get_filter_routing_values(spec, {'is_ticket': _case_type_filter('ticket')})
+        )
+
+
+class DataSourceRouterTest(SimpleTestCase):
+
+    def setUp(self):
+        self.ticket_adapter = _make_adapter('CommCareCase', _case_type_filter('ticket'))
+        self.person_adapter = _make_adapter('CommCareCase', _case_type_filter('person'))
+        self.all_cases_adapter = _make_adapter('CommCareCase')
+        self.form_adapter = _make_adapter('XFormInstance', _xmlns_filter('http://a'))
+        self.router = DataSourceRouter([
+            self.ticket_adapter, self.person_adapter, self.all_cases_adapter, self.form_adapter
+        ])
+
+    def test_case(self):
+        self.assertEqual(
+            [self.ticket_adapter, self.all_cases_adapter],
+            self.router.get_adapters({'doc_type': 'CommCareCase', 'type': 'ticket'})
+        )
+
+    def test_unknown_case_type(self):
+        self.assertEqual(
+            [self.all_cases_adapter],
+            self.router.get_adapters({'doc_type': 'CommCareCase', 'type': 'other'})
+        )
+
+    def test_form(self):
+        self.assertEqual(
+            [self.form_adapter],
+            self.router.get_adapters({'doc_type': 'XFormInstance', 'xmlns': 'http://a'})
+        )
+        self.assertEqual([], self.router.get_adapters({'doc_type': 'XFormInstance', 'xmlns': 'http://b'}))
+
+    def test_previously_matching(self):
+        self.assertEqual(
+            [self.person_adapter],
+            self.router.get_previously_matching_adapters({'doc_type': 'CommCareCase', 'type': 'ticket'})
+        )
+        self.assertEqual(
+            [], self.router.get_previously_matching_adapters({'doc_type': 'XFormInstance', 'xmlns': 'http://b'})
+        )
+
+    def test_mutable_routing_values(self):
+        self.assertEqual(
+            ('ticket',), self.router.get_mutable_routing_values({'doc_type': 'CommCareCase', 'type': 'ticket'})
+        )
+        self.assertIsNone(
+            self.router.get_mutable_routing_values({'doc_type': 'XFormInstance', 'xmlns': 'http://a'})
+        )
+
+    def test_recorded_routing_values(self):
+        pillow_id = uuid.uuid4().hex
+        store = RoutingValuesStore(pillow_id)
+        routing_values = {'case1': ('ticket',), 'case2': ('person',)}
+        self.assertEqual({}, store.get_recorded_values(['case1', 'case2']))
+
+        store.record_values(routing_values)
+        self.assertEqual(routing_values, store.get_recorded_values(['case1', 'case2']))
+        # not written to the cache until the store is flushed
+        self.assertEqual({}, RoutingValuesStore(pillow_id).get_recorded_values(['case1', 'case2']))
+
+        store.flush()
+        self.assertEqual(
+            routing_values, RoutingValuesStore(pillow_id).get_recorded_values(['case1', 'case2', 'case3'])
+        )
+        # another pillow hasn't processed the docs yet
+        self.assertEqual({}, RoutingValuesStore(uuid.uuid4().hex).get_recorded_values(['case1', 'case2']))
+
+    def test_deleted(self):
+        self.assertEqual([], self.router.get_adapters({'doc_type': 'XFormArchived', 'xmlns': 'http://a'}))
+        self.assertEqual(
+            [self.form_adapter],
+            self.router.get_deleted_adapters({'doc_type': 'XFormArchived', 'xmlns': 'http://a'})
+        )
+        self.assertEqual(
+            [self.ticket_adapter, self.person_adapter, self.all_cases_adapter],
+            self.router.get_deleted_adapters({'doc_type': 'CommCareCase-Deleted', 'type': 'ticket'})
+        )
@@ -41,3 +41,70 @@ class SaveErrorsTest(TestCase):
         }
         with self.assertRaises(TableNotFoundWarning):
             adapter.best_effort_save(doc)
+
+    def test_raise_error_for_missing_table_bulk(self):
+        adapter = get_indicator_adapter(self.config, raise_errors=True)
+        adapter.drop_table()
+
+        doc = {
+            "_id": '123',
+            "domain": "domain",
+            "doc_type": "CommCareCase",
+            "name": 'bob'
+        }
+        with self.assertRaises(TableNotFoundWarning):
+            adapter.best_effort_bulk_save([doc])
+
+
+class BulkSaveTest(TestCase):
+
+    def setUp(self):
+        self.config = DataSourceConfiguration(
+            domain='domain',
+            display_name='foo',
+            referenced_doc_type='CommCareCase',
+            table_id=_clean_table_name('domain', str(uuid.uuid4().hex)),
+            configured_indicators=[{
+                "type": "expression",
+                "expression": {
+                    "type": "property_name",
+                    "property_name": 'name'
+                },
+                "column_id": 'name',
+                "display_name": 'name',
+                "datatype": "string"
+            }],
+        )
+        self.adapter = get_indicator_adapter(self.config)
+        self.adapter.rebuild_table()
+
+    def tearDown(self):
+        self.adapter.drop_table()
+
+    def _doc(self, doc_id, name, doc_type='CommCareCase'):
+        return {
+            "_id": doc_id,
+            "domain": "domain",
+            "doc_type": doc_type,
+            "name": name,
+        }
+
+    def _get_names_by_doc_id(self):
+        return {row.doc_id: row.name for row in self.adapter.get_query_object()}
+
+    def test_bulk_save(self):
+        self.adapter.best_effort_bulk_save([
+            self._doc('1', 'bob'),
+            self._doc('2', 'alice'),
+            self._doc('3', 'eve', doc_type='NotCommCareCase'),
+        ])
+        self.assertEqual({'1': 'bob', '2': 'alice'}, self._get_names_by_doc_id())
+
+    def test_bulk_save_replaces_rows(self):
+        self.adapter.best_effort_bulk_save([self._doc('1', 'bob'), self._doc('2', 'alice')])
+        self.adapter.best_effort_bulk_save([self._doc('1', 'robert')])
+        self.assertEqual({'1': 'robert', '2': 'alice'}, self._get_names_by_doc_id())
+
+    def test_bulk_save_duplicate_docs(self):
+        self.adapter.best_effort_bulk_save([self._doc('1', 'bob'), self._doc('1', 'robert')])
+        self.assertEqual({'1': 'robert'}, self._get_names_by_doc_id())
@@ -1,12 +1,14 @@
 from __future__ import absolute_import
 import collections
 import hashlib
+import uuid
 
 from django.conf import settings
 
 from corehq import privileges, toggles
 from corehq.apps.hqwebapp.templatetags.hq_shared_tags import toggle_enabled
 from corehq.apps.userreports.const import (
+    DATA_SOURCE_VERSION_KEY_PREFIX,
     REPORT_BUILDER_EVENTS_KEY,
     UCR_ES_BACKEND,
     UCR_ES_PRIMARY,
@@ -16,6 +18,7 @@ from corehq.apps.userreports.const import (
 from django_prbac.utils import has_privilege
 
 from corehq.apps.userreports.dbaccessors import get_all_es_data_sources
+from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
 
 
 def localize(value, lang):
@@ -190,6 +193,28 @@ def get_async_indicator_modify_lock_key(doc_id):
     return 'async_indicator_save-{}'.format(doc_id)
 
 
+def get_data_source_version(data_source_id):
+    """
+    Get the version of the data source's rows, which changes every time they
+    are saved, deleted or rebuilt. It's used to key caches of report data.
+    """
+    cache = get_redis_default_cache()
+    key = _get_data_source_version_key(data_source_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(key, version, timeout=None)
+    return version
+
+
+def bump_data_source_version(data_source_id):
+    get_redis_default_cache().set(_get_data_source_version_key(data_source_id), uuid.uuid4().hex, timeout=None)
+
+
+def _get_data_source_version_key(data_source_id):
+    return '{}-{}'.format(DATA_SOURCE_VERSION_KEY_PREFIX, data_source_id)
+
+
 def get_static_report_mapping(from_domain, to_domain, report_map):
     from corehq.apps.userreports.models import StaticReportConfiguration, STATIC_PREFIX, \
         CUSTOM_REPORT_PREFIX
@@ -94,7 +94,8 @@ from corehq.apps.userreports.reports.filters.choice_providers import (
 from corehq.apps.userreports.reports.view import ConfigurableReport
 from corehq.apps.userreports.sql import IndicatorSqlAdapter
 from corehq.apps.userreports.tasks import (
-    rebuild_indicators, resume_building_indicators, rebuild_indicators_in_place
+    rebuild_indicators, resume_building_indicators, rebuild_indicators_in_place,
+    rebuild_indicators_in_shards, resume_building_indicators_in_shards, get_unfinished_shards,
 )
 from corehq.apps.userreports.ui.forms import (
     ConfigurableReportEditForm,
@@ -1177,7 +1178,10 @@ def rebuild_data_source(request, domain, config_id):
         )
     )
 
-    rebuild_indicators.delay(config_id, request.user.username)
+    if toggles.SHARDED_UCR_REBUILDS.enabled(domain):
+        rebuild_indicators_in_shards.delay(config_id, initiated_by=request.user.username)
+    else:
+        rebuild_indicators.delay(config_id, request.user.username)
     return HttpResponseRedirect(reverse(
         EditDataSourceView.urlname, args=[domain, config._id]
     ))
@@ -1187,6 +1191,7 @@ def rebuild_data_source(request, domain, config_id):
 @require_POST
 def resume_building_data_source(request, domain, config_id):
     config, is_static = get_datasource_config_or_404(config_id, domain)
+    _, unfinished_shards = get_unfinished_shards(config)
     if not is_static and config.meta.build.finished:
         messages.warning(
             request,
@@ -1194,6 +1199,12 @@ def resume_building_data_source(request, domain, config_id):
                 config.display_name
             )
         )
+    elif unfinished_shards:
+        messages.success(
+            request,
+            _(u'Resuming rebuilding table "{}".').format(config.display_name)
+        )
+        resume_building_indicators_in_shards.delay(config_id, request.user.username)
     elif not DataSourceResumeHelper(config).has_resume_info():
         messages.warning(
             request,
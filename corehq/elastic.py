@@ -1,5 +1,6 @@
 from collections import namedtuple
 import copy
+import itertools
 import logging
 import time
 from urllib import unquote
@@ -9,6 +10,7 @@ from elasticsearch import Elasticsearch
 from elasticsearch.exceptions import ElasticsearchException
 
 from corehq.apps.es.utils import flatten_field_dict
+from corehq.util.concurrent import iter_concurrently
 from corehq.util.datadog.gauges import datadog_histogram
 from corehq.pillows.mappings.app_mapping import APP_INDEX
 from corehq.pillows.mappings.case_mapping import CASE_INDEX
@@ -236,6 +238,66 @@ def scroll_query(index_name, q, es_instance_alias=ES_DEFAULT_INSTANCE):
         raise ESError(e)
 
 
+def parallel_scroll_query(index_name, q, es_instance_alias=ES_DEFAULT_INSTANCE, ordered=False,
+                          buffer_size=None):
+    """
+    Like scroll_query, but with a separate scroll for each shard of the index, which
+    are all consumed concurrently. ES 1.x doesn't support sliced scrolls so the
+    query is partitioned by shard using the search preference.
+
+    :param ordered: If True, yield all the results of the first shard before the
+                    results of the next shard and so on, so that the results are
+                    in a consistent order. A scroll context expires if it isn't
+                    used, so in this case each shard's scroll is only started once
+                    the shards before it have been consumed, and the shards are
+                    only fetched ahead of the consumer rather than concurrently.
+                    Otherwise results are yielded as soon as they're fetched.
+    :param buffer_size: The maximum number of results to hold in memory for each shard
+    """
+    es_meta = ES_META[index_name]
+    client = get_es_instance(es_instance_alias)
+    buffer_size = buffer_size or SCROLL_PAGE_SIZE_LIMIT
+    try:
+        shard_groups = client.search_shards(index=es_meta.index, doc_type=es_meta.type)['shards']
+        shard_numbers = sorted({shard['shard'] for shard_group in shard_groups for shard in shard_group})
+        if ordered:
+            count = client.search(
+                index=es_meta.index, doc_type=es_meta.type, body=q, search_type='count'
+            )['hits']['total']
+            return ScanResult(count, itertools.chain.from_iterable(
+                iter_concurrently([_iter_shard_scroll(client, es_meta, q, shard_number)], buffer_size=buffer_size)
+                for shard_number in shard_numbers
+            ))
+
+        results = [
+            _shard_scroll(client, es_meta, q, shard_number)
+            for shard_number in shard_numbers
+        ]
+    except ElasticsearchException as e:
+        raise ESError(e)
+
+    return ScanResult(
+        sum(result.count or 0 for result in results),
+        iter_concurrently(results, buffer_size=buffer_size),
+    )
+
+
+def _shard_scroll(client, es_meta, q, shard_number):
+    return scan(
+        client,
+        index=es_meta.index,
+        doc_type=es_meta.type,
+        query=q,
+        preference='_shards:{}'.format(shard_number),
+    )
+
+
+def _iter_shard_scroll(client, es_meta, q, shard_number):
+    # the scroll isn't started until this is iterated
+    for hit in _shard_scroll(client, es_meta, q, shard_number):
+        yield hit
+
+
 class ScanResult(object):
 
     def __init__(self, count, iterator):
@@ -15,3 +15,7 @@ ASYNC_RETRY_AFTER = 5
 
 ASYNC_RESTORE_CACHE_KEY_PREFIX = "async-restore-task"
 RESTORE_CACHE_KEY_PREFIX = "ota-restore"
+
+CASE_XML_CACHE_KEY_PREFIX = "ota-case-xml"
+# how long the serialized XML for a case is kept around for (in seconds).
+CASE_XML_CACHE_TIMEOUT = 24 * 60 * 60  # 1 day
@@ -7,7 +7,7 @@ from corehq.toggles import EXTENSION_CASES_SYNC_ENABLED
 from casexml.apps.case.const import CASE_INDEX_EXTENSION, CASE_INDEX_CHILD
 from casexml.apps.phone.cleanliness import get_case_footprint_info
 from casexml.apps.phone.const import ASYNC_RETRY_AFTER
-from casexml.apps.phone.data_providers.case.load_testing import get_xml_for_response
+from casexml.apps.phone.data_providers.case.load_testing import get_xml_for_updates
 from casexml.apps.phone.data_providers.case.stock import get_stock_payload
 from casexml.apps.phone.data_providers.case.utils import get_case_sync_updates, CaseStub
 from casexml.apps.phone.models import OwnershipCleanlinessFlag, IndexTree
@@ -185,9 +185,7 @@ class CleanOwnerSyncPayload(object):
         self.response.extend(commtrack_elements)
 
     def _add_case_elements_to_response(self, relevant_sync_elements):
-        for relevant_case in relevant_sync_elements:
-            for xml_item in get_xml_for_response(relevant_case, self.restore_state):
-                self.response.append(xml_item)
+        self.response.extend(get_xml_for_updates(relevant_sync_elements, self.restore_state))
 
 
 class AsyncCleanOwnerPayload(CleanOwnerSyncPayload):
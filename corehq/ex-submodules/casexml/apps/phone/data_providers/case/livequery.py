@@ -27,7 +27,7 @@ from itertools import chain, islice
 
 from casexml.apps.case.const import CASE_INDEX_EXTENSION as EXTENSION
 from casexml.apps.phone.data_providers.case.load_testing import (
-    get_xml_for_response,
+    get_xml_for_updates,
 )
 from casexml.apps.phone.const import ASYNC_RETRY_AFTER
 from casexml.apps.phone.data_providers.case.stock import get_stock_payload
@@ -63,8 +63,9 @@ def do_livequery(timing_context, restore_state, async_task=None):
     def classify(index, prev_ids):
         """Classify index as either live or extension with live status pending
 
-        This closure mutates `indices` from the enclosing function as
-        well as the same data structres mutated by `enliven()`.
+        This closure mutates `indices` and `closed_by_id` from the
+        enclosing function as well as the same data structres mutated
+        by `enliven()`.
 
         :returns: Case id for next related index fetch or CIRCULAR_REF
         if the related case has already been seen.
@@ -74,6 +75,9 @@ def do_livequery(timing_context, restore_state, async_task=None):
         ref_id = index.referenced_id  # aka parent/host/super
         relationship = index.relationship
         debug("%s --%s--> %s", sub_id, relationship, ref_id)
+        ref_closed = getattr(index, 'referenced_closed', None)
+        if ref_closed is not None:
+            closed_by_id[ref_id] = ref_closed
         if sub_id in prev_ids:
             # traverse to parent/host
             if (sub_id in live_ids
@@ -116,6 +120,7 @@ def do_livequery(timing_context, restore_state, async_task=None):
     extensions_by_host = defaultdict(set)  # host_id -> extension_ids
     hosts_by_extension = defaultdict(set)  # extension_id -> host_ids
     indices = defaultdict(list)
+    closed_by_id = {}  # case_id -> closed status (from the indices referencing it)
     accessor = CaseAccessors(restore_state.domain)
 
     with timing_context("livequery"):
@@ -145,10 +150,15 @@ def do_livequery(timing_context, restore_state, async_task=None):
                     enliven(case_id)
 
             # open root nodes and their extensions -> live
-            # TODO store referenced_id open/closed status in case index to avoid this query
             root_ids = [r for r in extensions_by_host if r not in hosts_by_extension]
             debug('roots: %r', root_ids)
-            for case_id in accessor.filter_open_case_ids(root_ids):
+            open_root_ids = [r for r in root_ids if closed_by_id.get(r) is False]
+            # the closed status isn't known for indices saved before it was
+            # stored on the index or that reference cases that don't exist
+            unknown_ids = [r for r in root_ids if r not in closed_by_id]
+            if unknown_ids:
+                open_root_ids.extend(accessor.filter_open_case_ids(unknown_ids))
+            for case_id in open_root_ids:
                 enliven(case_id)
 
             debug('live: %r', live_ids)
@@ -226,10 +236,8 @@ def compile_response(timing_context, restore_state, batches, update_progress):
             updates = get_case_sync_updates(
                 restore_state.domain, cases, restore_state.last_sync_log)
 
-        with timing_context("get_xml_for_response (%s updates)" % len(updates)):
-            response.extend(item
-                for update in updates.itervalues()
-                for item in get_xml_for_response(update, restore_state))
+        with timing_context("get_xml_for_updates (%s updates)" % len(updates)):
+            response.extend(get_xml_for_updates(list(updates.itervalues()), restore_state))
 
         done += len(cases)
         update_progress(done)
@@ -1,7 +1,9 @@
 from copy import deepcopy
 from casexml.apps.phone.data_providers.case.utils import CaseSyncUpdate
+from casexml.apps.phone.data_providers.case.xml_cache import get_cached_xml_for_updates
 from casexml.apps.phone.xml import get_case_element, tostring
 from corehq.apps.app_manager.const import USERCASE_TYPE
+from corehq.toggles import CACHED_RESTORE_CASE_XML
 
 
 def transform_loadtest_update(update, factor):
@@ -37,3 +39,18 @@ def get_xml_for_response(update, restore_state):
         if original_update.case.type == USERCASE_TYPE:
             break
     return elements
+
+
+def get_xml_for_updates(updates, restore_state):
+    """
+    Get the XML for a batch of case_updates to add to the restore response.
+    Cached case XML is only used for normal restores since load testing
+    restores transform the cases.
+    """
+    if restore_state.loadtest_factor > 1 or not CACHED_RESTORE_CASE_XML.enabled(restore_state.domain):
+        return [
+            element
+            for update in updates
+            for element in get_xml_for_response(update, restore_state)
+        ]
+    return get_cached_xml_for_updates(updates, restore_state)
@@ -0,0 +1,70 @@
+"""
+Cache of the serialized restore XML for individual cases
+
+Most cases in a restore haven't changed since the last time they were
+sent to a phone, so their XML can be reused instead of being regenerated.
+Cached fragments are keyed by the case ID and restore version, and are
+only used if the case's ``server_modified_on`` and the required updates
+(create / update / close) match the ones the fragment was generated with.
+"""
+from casexml.apps.case.xml import LEGAL_VERSIONS
+from casexml.apps.phone.const import CASE_XML_CACHE_KEY_PREFIX, CASE_XML_CACHE_TIMEOUT
+from casexml.apps.phone.xml import get_case_element, tostring
+from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
+
+
+def get_cached_xml_for_updates(updates, restore_state):
+    """
+    Get the XML for a batch of case sync updates, using the cached XML for
+    any cases that haven't changed since it was generated.
+
+    :param updates: list of ``CaseSyncUpdate`` objects
+    :return: list of XML strings in the same order as ``updates``
+    """
+    version = restore_state.version
+    cache = get_redis_default_cache()
+    keys = [case_xml_cache_key(update.case.case_id, version) for update in updates]
+    cached = cache.get_many(keys)
+
+    elements = []
+    to_cache = {}
+    for key, update in zip(keys, updates):
+        modified_on = _get_modified_on(update.case)
+        updates_key = _get_updates_key(update.required_updates)
+        fragments = cached.get(key)
+        if fragments and fragments['server_modified_on'] == modified_on and updates_key in fragments['xml']:
+            elements.append(fragments['xml'][updates_key])
+            continue
+
+        xml = tostring(get_case_element(update.case, update.required_updates, version))
+        elements.append(xml)
+        if modified_on is None:
+            continue
+
+        if not fragments or fragments['server_modified_on'] != modified_on:
+            fragments = {'server_modified_on': modified_on, 'xml': {}}
+        fragments['xml'][updates_key] = xml
+        to_cache[key] = fragments
+
+    if to_cache:
+        cache.set_many(to_cache, timeout=CASE_XML_CACHE_TIMEOUT)
+    return elements
+
+
+def invalidate_case_xml(case_id):
+    get_redis_default_cache().delete_many([
+        case_xml_cache_key(case_id, version) for version in LEGAL_VERSIONS
+    ])
+
+
+def case_xml_cache_key(case_id, version):
+    return '{}-{}-{}'.format(CASE_XML_CACHE_KEY_PREFIX, version, case_id)
+
+
+def _get_modified_on(case):
+    modified_on = getattr(case, 'server_modified_on', None)
+    return modified_on.isoformat() if modified_on else None
+
+
+def _get_updates_key(required_updates):
+    return ','.join(required_updates)
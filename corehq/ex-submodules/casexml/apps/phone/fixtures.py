@@ -1,4 +1,5 @@
 from abc import ABCMeta, abstractmethod
+from xml.etree import ElementTree
 
 import six
 
@@ -45,6 +46,9 @@ class FixtureGenerator(object):
     In this case 'provider.id' should just be the ID prefix.
     
     The function should return an empty list if there are no fixtures
+
+    Fixture objects may be ElementTree elements or already serialized
+    (UTF-8 encoded) XML strings, which are written to the restore as they are.
     """
 
     def __init__(self):
@@ -79,10 +83,14 @@ class FixtureGenerator(object):
 
     def _get_fixtures(self, restore_user, fixture_id=None):
         providers = self.get_providers(restore_user, fixture_id=fixture_id)
-        return itertools.chain(*[
+        fixtures = itertools.chain(*[
             provider(_get_restore_state(restore_user))
             for provider in providers
         ])
+        return (
+            ElementTree.fromstring(fixture) if isinstance(fixture, six.string_types) else fixture
+            for fixture in fixtures
+        )
 
     def get_fixture_by_id(self, fixture_id, restore_user):
         """
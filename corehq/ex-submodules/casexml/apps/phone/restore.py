@@ -5,6 +5,7 @@ import logging
 import os
 import shutil
 import tempfile
+from functools import partial
 from io import FileIO
 from cStringIO import StringIO
 from uuid import uuid4
@@ -12,13 +13,19 @@ from celery.exceptions import TimeoutError
 from celery.result import AsyncResult
 
 from couchdbkit import ResourceNotFound
-from casexml.apps.phone.data_providers import get_element_providers, get_full_response_providers
+from casexml.apps.phone.data_providers import (
+    FixtureElementProvider,
+    get_element_providers,
+    get_full_response_providers,
+)
 from casexml.apps.phone.exceptions import (
     MissingSyncLog, InvalidSyncLogException, SyncLogUserMismatch,
     BadStateException, RestoreException, DateOpenedBugException,
 )
 from casexml.apps.phone.tasks import get_async_restore_payload, ASYNC_RESTORE_SENT
-from corehq.toggles import EXTENSION_CASES_SYNC_ENABLED, LIVEQUERY_SYNC
+from casexml.apps.phone.fixtures import generator as fixture_generator
+from corehq.toggles import EXTENSION_CASES_SYNC_ENABLED, LIVEQUERY_SYNC, PARALLEL_RESTORE_PROVIDERS
+from corehq.util.concurrent import iter_concurrently
 from corehq.util.timer import TimingContext
 from corehq.util.datadog.gauges import datadog_counter
 from dimagi.utils.decorators.memoized import memoized
@@ -39,6 +46,7 @@ from couchforms.openrosa_response import (
     get_response_element,
 )
 from casexml.apps.case.xml import check_version, V1
+from django.db import connections
 from django.http import HttpResponse, StreamingHttpResponse
 from django.conf import settings
 from casexml.apps.phone.checksum import CaseStateHash
@@ -132,6 +140,12 @@ class RestoreResponse(object):
     def close(self):
         self.response_body.close()
 
+    def discard(self):
+        """
+        Close a partial response that won't be used any more and free its storage
+        """
+        self.close()
+
     def __enter__(self):
         return self
 
@@ -149,6 +163,14 @@ class RestoreResponse(object):
         for element in iterable:
             self.append(element)
 
+    def append_response(self, response):
+        """
+        Append the body of a partial response, e.g. one written in another thread.
+        """
+        self.num_items += response.num_items
+        response.response_body.seek(0)
+        shutil.copyfileobj(response.response_body, self.response_body)
+
     def finalize(self):
         raise NotImplemented()
 
@@ -181,6 +203,12 @@ class FileRestoreResponse(RestoreResponse):
 
         self.response_body = FileIO(self.get_filename(self.BODY_TAG_SUFFIX), 'w+')
 
+    def discard(self):
+        super(FileRestoreResponse, self).discard()
+        body_filename = self.get_filename(self.BODY_TAG_SUFFIX)
+        if os.path.exists(body_filename):
+            os.remove(body_filename)
+
     def get_filename(self, suffix=None):
         return "{filename}{suffix}.{ext}".format(
             filename=self.filename,
@@ -361,6 +389,18 @@ class AsyncRestoreResponse(object):
         return response
 
 
+def _append_element(response, element):
+    if not isinstance(element, basestring) and element.tag == 'fixture' and len(element) == 0:
+        # There is a bug on mobile versions prior to 2.27 where
+        # a parsing error will cause mobile to ignore the element
+        # after this one if this element is empty.
+        # So we have to add a dummy empty_element child to prevent
+        # this element from being empty.
+        ElementTree.SubElement(element, 'empty_element')
+    # fixture providers may return elements that are already serialized
+    response.append(element)
+
+
 class CachedResponse(object):
 
     def __init__(self, domain, payload_path):
@@ -750,20 +790,16 @@ class RestoreConfig(object):
         """
         This function returns a RestoreResponse class that encapsulates the response.
         """
+        if PARALLEL_RESTORE_PROVIDERS.enabled(self.domain):
+            return self._generate_restore_response_concurrently(async_task)
+
         with self.restore_state.restore_class(
                 self.restore_user.username, items=self.params.include_item_count) as response:
             element_providers = get_element_providers(self.timing_context)
             for provider in element_providers:
                 with self.timing_context(provider.__class__.__name__):
                     for element in provider.get_elements(self.restore_state):
-                        if element.tag == 'fixture' and len(element) == 0:
-                            # There is a bug on mobile versions prior to 2.27 where
-                            # a parsing error will cause mobile to ignore the element
-                            # after this one if this element is empty.
-                            # So we have to add a dummy empty_element child to prevent
-                            # this element from being empty.
-                            ElementTree.SubElement(element, 'empty_element')
-                        response.append(element)
+                        _append_element(response, element)
 
             full_response_providers = get_full_response_providers(self.timing_context, async_task)
             for provider in full_response_providers:
@@ -775,6 +811,89 @@ class RestoreConfig(object):
             response.finalize()
             return response
 
+    def _generate_restore_response_concurrently(self, async_task=None):
+        """
+        Like _generate_restore_response, but each fixture provider, each of the
+        other element providers and each full response provider writes its part
+        of the response to its own file in a separate thread. The parts are then
+        concatenated in the usual order.
+        """
+        restore_state = self.restore_state
+
+        def new_partial_response():
+            return restore_state.restore_class(self.restore_user.username, items=self.params.include_item_count)
+
+        def get_elements_response(get_elements):
+            partial_response = new_partial_response()
+            try:
+                for element in get_elements():
+                    _append_element(partial_response, element)
+            except:
+                partial_response.discard()
+                raise
+            return partial_response
+
+        def get_full_response(provider, timing_context):
+            provider.timing_context = timing_context
+            return provider.get_response(restore_state)
+
+        # (name, function that takes a timing context and returns a partial response)
+        parts = []
+        for provider in get_element_providers(self.timing_context):
+            if isinstance(provider, FixtureElementProvider):
+                for fixture_provider in fixture_generator.get_providers(self.restore_user, version=self.version):
+                    parts.append((
+                        fixture_provider.__class__.__name__,
+                        partial(get_elements_response, partial(fixture_provider, restore_state)),
+                    ))
+            else:
+                parts.append((
+                    provider.__class__.__name__,
+                    partial(get_elements_response, partial(provider.get_elements, restore_state)),
+                ))
+        for provider in get_full_response_providers(self.timing_context, async_task):
+            parts.append((provider.__class__.__name__, partial(get_full_response, provider)))
+
+        # every partial response that was generated, so that the ones that
+        # weren't appended can be discarded if another part fails
+        generated_responses = []
+
+        def generate_part(name, get_response):
+            try:
+                timing_context = TimingContext(name)
+                with timing_context:
+                    partial_response = get_response(timing_context)
+                generated_responses.append(partial_response)
+                yield partial_response, timing_context
+            except GeneratorExit:
+                # the response won't be read
+                partial_response.discard()
+                raise
+            finally:
+                # database connections are per thread
+                connections.close_all()
+
+        with new_partial_response() as response:
+            partial_responses = iter_concurrently(
+                [generate_part(name, get_response) for name, get_response in parts],
+                ordered=True,
+                buffer_size=1,
+            )
+            try:
+                for partial_response, timing_context in partial_responses:
+                    self.timing_context.append(timing_context)
+                    response.append_response(partial_response)
+                    partial_response.discard()
+            finally:
+                # stop the threads before discarding what they generated, so that
+                # a response generated afterwards is discarded by its own thread
+                partial_responses.close()
+                for partial_response in generated_responses:
+                    partial_response.discard()
+
+            response.finalize()
+            return response
+
     def get_response(self):
         try:
             with self.timing_context:
@@ -0,0 +1,82 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+import uuid
+
+from django.test import SimpleTestCase
+from mock import patch
+
+from casexml.apps.case.models import CommCareCase
+from casexml.apps.case.xml import V2
+from casexml.apps.phone.data_providers.case.load_testing import get_xml_for_updates
+from casexml.apps.phone.data_providers.case.utils import CaseSyncUpdate
+from casexml.apps.phone.data_providers.case.xml_cache import (
+    get_cached_xml_for_updates,
+    invalidate_case_xml,
+)
+from casexml.apps.phone.xml import get_case_element
+from corehq.util.test_utils import flag_enabled
+
+RestoreState = namedtuple('RestoreState', 'domain version loadtest_factor')
+
+
+class CaseXMLCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        self.case = CommCareCase(
+            _id=uuid.uuid4().hex,
+            domain='case-xml-cache',
+            type='person',
+            name='Mary',
+            server_modified_on=datetime.utcnow(),
+        )
+        self.restore_state = RestoreState(domain='case-xml-cache', version=V2, loadtest_factor=1)
+        invalidate_case_xml(self.case.case_id)
+
+    def tearDown(self):
+        invalidate_case_xml(self.case.case_id)
+
+    def _get_xml(self, update=None):
+        update = update or CaseSyncUpdate(self.case, None)
+        with patch('casexml.apps.phone.data_providers.case.xml_cache.get_case_element',
+                   wraps=get_case_element) as element_mock:
+            xml = get_cached_xml_for_updates([update], self.restore_state)
+        return xml, element_mock.call_count
+
+    def test_cached_xml_is_reused(self):
+        xml, generated = self._get_xml()
+        self.assertEqual(1, generated)
+        cached_xml, generated = self._get_xml()
+        self.assertEqual(0, generated)
+        self.assertEqual(xml, cached_xml)
+
+    def test_case_modified(self):
+        self._get_xml()
+        self.case.name = 'Maria'
+        self.case.server_modified_on = self.case.server_modified_on + timedelta(seconds=1)
+        [xml], generated = self._get_xml()
+        self.assertEqual(1, generated)
+        self.assertIn('Maria', xml)
+
+    def test_different_updates(self):
+        self._get_xml()
+        _, generated = self._get_xml(CaseSyncUpdate(self.case, None, required_updates=['update']))
+        self.assertEqual(1, generated)
+        # both variants are now cached
+        _, generated = self._get_xml()
+        self.assertEqual(0, generated)
+
+    def test_invalidate(self):
+        self._get_xml()
+        invalidate_case_xml(self.case.case_id)
+        _, generated = self._get_xml()
+        self.assertEqual(1, generated)
+
+    def test_toggle(self):
+        update = CaseSyncUpdate(self.case, None)
+        with patch('casexml.apps.phone.data_providers.case.load_testing.get_cached_xml_for_updates') as cache_mock:
+            with patch('corehq.toggles.CACHED_RESTORE_CASE_XML.enabled', return_value=False):
+                get_xml_for_updates([update], self.restore_state)
+            self.assertEqual(0, cache_mock.call_count)
+            with flag_enabled('CACHED_RESTORE_CASE_XML'):
+                get_xml_for_updates([update], self.restore_state)
+            self.assertEqual(1, cache_mock.call_count)
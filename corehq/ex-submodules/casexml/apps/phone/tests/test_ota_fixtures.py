@@ -1,8 +1,10 @@
+import re
 from xml.etree import ElementTree
 from django.test import TestCase
+from casexml.apps.case.mock import CaseFactory
 from casexml.apps.case.xml import V2, V1
 from casexml.apps.phone.fixtures import generator
-from casexml.apps.phone.tests.utils import create_restore_user
+from casexml.apps.phone.tests.utils import create_restore_user, get_restore_config
 from corehq.apps.domain.models import Domain
 from corehq.apps.fixtures.models import (
     FixtureDataType, FixtureTypeField,
@@ -11,8 +13,9 @@ from corehq.apps.fixtures.models import (
 from corehq.apps.groups.models import Group
 from corehq.apps.users.models import CommCareUser
 from corehq.apps.users.dbaccessors.all_commcare_users import delete_all_users
-from casexml.apps.case.tests.util import check_xml_line_by_line
-from corehq.form_processor.tests.utils import use_sql_backend
+from casexml.apps.case.tests.util import check_xml_line_by_line, delete_all_sync_logs
+from corehq.form_processor.tests.utils import FormProcessorTestUtils, use_sql_backend
+from corehq.util.test_utils import flag_enabled
 
 DOMAIN = 'fixture-test'
 SA_PROVINCES = 'sa_provinces'
@@ -65,6 +68,8 @@ class OtaFixtureTest(TestCase):
 
     @classmethod
     def tearDownClass(cls):
+        FormProcessorTestUtils.delete_all_cases_forms_ledgers(DOMAIN)
+        delete_all_sync_logs()
         for group in Group.by_domain(DOMAIN):
             group.delete()
         delete_all_users()
@@ -118,6 +123,25 @@ class OtaFixtureTest(TestCase):
         fixture_xml = generator.get_fixture_by_id('bad ID', self.restore_user)
         self.assertIsNone(fixture_xml)
 
+    def test_restore_with_parallel_providers(self):
+        factory = CaseFactory(domain=DOMAIN, case_defaults={'owner_id': self.user.get_id})
+        for i in range(3):
+            factory.create_case(case_name='case {}'.format(i))
+
+        def get_restore_payload():
+            payload = get_restore_config(self.domain, self.restore_user, version=V2, items=True) \
+                .get_payload().as_string()
+            # each restore has its own sync log
+            return re.sub(r'<restore_id>\w+</restore_id>', '<restore_id/>', payload)
+
+        expected = get_restore_payload()
+        with flag_enabled('PARALLEL_RESTORE_PROVIDERS'):
+            payload = get_restore_payload()
+
+        self.assertIn('item-list:{}'.format(SA_PROVINCES), payload)
+        self.assertEqual(payload.count('<case '), 3)
+        check_xml_line_by_line(self, expected, payload)
+
 
 @use_sql_backend
 class OtaFixtureTestSQL(OtaFixtureTest):
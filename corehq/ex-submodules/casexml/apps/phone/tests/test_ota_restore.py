@@ -15,7 +15,7 @@ from casexml.apps.phone.tests.utils import create_restore_user
 from casexml.apps.case import const as case_const
 from casexml.apps.phone.tests.dummy import dummy_restore_xml, dummy_user_xml
 from corehq.apps.users.util import normalize_username
-from corehq.util.test_utils import TestFileMixin
+from corehq.util.test_utils import TestFileMixin, flag_enabled
 from corehq.apps.users.dbaccessors.all_commcare_users import delete_all_users
 from corehq.apps.custom_data_fields.models import SYSTEM_PREFIX
 from corehq.apps.domain.models import Domain
@@ -117,6 +117,20 @@ class OtaRestoreTest(BaseOtaRestoreTest):
             restore_payload,
         )
 
+    @flag_enabled('PARALLEL_RESTORE_PROVIDERS')
+    def test_user_restore_with_parallel_providers(self):
+        restore_payload = generate_restore_payload(self.project, self.restore_user, items=True)
+        sync_log = SyncLog.view(
+            "phone/sync_logs_by_user",
+            include_docs=True,
+            reduce=False,
+        ).one()
+        check_xml_line_by_line(
+            self,
+            dummy_restore_xml(sync_log.get_id, items=3, user=self.restore_user),
+            restore_payload,
+        )
+
     def testOverwriteCache(self):
         restore_config = get_restore_config(
             self.project, self.restore_user, items=True, force_cache=True
@@ -137,4 +137,8 @@ def call_fixture_generator(gen, restore_user, project=None, last_sync=None, app=
     if last_sync:
         params.sync_log_id = last_sync._id
         restore_state._last_sync_log = last_sync
-    return gen(restore_state)
+    # providers may return serialized fixtures
+    return [
+        ElementTree.fromstring(fixture) if isinstance(fixture, basestring) else fixture
+        for fixture in gen(restore_state)
+    ]
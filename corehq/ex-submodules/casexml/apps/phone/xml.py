@@ -25,6 +25,20 @@ def tostring(element):
     return ElementTree.tostring(element, encoding="utf-8")
 
 
+def get_serialized_element(tag, attrib, serialized_children):
+    """
+    Serialize an element whose children are already serialized (UTF-8) XML,
+    so that cached XML doesn't need to be parsed to be included in it.
+    """
+    # attributes in the same order as ElementTree serializes them
+    attrs = u''.join(
+        u' {}={}'.format(name, saxutils.quoteattr(value))
+        for name, value in sorted(attrib.items())
+    )
+    start_tag = u'<{}{}>'.format(tag, attrs).encode('utf-8')
+    return start_tag + ''.join(serialized_children) + '</{}>'.format(tag)
+
+
 def get_sync_element(restore_id=None):
     elem = safe_element("Sync")
     elem.attrib = {"xmlns": SYNC_XMLNS}
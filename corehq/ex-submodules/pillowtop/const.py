@@ -1,3 +1,4 @@
 
 CHECKPOINT_FREQUENCY = 100
 CHECKPOINT_MIN_WAIT = 300
+DEFAULT_PROCESSOR_CHUNK_TIMEOUT_MS = 1000
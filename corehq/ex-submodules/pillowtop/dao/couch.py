@@ -40,10 +40,7 @@ class CouchDocumentStore(DocumentStore):
             raise ValueError('This function requires a domain and doc_type set!')
         start_key = None
         if last_id:
-            last_doc = self.get_document(last_id)
-            start_key = [self.domain, self.doc_type]
-            if self.doc_type in _DATE_MAP.keys():
-                start_key.append(last_doc[_DATE_MAP[self.doc_type]])
+            start_key = self._get_start_key(last_id)
 
         return iterate_doc_ids_in_domain_by_type(
             self.domain,
@@ -54,6 +51,69 @@ class CouchDocumentStore(DocumentStore):
             startkey_docid=last_id
         )
 
+    def get_id_ranges(self, num_ranges):
+        """
+        Split the documents' rows of the view that ``iter_document_ids`` reads into
+        ranges with about the same number of rows, bounded by a view key and doc ID.
+        """
+        from corehq.apps.domain.dbaccessors import get_doc_count_in_domain_by_type
+
+        if not (self.domain and self.doc_type):
+            raise ValueError('This function requires a domain and doc_type set!')
+        first_key = [self.domain, self.doc_type]
+        last_key = [self.domain, self.doc_type, {}]
+        count = get_doc_count_in_domain_by_type(self.domain, self.doc_type, self._couch_db)
+
+        bounds = [{'key': first_key}]
+        for i in range(1, num_ranges):
+            row = self._couch_db.view(
+                'by_domain_doc_type_date/view',
+                startkey=first_key,
+                endkey=last_key,
+                reduce=False,
+                include_docs=False,
+                skip=count * i // num_ranges,
+                limit=1,
+            ).one()
+            bounds.append({'key': row['key'], 'doc_id': row['id']} if row else {'key': last_key})
+        bounds.append({'key': last_key})
+        return [{'start': start, 'end': end} for start, end in zip(bounds, bounds[1:])]
+
+    def iter_document_ids_in_range(self, id_range, last_id=None):
+        """
+        :param id_range: one of the ranges returned by ``get_id_ranges``. Its start is
+                         inclusive and its end exclusive.
+        :param last_id: resume from this doc. Only possible for the doc types whose view
+                        key is known, the others start from the beginning of the range again.
+        """
+        from corehq.util.couch_helpers import paginate_view
+
+        start, end = id_range['start'], id_range['end']
+        view_kwargs = {
+            'reduce': False,
+            'include_docs': False,
+            'startkey': start['key'],
+            'endkey': end['key'],
+        }
+        if last_id and self.doc_type in _DATE_MAP:
+            view_kwargs['startkey'] = self._get_start_key(last_id)
+            view_kwargs['startkey_docid'] = last_id
+        elif 'doc_id' in start:
+            view_kwargs['startkey_docid'] = start['doc_id']
+        if 'doc_id' in end:
+            view_kwargs['endkey_docid'] = end['doc_id']
+            view_kwargs['inclusive_end'] = False
+
+        for row in paginate_view(self._couch_db, 'by_domain_doc_type_date/view', ID_CHUNK_SIZE, **view_kwargs):
+            yield row['id']
+
+    def _get_start_key(self, last_id):
+        last_doc = self.get_document(last_id)
+        start_key = [self.domain, self.doc_type]
+        if self.doc_type in _DATE_MAP.keys():
+            start_key.append(last_doc[_DATE_MAP[self.doc_type]])
+        return start_key
+
     def iter_documents(self, ids):
         return iter_docs(self._couch_db, ids, chunksize=500)
 
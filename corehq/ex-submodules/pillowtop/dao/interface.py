@@ -24,6 +24,19 @@ class DocumentStore(object):
         # todo: can convert to @abstractmethod once subclasses handle it
         raise NotImplementedError('this function not yet implemented')
 
+    def get_id_ranges(self, num_ranges):
+        """
+        Split the documents into ranges of about the same size that can be iterated
+        over separately with ``iter_document_ids_in_range``.
+
+        :return: a list of JSON serializable ranges, or None if the store can't split
+                 its documents into ranges
+        """
+        return None
+
+    def iter_document_ids_in_range(self, id_range, last_id=None):
+        raise NotImplementedError('this function not yet implemented')
+
     def iter_documents(self, ids):
         # todo: can convert to @abstractmethod once subclasses handle it
         raise NotImplementedError('this function not yet implemented')
@@ -21,3 +21,8 @@ class MockDocumentStore(DocumentStore):
             del self._data_store[doc_id]
         except KeyError:
             raise DocumentNotFoundError()
+
+    def iter_documents(self, ids):
+        for doc_id in ids:
+            if doc_id in self._data_store:
+                yield self._data_store[doc_id]
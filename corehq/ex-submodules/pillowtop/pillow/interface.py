@@ -7,8 +7,8 @@ from corehq.util.datadog.gauges import datadog_counter, datadog_gauge, datadog_h
 from corehq.util.timer import TimingContext
 from dimagi.utils.logging import notify_exception
 from kafka.common import TopicAndPartition
-from pillowtop.const import CHECKPOINT_MIN_WAIT
-from pillowtop.utils import force_seq_int
+from pillowtop.const import CHECKPOINT_MIN_WAIT, DEFAULT_PROCESSOR_CHUNK_TIMEOUT_MS
+from pillowtop.utils import force_seq_int, bulk_fetch_changes_docs, ChangeError
 from pillowtop.exceptions import PillowtopCheckpointReset
 from pillowtop.logger import pillow_logging
 
@@ -44,6 +44,13 @@ class PillowBase(object):
     # set to true to disable saving pillow retry errors
     retry_errors = True
 
+    # set to a positive number to process changes in chunks of up to this many changes
+    # using ``process_changes_chunk`` instead of one at a time
+    processor_chunk_size = 0
+
+    # max time to wait for a chunk to fill up before processing it anyway
+    processor_chunk_timeout_ms = DEFAULT_PROCESSOR_CHUNK_TIMEOUT_MS
+
     @abstractproperty
     def pillow_id(self):
         """
@@ -101,32 +108,82 @@ class PillowBase(object):
         """
         context = PillowRuntimeContext(changes_seen=0, do_set_checkpoint=True)
         try:
+            changes_chunk = []
+            chunk_started = datetime.utcnow()
             for change in self.get_change_feed().iter_changes(since=since or None, forever=forever):
                 if change:
-                    timer = TimingContext()
-                    try:
-                        context.changes_seen += 1
-                        with timer:
-                            self.process_with_error_handling(change)
-                    except Exception as e:
-                        notify_exception(None, u'processor error in pillow {} {}'.format(
-                            self.get_name(), e,
-                        ))
-                        self._record_change_exception_in_datadog(change)
-                        raise
+                    if self.processor_chunk_size:
+                        if not changes_chunk:
+                            chunk_started = datetime.utcnow()
+                        changes_chunk.append(change)
+                        if self._should_process_chunk(changes_chunk, chunk_started):
+                            self._process_changes_chunk(changes_chunk, context)
+                            changes_chunk = []
                     else:
-                        updated = self.fire_change_processed_event(change, context)
-                        if updated:
-                            self._record_checkpoint_in_datadog()
-                        self._record_change_success_in_datadog(change)
-                    self._record_change_in_datadog(change, timer)
+                        self._process_change(change, context)
                 else:
+                    if changes_chunk:
+                        # the feed is idle so don't hold on to a partially filled chunk
+                        self._process_changes_chunk(changes_chunk, context)
+                        changes_chunk = []
                     updated = self.checkpoint.touch(min_interval=CHECKPOINT_MIN_WAIT)
                     if updated:
                         self._record_checkpoint_in_datadog()
+            if changes_chunk:
+                self._process_changes_chunk(changes_chunk, context)
         except PillowtopCheckpointReset:
             self.process_changes(since=self.get_last_checkpoint_sequence(), forever=forever)
 
+    def _should_process_chunk(self, changes_chunk, chunk_started):
+        if len(changes_chunk) >= self.processor_chunk_size:
+            return True
+        elapsed_ms = (datetime.utcnow() - chunk_started).total_seconds() * 1000
+        return elapsed_ms >= self.processor_chunk_timeout_ms
+
+    def _process_change(self, change, context):
+        timer = TimingContext()
+        try:
+            context.changes_seen += 1
+            with timer:
+                self.process_with_error_handling(change)
+        except Exception as e:
+            notify_exception(None, u'processor error in pillow {} {}'.format(
+                self.get_name(), e,
+            ))
+            self._record_change_exception_in_datadog(change)
+            raise
+        else:
+            updated = self.fire_change_processed_event(change, context)
+            if updated:
+                self._record_checkpoint_in_datadog()
+            self._record_change_success_in_datadog(change)
+        self._record_change_in_datadog(change, timer)
+
+    def _process_changes_chunk(self, changes_chunk, context):
+        timer = TimingContext()
+        try:
+            with timer:
+                change_errors = self.process_changes_chunk(changes_chunk)
+                for change_error in change_errors:
+                    handle_pillow_error(self, change_error.change, change_error.exception)
+        except Exception as e:
+            notify_exception(None, u'processor error in pillow {} {}'.format(
+                self.get_name(), e,
+            ))
+            for change in changes_chunk:
+                self._record_change_exception_in_datadog(change)
+            raise
+
+        for change in changes_chunk:
+            # fire the event for every change so that checkpoint frequencies behave
+            # the same as when processing changes one at a time
+            context.changes_seen += 1
+            updated = self.fire_change_processed_event(change, context)
+            if updated:
+                self._record_checkpoint_in_datadog()
+            self._record_change_success_in_datadog(change)
+        self._record_changes_chunk_in_datadog(changes_chunk, timer)
+
     def process_with_error_handling(self, change):
         try:
             self.process_change(change)
@@ -137,6 +194,15 @@ class PillowBase(object):
     def process_change(self, change):
         pass
 
+    @abstractmethod
+    def process_changes_chunk(self, changes_chunk):
+        """
+        Process a list of changes in one go. Only called if ``processor_chunk_size`` is set.
+
+        :return: list of ``ChangeError`` tuples for the changes that failed
+        """
+        pass
+
     @abstractmethod
     def fire_change_processed_event(self, change, context):
         """
@@ -176,6 +242,21 @@ class PillowBase(object):
             ])
 
     def _record_change_in_datadog(self, change, timer):
+        self._record_offsets_in_datadog()
+        self.__record_change_metric_in_datadog('commcare.change_feed.changes.count', change, timer)
+
+    def _record_changes_chunk_in_datadog(self, changes_chunk, timer):
+        self._record_offsets_in_datadog()
+        for change in changes_chunk:
+            self.__record_change_metric_in_datadog('commcare.change_feed.changes.count', change)
+        datadog_histogram('commcare.change_feed.chunked.processing_time', timer.duration, tags=[
+            u'pillow_name:{}'.format(self.get_name()),
+        ])
+        datadog_gauge('commcare.change_feed.chunked.chunk_size', len(changes_chunk), tags=[
+            u'pillow_name:{}'.format(self.get_name()),
+        ])
+
+    def _record_offsets_in_datadog(self):
         from corehq.apps.change_feed.consumer.feed import KafkaChangeFeed
         change_feed = self.get_change_feed()
         current_seq = self._normalize_sequence(change_feed.get_processed_offsets())
@@ -196,8 +277,6 @@ class PillowBase(object):
             tags_with_topic = tags + [_topic_for_ddog(topic), ]
             datadog_gauge('commcare.change_feed.current_offsets', offset, tags=tags_with_topic)
 
-        self.__record_change_metric_in_datadog('commcare.change_feed.changes.count', change, timer)
-
     def _record_change_success_in_datadog(self, change):
         self.__record_change_metric_in_datadog('commcare.change_feed.changes.success', change)
 
@@ -244,7 +323,7 @@ class ConstructedPillow(PillowBase):
     """
 
     def __init__(self, name, checkpoint, change_feed, processor,
-                 change_processed_event_handler=None):
+                 change_processed_event_handler=None, processor_chunk_size=0):
         self._name = name
         self._checkpoint = checkpoint
         self._change_feed = change_feed
@@ -254,6 +333,7 @@ class ConstructedPillow(PillowBase):
             self.processors = [processor]
 
         self._change_processed_event_handler = change_processed_event_handler
+        self.processor_chunk_size = processor_chunk_size
 
     @property
     def pillow_id(self):
@@ -276,6 +356,43 @@ class ConstructedPillow(PillowBase):
         for processor in self.processors:
             processor.process_change(self, change)
 
+    def process_changes_chunk(self, changes_chunk):
+        from pillowtop.processors.interface import BulkPillowProcessor
+        bulk_fetch_changes_docs(changes_chunk)
+
+        change_errors = []
+        for processor in self.processors:
+            # changes that failed in an earlier processor are retried in full later
+            failed_changes = {id(change_error.change) for change_error in change_errors}
+            changes_to_process = [
+                change for change in changes_chunk if id(change) not in failed_changes
+            ]
+            if not changes_to_process:
+                break
+
+            if isinstance(processor, BulkPillowProcessor):
+                try:
+                    change_errors.extend(processor.process_changes_chunk(self, changes_to_process))
+                    continue
+                except Exception as e:
+                    pillow_logging.exception(
+                        "[%s] Error processing chunk of %s changes with %s, "
+                        "falling back to processing them one at a time: %s" % (
+                            self.get_name(), len(changes_to_process), processor.__class__.__name__, e
+                        )
+                    )
+            change_errors.extend(self._process_changes_serially(processor, changes_to_process))
+        return change_errors
+
+    def _process_changes_serially(self, processor, changes):
+        change_errors = []
+        for change in changes:
+            try:
+                processor.process_change(self, change)
+            except Exception as e:
+                change_errors.append(ChangeError(change, e))
+        return change_errors
+
     def fire_change_processed_event(self, change, context):
         if self._change_processed_event_handler is not None:
             return self._change_processed_event_handler.fire_change_processed(change, context)
@@ -4,10 +4,13 @@ import time
 from elasticsearch.exceptions import RequestError, ConnectionError, NotFoundError, ConflictError
 
 from pillowtop.dao.exceptions import DocumentNotFoundError
-from pillowtop.utils import ensure_matched_revisions, ensure_document_exists
+from pillowtop.utils import (
+    ensure_matched_revisions, ensure_document_exists, build_bulk_payload, prepare_bulk_payloads,
+    ChangeError, ErrorCollector,
+)
 from pillowtop.exceptions import PillowtopIndexingError
 from pillowtop.logger import pillow_logging
-from .interface import PillowProcessor
+from .interface import BulkPillowProcessor
 
 
 def identity(x):
@@ -15,9 +18,10 @@ def identity(x):
 
 RETRY_INTERVAL = 2  # seconds, exponentially increasing
 MAX_RETRIES = 4  # exponential factor threshold for alerts
+MAX_BULK_PAYLOAD_SIZE = 10 ** 7  # ~10 MB
 
 
-class ElasticProcessor(PillowProcessor):
+class ElasticProcessor(BulkPillowProcessor):
 
     def __init__(self, elasticsearch, index_info, doc_prep_fn=None, doc_filter_fn=None):
         self.doc_filter_fn = doc_filter_fn
@@ -54,6 +58,38 @@ class ElasticProcessor(PillowProcessor):
             update=self._doc_exists(change.id),
         )
 
+    def process_changes_chunk(self, pillow_instance, changes_chunk):
+        error_collector = ErrorCollector()
+        changes_to_index = []
+        for change in changes_chunk:
+            if change.deleted and change.id:
+                changes_to_index.append(change)
+                continue
+
+            try:
+                ensure_document_exists(change)
+                ensure_matched_revisions(change)
+            except Exception as e:
+                error_collector.add_error(ChangeError(change, e))
+                continue
+
+            doc = change.get_document()
+            if doc is None or (self.doc_filter_fn and self.doc_filter_fn(doc)):
+                continue
+            changes_to_index.append(change)
+
+        bulk_changes = build_bulk_payload(
+            self.index_info, changes_to_index, self.doc_transform_fn, error_collector
+        )
+        if bulk_changes:
+            item_errors = bulk_send_to_elasticsearch(
+                self.es_getter(), bulk_changes, name=pillow_instance.get_name(),
+            )
+            for change in changes_to_index:
+                if change.id in item_errors:
+                    error_collector.add_error(ChangeError(change, item_errors[change.id]))
+        return error_collector.errors
+
     def _doc_exists(self, doc_id):
         return self.elasticsearch.exists(self.index_info.index, self.index_info.type, doc_id)
 
@@ -115,3 +151,48 @@ def send_to_elasticsearch(index, doc_type, doc_id, es_getter, name, data=None, r
             break  # ignore the error if a doc already exists when trying to create it in the index
         except NotFoundError:
             break
+
+
+def bulk_send_to_elasticsearch(es, bulk_changes, name, retries=MAX_RETRIES):
+    """
+    Send a list of bulk actions (as returned by ``build_bulk_payload``) to the ``_bulk`` endpoint.
+
+    Connection errors are retried for the whole payload and raise ``PillowtopIndexingError``
+    when the retries run out. Errors for individual items are not retried.
+
+    :return: dict mapping doc ID to a ``PillowtopIndexingError`` for each item that failed
+    """
+    item_errors = {}
+    for payload in prepare_bulk_payloads(bulk_changes, MAX_BULK_PAYLOAD_SIZE):
+        current_tries = 0
+        while True:
+            try:
+                response = es.bulk(payload)
+                break
+            except ConnectionError as ex:
+                current_tries += 1
+                pillow_logging.error("[%s] bulk error %s attempt %d/%d" % (
+                    name, ex, current_tries, retries))
+                if current_tries == retries:
+                    raise PillowtopIndexingError("[%s] Max retry error sending bulk payload" % name)
+                time.sleep(math.pow(RETRY_INTERVAL, current_tries))
+
+        if response.get('errors'):
+            item_errors.update(_get_bulk_item_errors(response))
+    return item_errors
+
+
+def _get_bulk_item_errors(response):
+    errors = {}
+    for item in response['items']:
+        action, result = item.items()[0]
+        if 'error' not in result:
+            continue
+        if action == 'delete' and result.get('status') == 404:
+            continue  # ignore deletions of docs that are already gone
+        errors[result['_id']] = PillowtopIndexingError(
+            u"Bulk {} error on {}/{}/{}: {}".format(
+                action, result.get('_index'), result.get('_type'), result['_id'], result['error']
+            )
+        )
+    return errors
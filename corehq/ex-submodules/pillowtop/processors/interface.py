@@ -10,3 +10,25 @@ class PillowProcessor(object):
 
     def checkpoint_updated(self):
         pass
+
+
+class BulkPillowProcessor(PillowProcessor):
+    """
+    A processor that can also process a whole chunk of changes at once.
+
+    Pillows that are configured with a ``processor_chunk_size`` will call
+    ``process_changes_chunk`` on these processors. All other processors keep
+    getting changes one at a time through ``process_change``.
+    """
+
+    @abstractmethod
+    def process_changes_chunk(self, pillow_instance, changes_chunk):
+        """
+        Process a list of changes. Documents will already have been bulk fetched
+        where the change's document store supports it.
+
+        :return: list of ``(change, exception)`` tuples for the changes that failed.
+                 Raising an exception will cause the pillow to fall back to
+                 processing the chunk one change at a time.
+        """
+        pass
@@ -0,0 +1,94 @@
+import uuid
+
+from django.test import SimpleTestCase
+
+from pillowtop.checkpoints.manager import PillowCheckpoint
+from pillowtop.dao.mock import MockDocumentStore
+from pillowtop.feed.interface import Change
+from pillowtop.feed.mock import MockChangeFeed
+from pillowtop.pillow.interface import ConstructedPillow
+from pillowtop.processors import BulkPillowProcessor
+from pillowtop.processors.sample import TestProcessor
+from pillowtop.utils import ChangeError, bulk_fetch_changes_docs
+
+
+class ChunkTestProcessor(BulkPillowProcessor):
+
+    def __init__(self, fail_ids=None, fail_chunks=False):
+        self.fail_ids = fail_ids or set()
+        self.fail_chunks = fail_chunks
+        self.chunks_seen = []
+        self.changes_seen = []
+
+    def process_change(self, pillow_instance, change):
+        if change.id in self.fail_ids:
+            raise ValueError(change.id)
+        self.changes_seen.append(change)
+
+    def process_changes_chunk(self, pillow_instance, changes_chunk):
+        if self.fail_chunks:
+            raise ValueError('chunk failed')
+        self.chunks_seen.append(changes_chunk)
+        return [
+            ChangeError(change, ValueError(change.id))
+            for change in changes_chunk if change.id in self.fail_ids
+        ]
+
+
+class ChunkedProcessingTest(SimpleTestCase):
+
+    def setUp(self):
+        self.document_store = MockDocumentStore()
+        self.changes = []
+        for i in range(5):
+            doc_id = uuid.uuid4().hex
+            self.document_store.save_document(doc_id, {'_id': doc_id, 'index': i})
+            self.changes.append(Change(doc_id, i, document_store=self.document_store))
+
+    def _get_pillow(self, processors, chunk_size):
+        pillow = ConstructedPillow(
+            name='chunked-test-pillow',
+            checkpoint=PillowCheckpoint('chunked-test-pillow', 'text'),
+            change_feed=MockChangeFeed(self.changes),
+            processor=processors,
+            processor_chunk_size=chunk_size,
+        )
+        pillow.retry_errors = False
+        return pillow
+
+    def test_bulk_fetch_changes_docs(self):
+        bulk_fetch_changes_docs(self.changes)
+        for i, change in enumerate(self.changes):
+            self.assertEqual(i, change.document['index'])
+
+    def test_chunks(self):
+        processor = ChunkTestProcessor()
+        self._get_pillow(processor, chunk_size=2).process_changes(since=0, forever=False)
+        self.assertEqual([2, 2, 1], [len(chunk) for chunk in processor.chunks_seen])
+        self.assertEqual([], processor.changes_seen)
+        for chunk in processor.chunks_seen:
+            for change in chunk:
+                self.assertIsNotNone(change.document)
+
+    def test_non_bulk_processor(self):
+        bulk_processor = ChunkTestProcessor()
+        processor = TestProcessor()
+        self._get_pillow([bulk_processor, processor], chunk_size=3).process_changes(since=0, forever=False)
+        self.assertEqual(2, len(bulk_processor.chunks_seen))
+        self.assertEqual(self.changes, processor.changes_seen)
+
+    def test_failed_changes_skip_later_processors(self):
+        failed_id = self.changes[1].id
+        bulk_processor = ChunkTestProcessor(fail_ids={failed_id})
+        processor = TestProcessor()
+        self._get_pillow([bulk_processor, processor], chunk_size=5).process_changes(since=0, forever=False)
+        self.assertEqual(
+            [change.id for change in self.changes if change.id != failed_id],
+            [change.id for change in processor.changes_seen]
+        )
+
+    def test_fall_back_to_serial_processing(self):
+        processor = ChunkTestProcessor(fail_chunks=True)
+        self._get_pillow(processor, chunk_size=2).process_changes(since=0, forever=False)
+        self.assertEqual([], processor.chunks_seen)
+        self.assertEqual(self.changes, processor.changes_seen)
@@ -12,8 +12,9 @@ from pillowtop.es_utils import INDEX_REINDEX_SETTINGS, INDEX_STANDARD_SETTINGS,
     set_index_reindex_settings, set_index_normal_settings, mapping_exists, initialize_index, \
     initialize_index_and_mapping, assume_alias
 from pillowtop.exceptions import PillowtopIndexingError
-from pillowtop.processors.elastic import send_to_elasticsearch
-from .utils import get_doc_count, get_index_mapping, TEST_INDEX_INFO
+from pillowtop.feed.interface import Change
+from pillowtop.processors.elastic import send_to_elasticsearch, ElasticProcessor, _get_bulk_item_errors
+from .utils import get_doc_count, get_index_mapping, TEST_INDEX_INFO, make_fake_constructed_pillow
 
 
 class ElasticPillowTest(SimpleTestCase):
@@ -248,3 +249,67 @@ class TestSendToElasticsearch(SimpleTestCase):
 
         # attempt to create the same doc twice shouldn't fail
         self._send_to_es_and_check(doc)
+
+
+class TestElasticProcessorChunk(SimpleTestCase):
+
+    def setUp(self):
+        self.es = get_es_new()
+        self.index = TEST_INDEX_INFO.index
+        self.pillow = make_fake_constructed_pillow('test-es-chunk-pillow', 'test-es-chunk-checkpoint')
+
+        with trap_extra_setup(ConnectionError):
+            ensure_index_deleted(self.index)
+            initialize_index_and_mapping(self.es, TEST_INDEX_INFO)
+
+    def tearDown(self):
+        ensure_index_deleted(self.index)
+
+    def _make_change(self, doc, deleted=False):
+        return Change(id=doc['_id'], sequence_id=0, document=doc, deleted=deleted)
+
+    def test_index_and_delete_chunk(self):
+        processor = ElasticProcessor(self.es, TEST_INDEX_INFO)
+        docs = [
+            {'_id': uuid.uuid4().hex, 'doc_type': 'MyCoolDoc', 'property': 'foo'}
+            for i in range(3)
+        ]
+        errors = processor.process_changes_chunk(self.pillow, [self._make_change(doc) for doc in docs])
+        self.assertEqual([], errors)
+        self.assertEqual(3, get_doc_count(self.es, self.index))
+
+        errors = processor.process_changes_chunk(self.pillow, [
+            self._make_change(docs[0], deleted=True),
+            self._make_change({'_id': uuid.uuid4().hex, 'doc_type': 'MyCoolDoc'}, deleted=True),
+        ])
+        self.assertEqual([], errors)
+        self.assertEqual(2, get_doc_count(self.es, self.index))
+
+    def test_filtered_docs_not_indexed(self):
+        processor = ElasticProcessor(
+            self.es, TEST_INDEX_INFO, doc_filter_fn=lambda doc: doc['property'] == 'skip'
+        )
+        changes = [
+            self._make_change({'_id': uuid.uuid4().hex, 'doc_type': 'MyCoolDoc', 'property': prop})
+            for prop in ('skip', 'keep')
+        ]
+        processor.process_changes_chunk(self.pillow, changes)
+        self.assertEqual(1, get_doc_count(self.es, self.index))
+
+
+class TestBulkItemErrors(SimpleTestCase):
+
+    def test_get_bulk_item_errors(self):
+        response = {
+            'errors': True,
+            'items': [
+                {'index': {'_index': 'test', '_type': 'test', '_id': 'ok', 'status': 200}},
+                {'index': {'_index': 'test', '_type': 'test', '_id': 'bad', 'status': 400,
+                           'error': 'MapperParsingException'}},
+                {'delete': {'_index': 'test', '_type': 'test', '_id': 'gone', 'status': 404,
+                            'error': 'not found'}},
+            ]
+        }
+        errors = _get_bulk_item_errors(response)
+        self.assertEqual(['bad'], errors.keys())
+        self.assertIsInstance(errors['bad'], PillowtopIndexingError)
@@ -1,5 +1,5 @@
 from __future__ import division
-from collections import namedtuple
+from collections import namedtuple, defaultdict
 from copy import deepcopy
 from datetime import datetime
 import json
@@ -242,6 +242,46 @@ def prepare_bulk_payloads(bulk_changes, max_size, chunk_size=100):
     return filter(None, payloads)
 
 
+def bulk_fetch_changes_docs(changes):
+    """
+    Fetch the documents for a list of changes with one ``iter_documents`` call per
+    document store instead of one ``get_document`` call per change.
+
+    Changes that already have a document, or whose document could not be bulk
+    fetched, are left untouched and will fall back to ``Change.get_document``.
+    """
+    changes_by_store = defaultdict(list)
+    for change in changes:
+        if change.document is None and change.document_store is not None:
+            changes_by_store[_document_store_key(change)].append(change)
+
+    for store_changes in changes_by_store.values():
+        document_store = store_changes[0].document_store
+        doc_ids = list({change.id for change in store_changes})
+        try:
+            docs_by_id = {
+                doc.get('_id'): doc
+                for doc in document_store.iter_documents(doc_ids)
+            }
+        except NotImplementedError:
+            continue
+
+        for change in store_changes:
+            if change.id in docs_by_id:
+                change.set_document(docs_by_id[change.id])
+
+
+def _document_store_key(change):
+    # document stores are instantiated per change so group them by their source instead
+    if change.metadata is not None:
+        return (
+            change.metadata.data_source_type,
+            change.metadata.data_source_name,
+            change.metadata.domain,
+        )
+    return id(change.document_store)
+
+
 def ensure_matched_revisions(change):
     """
     This function ensures that the document fetched from a change matches the
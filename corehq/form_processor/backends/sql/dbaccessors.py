@@ -294,7 +294,7 @@ class FormAccessorSQL(AbstractFormAccessor):
         return list(XFormAttachmentSQL.objects.raw('SELECT * from get_form_attachments(%s)', [form_id]))
 
     @staticmethod
-    def iter_forms_by_last_modified(start_datetime, end_datetime):
+    def iter_forms_by_last_modified(start_datetime, end_datetime, after_form_id=None):
         '''
         Returns all forms that have been modified within a time range. The start date is
         exclusive while the end date is inclusive (start_datetime, end_datetime].
@@ -303,19 +303,30 @@ class FormAccessorSQL(AbstractFormAccessor):
 
         :param start_datetime: The start date of which modified forms must be greater than
         :param end_datetime: The end date of which modified forms must be less than or equal to
+        :param after_form_id: (optional) Only return the forms with IDs after this one
 
-        :returns: An iterator of XFormInstanceSQL objects
+        :returns: An iterator of XFormInstanceSQL objects, ordered by form_id's code points
         '''
-        from corehq.sql_db.util import run_query_across_partitioned_databases
+        from corehq.sql_db.util import collate_c, run_query_across_partitioned_databases
 
         annotate = {
             'last_modified': Greatest('received_on', 'edited_on', 'deleted_on'),
         }
-
+        q_expression = Q(last_modified__gt=start_datetime, last_modified__lte=end_datetime)
+        if after_form_id:
+            # compared in the same order as the forms are returned in
+            annotate['form_id_c'] = collate_c('form_id')
+            q_expression &= Q(form_id_c__gt=after_form_id)
+
+        # ordered so that the forms are always returned in the same order
+        # e.g. to resume loading them into the warehouse.
+        # Streamed, since neither the filter nor the sort is covered by an index
         return run_query_across_partitioned_databases(
             XFormInstanceSQL,
-            Q(last_modified__gt=start_datetime),
+            q_expression,
             annotate=annotate,
+            order_by=['form_id'],
+            stream=True,
         )
 
     @staticmethod
@@ -867,6 +878,38 @@ class CaseAccessorSQL(AbstractCaseAccessor):
                     attachment.delete_content()
                 case.clear_tracked_models()
 
+        closed_status = case.closed_status
+        if closed_status != case.saved_closed_status:
+            CaseAccessorSQL.update_case_index_referenced_closed(case.domain, [case.case_id], closed_status)
+        case.saved_closed_status = closed_status
+
+    @staticmethod
+    def update_case_index_referenced_closed(domain, case_ids, closed):
+        """
+        Update the closed status of the cases on all indices that reference them
+        """
+        assert isinstance(case_ids, list), case_ids
+        with get_cursor(CommCareCaseIndexSQL) as cursor:
+            cursor.execute(
+                'SELECT update_case_index_referenced_closed(%s, %s, %s)',
+                [domain, case_ids, closed]
+            )
+
+    @staticmethod
+    def get_case_closed_status(domain, case_ids):
+        """
+        :return: dict of case_id -> True if the case is closed or deleted. Cases that
+                 don't exist are not included.
+        """
+        assert isinstance(case_ids, list), case_ids
+        with get_cursor(CommCareCaseSQL) as cursor:
+            cursor.execute(
+                'SELECT case_id, closed FROM get_case_closed_status(%s, %s)',
+                [domain, case_ids]
+            )
+            results = fetchall_as_namedtuple(cursor)
+            return {result.case_id: result.closed for result in results}
+
     @staticmethod
     def get_open_case_ids_for_owner(domain, owner_id):
         return CaseAccessorSQL._get_case_ids_in_domain(domain, owner_ids=[owner_id], is_closed=False)
@@ -968,7 +1011,11 @@ class CaseAccessorSQL(AbstractCaseAccessor):
                 [domain, case_ids]
             )
             results = fetchall_as_namedtuple(cursor)
-            return sum([result.affected_count for result in results])
+            affected_count = sum([result.affected_count for result in results])
+
+        # the cases could be open or closed so their status is no longer known
+        CaseAccessorSQL.update_case_index_referenced_closed(domain, case_ids, None)
+        return affected_count
 
     @staticmethod
     def get_deleted_case_ids_by_owner(domain, owner_id):
@@ -989,6 +1036,7 @@ class CaseAccessorSQL(AbstractCaseAccessor):
             results = fetchall_as_namedtuple(cursor)
             affected_count = sum([result.affected_count for result in results])
 
+        CaseAccessorSQL.update_case_index_referenced_closed(domain, case_ids, True)
         for case_id in case_ids:
             publish_case_deleted(domain, case_id)
 
@@ -19,8 +19,9 @@ from couchforms.const import ATTACHMENT_NAME
 
 from corehq.form_processor.models import (
     XFormInstanceSQL, XFormAttachmentSQL, CaseTransaction,
-    CommCareCaseSQL, FormEditRebuild, Attachment)
+    CommCareCaseSQL, CommCareCaseIndexSQL, FormEditRebuild, Attachment)
 from corehq.form_processor.utils import extract_meta_instance_id, extract_meta_user_id
+from dimagi.utils.couch import release_lock
 
 
 class FormProcessorSQL(object):
@@ -74,24 +75,71 @@ class FormProcessorSQL(object):
 
     @classmethod
     def save_processed_models(cls, processed_forms, cases=None, stock_result=None, publish_to_kafka=True):
-        with transaction.atomic():
-            logging.debug('Beginning atomic commit\n')
-            # Save deprecated form first to avoid ID conflicts
-            if processed_forms.deprecated:
-                FormAccessorSQL.save_deprecated_form(processed_forms.deprecated)
-
-            FormAccessorSQL.save_new_form(processed_forms.submitted)
-            if cases:
-                for case in cases:
-                    CaseAccessorSQL.save_case(case)
-
-            if stock_result:
-                ledgers_to_save = stock_result.models_to_save
-                LedgerAccessorSQL.save_ledger_values(ledgers_to_save, processed_forms.deprecated)
+        referenced_case_locks = cls._set_index_referenced_closed(cases) if cases else []
+        try:
+            with transaction.atomic():
+                logging.debug('Beginning atomic commit\n')
+                # Save deprecated form first to avoid ID conflicts
+                if processed_forms.deprecated:
+                    FormAccessorSQL.save_deprecated_form(processed_forms.deprecated)
+
+                FormAccessorSQL.save_new_form(processed_forms.submitted)
+                if cases:
+                    for case in cases:
+                        CaseAccessorSQL.save_case(case)
+
+                if stock_result:
+                    ledgers_to_save = stock_result.models_to_save
+                    LedgerAccessorSQL.save_ledger_values(ledgers_to_save, processed_forms.deprecated)
+        finally:
+            for lock in referenced_case_locks:
+                release_lock(lock, True)
 
         if publish_to_kafka:
             cls._publish_changes(processed_forms, cases, stock_result)
 
+    @staticmethod
+    def _set_index_referenced_closed(cases):
+        """
+        Set the closed status of the referenced case on any new or updated indices.
+
+        The cases being saved are already locked. The other referenced cases are
+        locked here so that they can't be closed or reopened before the indices are
+        saved, since the status that's saved with their indices is updated by
+        whatever saves them next. A referenced case that can't be locked right away
+        is left with an unknown status rather than waiting for its lock.
+
+        :return: the locks of the referenced cases, to be released once the cases
+                 have been saved
+        """
+        indices = [
+            index
+            for case in cases
+            for index in case.get_live_tracked_models(CommCareCaseIndexSQL)
+            if index.referenced_closed is None
+        ]
+        if not indices:
+            return []
+
+        closed_status = {case.case_id: case.closed_status for case in cases}
+        locks = []
+        locked_ids = []
+        for case_id in {index.referenced_id for index in indices} - set(closed_status):
+            lock = CommCareCaseSQL.get_obj_lock_by_id(case_id)
+            try:
+                acquired = lock.acquire(blocking=False)
+            except redis.RedisError:
+                acquired = False
+            if acquired:
+                locks.append(lock)
+                locked_ids.append(case_id)
+        if locked_ids:
+            closed_status.update(CaseAccessorSQL.get_case_closed_status(cases[0].domain, locked_ids))
+
+        for index in indices:
+            index.referenced_closed = closed_status.get(index.referenced_id)
+        return locks
+
     @staticmethod
     def _publish_changes(processed_forms, cases, stock_result):
         # todo: form deprecations?
@@ -227,7 +275,12 @@ class FormProcessorSQL(object):
             return None
 
         case.server_modified_on = rebuild_transaction.server_date
-        CaseAccessorSQL.save_case(case)
+        referenced_case_locks = FormProcessorSQL._set_index_referenced_closed([case])
+        try:
+            CaseAccessorSQL.save_case(case)
+        finally:
+            for lock in referenced_case_locks:
+                release_lock(lock, True)
         publish_case_saved(case)
         return case
 
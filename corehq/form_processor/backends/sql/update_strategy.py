@@ -159,6 +159,9 @@ class SqlCaseUpdateStrategy(UpdateStrategy):
                 else:
                     # update
                     index = self.case.get_index(index_update.identifier)
+                    if index.referenced_id != index_update.referenced_id:
+                        # closed status gets set for the new referenced case when the case is saved
+                        index.referenced_closed = None
                     index.referenced_type = index_update.referenced_type
                     index.referenced_id = index_update.referenced_id
                     index.relationship = index_update.relationship
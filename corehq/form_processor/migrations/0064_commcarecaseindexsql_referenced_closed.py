@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_processor', '0063_auto_20160908_0954'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commcarecaseindexsql',
+            name='referenced_closed',
+            field=models.NullBooleanField(),
+            preserve_default=True,
+        ),
+    ]
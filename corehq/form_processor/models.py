@@ -611,11 +611,26 @@ class CommCareCaseSQL(PartitionedModel, models.Model, RedisLockableMixIn,
 
     case_json = JSONField(default=dict)
 
+    # closed status of the case when it was last loaded or saved
+    saved_closed_status = False
+
     def natural_key(self):
         # necessary for dumping models from a sharded DB so that we exclude the
         # SQL 'id' field which won't be unique across all the DB's
         return self.case_id
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        case = super(CommCareCaseSQL, cls).from_db(db, field_names, values)
+        # keep track of the saved closed status so that the indices referencing
+        # this case can be updated when it changes (see CommCareCaseIndexSQL.referenced_closed)
+        case.saved_closed_status = case.closed_status
+        return case
+
+    @property
+    def closed_status(self):
+        return self.closed or self.deleted
+
     @property
     def doc_type(self):
         dt = 'CommCareCase'
@@ -993,6 +1008,9 @@ class CommCareCaseIndexSQL(PartitionedModel, models.Model, SaveStateMixin):
     referenced_id = models.CharField(max_length=255, default=None)
     referenced_type = models.CharField(max_length=255, default=None)
     relationship_id = models.PositiveSmallIntegerField(choices=RELATIONSHIP_CHOICES)
+    # denormalized closed status of the referenced case (closed or deleted)
+    # None if the status is not known e.g. the referenced case doesn't exist (yet)
+    referenced_closed = models.NullBooleanField()
 
     def natural_key(self):
         # necessary for dumping models from a sharded DB so that we exclude the
@@ -519,6 +519,79 @@ class CaseAccessorTestsSQL(TestCase):
             {case1.case_id: date1, case2.case_id: date2}
         )
 
+    def test_get_case_closed_status(self):
+        open_case = _create_case()
+        closed_case = _create_case(closed=True)
+        deleted_case = _create_case()
+        CaseAccessorSQL.soft_delete_cases(DOMAIN, [deleted_case.case_id])
+
+        self.assertEqual(
+            CaseAccessorSQL.get_case_closed_status(
+                DOMAIN, [open_case.case_id, closed_case.case_id, deleted_case.case_id, 'missing']
+            ),
+            {open_case.case_id: False, closed_case.case_id: True, deleted_case.case_id: True}
+        )
+
+    def test_index_referenced_closed(self):
+        host = _create_case()
+        case = _create_case()
+        case.track_create(CommCareCaseIndexSQL(
+            case=case,
+            identifier='host',
+            referenced_type='host',
+            referenced_id=host.case_id,
+            relationship_id=CommCareCaseIndexSQL.EXTENSION
+        ))
+        locks = FormProcessorSQL._set_index_referenced_closed([case])
+        CaseAccessorSQL.save_case(case)
+        for lock in locks:
+            lock.release()
+
+        def _get_referenced_closed():
+            [index] = CaseAccessorSQL.get_indices(DOMAIN, case.case_id)
+            return index.referenced_closed
+
+        self.assertIs(_get_referenced_closed(), False)
+
+        host.closed = True
+        CaseAccessorSQL.save_case(host)
+        self.assertIs(_get_referenced_closed(), True)
+
+        host = CaseAccessorSQL.get_case(host.case_id)
+        host.closed = False
+        CaseAccessorSQL.save_case(host)
+        self.assertIs(_get_referenced_closed(), False)
+
+        CaseAccessorSQL.soft_delete_cases(DOMAIN, [host.case_id])
+        self.assertIs(_get_referenced_closed(), True)
+
+    def test_index_referenced_closed_locked_case(self):
+        host = _create_case()
+        case = _create_case()
+        case.track_create(CommCareCaseIndexSQL(
+            case=case,
+            identifier='host',
+            referenced_type='host',
+            referenced_id=host.case_id,
+            relationship_id=CommCareCaseIndexSQL.EXTENSION
+        ))
+        # e.g. a form that closes the host is being processed
+        host_lock = CommCareCaseSQL.get_obj_lock_by_id(host.case_id)
+        host_lock.acquire()
+        try:
+            self.assertEqual([], FormProcessorSQL._set_index_referenced_closed([case]))
+        finally:
+            host_lock.release()
+        CaseAccessorSQL.save_case(case)
+
+        [index] = CaseAccessorSQL.get_indices(DOMAIN, case.case_id)
+        self.assertIsNone(index.referenced_closed)
+
+    def test_index_referenced_closed_missing_case(self):
+        case, index = _create_case_with_index('missing-case')
+        [index] = CaseAccessorSQL.get_indices(DOMAIN, case.case_id)
+        self.assertIsNone(index.referenced_closed)
+
     def test_get_all_reverse_indices_info(self):
         # Create case and indexes
         case = _create_case()
@@ -84,14 +84,28 @@ class FormAccessorTestsSQL(TestCase):
             received_on=datetime(2015, 1, 1),
             edited_on=datetime(2017, 1, 1),
         )
+        # Test that the end date is inclusive
+        form4 = create_form_for_test(DOMAIN, received_on=end)
+        create_form_for_test(DOMAIN, received_on=datetime(2019, 1, 1))
 
         forms = list(FormAccessorSQL.iter_forms_by_last_modified(start, end))
-        self.assertEqual(3, len(forms))
+        self.assertEqual(4, len(forms))
         self.assertEqual(
-            {form1.form_id, form2.form_id, form3.form_id},
+            {form1.form_id, form2.form_id, form3.form_id, form4.form_id},
             {form.form_id for form in forms},
         )
 
+    def test_iter_forms_by_last_modified_after_form_id(self):
+        start = datetime(2016, 1, 1)
+        end = datetime(2018, 1, 1)
+        form_ids = sorted(
+            create_form_for_test(DOMAIN, received_on=datetime(2017, 1, 1)).form_id
+            for i in range(3)
+        )
+
+        forms = FormAccessorSQL.iter_forms_by_last_modified(start, end, after_form_id=form_ids[0])
+        self.assertEqual([form.form_id for form in forms], form_ids[1:])
+
     def test_get_with_attachments(self):
         form = create_form_for_test(DOMAIN)
         with self.assertNumQueries(1, using=db_for_read_write(XFormAttachmentSQL)):
@@ -144,6 +144,7 @@ def case_index_adapter(index):
         index.referenced_type,
         index.relationship_id,
         index.case_id,
+        index.referenced_closed,
     ]
     return ObjectAdapter(fields, CommCareCaseIndexSQL_DB_TABLE)
 
@@ -6,6 +6,14 @@ MIN_RETRY_WAIT = timedelta(minutes=60)
 CHECK_REPEATERS_INTERVAL = timedelta(minutes=5)
 CHECK_REPEATERS_KEY = 'check-repeaters-key'
 
+# repeat records of domains with the BATCHED_REPEAT_RECORDS toggle are sent in
+# batches of up to this many records per repeater each time repeaters are checked
+REPEATER_BATCH_SIZE = 1000
+DEFAULT_REPEATER_MAX_IN_FLIGHT = 4
+# stop sending a repeater's records for a while after this many consecutive failed attempts
+REPEATER_CIRCUIT_BREAKER_THRESHOLD = 10
+REPEATER_CIRCUIT_BREAKER_WAIT = timedelta(minutes=30)
+
 POST_TIMEOUT = 45  # seconds
 
 RECORD_PENDING_STATE = 'PENDING'
@@ -5,6 +5,7 @@ import warnings
 
 from django.utils.translation import ugettext_lazy as _
 from requests.auth import HTTPBasicAuth, HTTPDigestAuth
+from requests.structures import CaseInsensitiveDict
 from requests.exceptions import Timeout, ConnectionError
 from couchdbkit.exceptions import ResourceNotFound
 
@@ -41,6 +42,7 @@ from .const import (
     RECORD_PENDING_STATE,
     RECORD_CANCELLED_STATE,
     POST_TIMEOUT,
+    DEFAULT_REPEATER_MAX_IN_FLIGHT,
 )
 from .exceptions import RequestConnectionError
 from .utils import get_all_repeater_types
@@ -77,6 +79,8 @@ class Repeater(QuickCachedDocumentMixin, Document, UnicodeMixIn):
     auth_type = StringProperty(choices=(BASIC_AUTH, DIGEST_AUTH), required=False)
     username = StringProperty()
     password = StringProperty()
+    # the maximum number of concurrent requests when sending batches of repeat records
+    max_in_flight = IntegerProperty(default=DEFAULT_REPEATER_MAX_IN_FLIGHT)
     friendly_name = _("Data")
 
     payload_generator_classes = ()
@@ -228,16 +232,22 @@ class Repeater(QuickCachedDocumentMixin, Document, UnicodeMixIn):
             return HTTPDigestAuth(self.username, self.password)
         return None
 
-    def send_request(self, repeat_record, payload):
+    def send_request(self, repeat_record, payload, session=None):
+        """
+        :param session: (optional) A requests.Session to send the request with, so that
+        connections to the repeater's URL can be reused
+        """
         headers = self.get_headers(repeat_record)
         auth = self.get_auth()
         url = self.get_url(repeat_record)
+        if session is not None:
+            return _session_post(session, payload, url, headers=headers, timeout=POST_TIMEOUT, auth=auth)
         return simple_post(payload, url, headers=headers, timeout=POST_TIMEOUT, auth=auth)
 
-    def fire_for_record(self, repeat_record):
+    def fire_for_record(self, repeat_record, session=None):
         payload = self.get_payload(repeat_record)
         try:
-            response = self.send_request(repeat_record, payload)
+            response = self.send_request(repeat_record, payload, session=session)
         except (Timeout, ConnectionError) as error:
             log_repeater_timeout_in_datadog(self.domain)
             return self.handle_response(RequestConnectionError(error), repeat_record)
@@ -356,7 +366,7 @@ class CaseRepeater(Repeater):
 class SOAPRepeaterMixin(Repeater):
     operation = StringProperty()
 
-    def send_request(self, repeat_record, payload):
+    def send_request(self, repeat_record, payload, session=None):
         return perform_SOAP_operation(payload, self.url, self.operation)
 
 
@@ -424,6 +434,14 @@ class LocationRepeater(Repeater):
         return "forwarding locations to: %s" % self.url
 
 
+def _session_post(session, data, url, headers=None, timeout=None, auth=None):
+    # the same default content type as simple_post
+    request_headers = CaseInsensitiveDict({"content-type": "text/xml"})
+    if headers:
+        request_headers.update(headers)
+    return session.post(url, data, headers=request_headers, timeout=timeout, auth=auth)
+
+
 class RepeatRecordAttempt(DocumentSchema):
     cancelled = BooleanProperty(default=False)
     datetime = DateTimeProperty()
@@ -570,11 +588,16 @@ class RepeatRecord(Document):
             succeeded=False,
         )
 
-    def fire(self, force_send=False):
+    def fire(self, force_send=False, session=None, save=True):
+        """
+        :param session: (optional) A requests.Session to send the request with
+        :param save: Whether to save the record after the attempt. Records that
+        aren't saved here must be saved by the caller e.g. in bulk.
+        """
         if self.try_now() or force_send:
             self.overall_tries += 1
             try:
-                attempt = self.repeater.fire_for_record(self)
+                attempt = self.repeater.fire_for_record(self, session=session)
             except Exception as e:
                 log_repeater_error_in_datadog(self.domain, status_code=None,
                                               repeater_type=self.repeater_type)
@@ -585,7 +608,8 @@ class RepeatRecord(Document):
                 # that'll only happen if fire_for_record raise a non-Exception exception (e.g. SIGINT)
                 # or handle_payload_exception raises an exception. I'm okay with that. -DMR
                 self.add_attempt(attempt)
-                self.save()
+                if save:
+                    self.save()
 
     @staticmethod
     def _format_response(response):
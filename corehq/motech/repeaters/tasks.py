@@ -1,13 +1,23 @@
+import threading
+from collections import defaultdict
 from datetime import datetime
+from Queue import Queue, Empty
+
+import requests
+from requests.adapters import HTTPAdapter
 from celery.schedules import crontab
-from couchdbkit import ResourceNotFound
+from couchdbkit import BulkSaveError, ResourceNotFound
 
 from django.conf import settings
+from django.db import connections
 from celery.task import periodic_task, task
 from celery.utils.log import get_task_logger
 from redis.exceptions import LockError
-from corehq.util.datadog.gauges import datadog_gauge_task
+from corehq.toggles import BATCHED_REPEAT_RECORDS
+from corehq.util.concurrent import iter_concurrently
+from corehq.util.datadog.gauges import datadog_counter, datadog_gauge_task
 from dimagi.utils.couch.cache.cache_core import get_redis_client
+from dimagi.utils.couch.database import iter_docs
 from dimagi.utils.couch.undo import DELETED_SUFFIX
 
 from corehq.motech.repeaters.dbaccessors import iterate_repeat_records, \
@@ -16,7 +26,11 @@ from corehq.motech.repeaters.const import (
     CHECK_REPEATERS_INTERVAL,
     CHECK_REPEATERS_KEY,
     RECORD_PENDING_STATE,
-    RECORD_FAILURE_STATE)
+    RECORD_FAILURE_STATE,
+    REPEATER_BATCH_SIZE,
+    REPEATER_CIRCUIT_BREAKER_THRESHOLD,
+    REPEATER_CIRCUIT_BREAKER_WAIT,
+)
 
 logging = get_task_logger(__name__)
 
@@ -39,6 +53,8 @@ def check_repeaters():
     if not check_repeater_lock.acquire(blocking=False):
         return
 
+    # repeater_id -> ids of the records to send in a batch
+    batches = defaultdict(list)
     for record in iterate_repeat_records(start):
         now = datetime.utcnow()
         lock_key = _get_repeat_record_lock_key(record)
@@ -46,12 +62,28 @@ def check_repeaters():
         if now > cutoff:
             break
 
+        if BATCHED_REPEAT_RECORDS.enabled(record.domain):
+            if len(batches[record.repeater_id]) < REPEATER_BATCH_SIZE:
+                batches[record.repeater_id].append(record._id)
+            continue
+
         lock = redis_client.lock(lock_key, timeout=60 * 60 * 48)
         if not lock.acquire(blocking=False):
             continue
 
         process_repeat_record.delay(record)
 
+    for repeater_id, record_ids in batches.items():
+        if _is_repeater_circuit_open(redis_client, repeater_id):
+            continue
+        # only one batch per repeater at a time, so that it never has more than
+        # the repeater's max_in_flight requests in progress
+        lock = redis_client.lock(_get_repeater_batch_lock_key(repeater_id), timeout=60 * 60 * 6)
+        if not lock.acquire(blocking=False):
+            continue
+
+        process_repeater_batch.delay(repeater_id, record_ids)
+
     try:
         check_repeater_lock.release()
     except LockError:
@@ -85,6 +117,148 @@ def process_repeat_record(repeat_record):
         logging.exception('Failed to process repeat record: {}'.format(repeat_record._id))
 
 
+@task(queue=settings.CELERY_REPEAT_RECORD_QUEUE)
+def process_repeater_batch(repeater_id, record_ids):
+    """
+    Send a batch of the repeat records of a single repeater.
+
+    Up to ``repeater.max_in_flight`` records are sent at a time, reusing the
+    connections to the repeater's URL, and the records are saved in bulk.
+    If too many attempts fail in a row the repeater's circuit breaker is
+    opened, and the rest of its records are left to be sent after
+    REPEATER_CIRCUIT_BREAKER_WAIT.
+    """
+    redis_client = get_redis_client().client.get_client()
+    try:
+        _process_repeater_batch(redis_client, repeater_id, record_ids)
+    finally:
+        redis_client.delete(_get_repeater_batch_lock_key(repeater_id))
+
+
+def _process_repeater_batch(redis_client, repeater_id, record_ids):
+    from corehq.motech.repeaters.models import Repeater, RepeatRecord
+
+    try:
+        repeater = Repeater.get(repeater_id)
+    except ResourceNotFound:
+        repeater = None
+
+    records_to_save = []
+    records_to_send = []
+    now = datetime.utcnow()
+    for doc in iter_docs(RepeatRecord.get_db(), record_ids):
+        record = RepeatRecord.wrap(doc)
+        if record.doc_type.endswith(DELETED_SUFFIX) or record.cancelled or record.succeeded:
+            continue
+        if record.next_check and record.next_check > now:
+            # the record was sent since the batch was queued
+            continue
+        if record.state == RECORD_FAILURE_STATE and record.overall_tries >= record.max_possible_tries:
+            record.cancel()
+            records_to_save.append(record)
+        elif repeater is None:
+            record.cancel()
+            records_to_save.append(record)
+        elif repeater.doc_type.endswith(DELETED_SUFFIX):
+            record.doc_type += DELETED_SUFFIX
+            records_to_save.append(record)
+        else:
+            records_to_send.append(record)
+
+    if records_to_send:
+        records_to_save.extend(_send_repeat_records(redis_client, repeater, records_to_send))
+
+    if records_to_save:
+        try:
+            RepeatRecord.bulk_save(records_to_save)
+        except BulkSaveError as e:
+            # another process saved some of the records, so its changes win
+            logging.error('Failed to save {} repeat records for repeater {}'.format(
+                len(e.errors), repeater_id))
+
+
+def _send_repeat_records(redis_client, repeater, records):
+    """
+    :return: the records that were sent
+    """
+    circuit_open = threading.Event()
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=repeater.max_in_flight)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    records_to_send = Queue()
+    for record in records:
+        records_to_send.put(record)
+
+    def fire(record):
+        """
+        :return: whether the repeater's endpoint failed to receive the record,
+                 or None if the record wasn't sent
+        """
+        try:
+            record.fire(session=session, save=False)
+        except Exception:
+            # the payload couldn't be generated, which isn't the endpoint's fault
+            logging.exception('Failed to process repeat record: {}'.format(record._id))
+            return None
+        return not record.succeeded
+
+    def send_records():
+        try:
+            while not circuit_open.is_set():
+                try:
+                    record = records_to_send.get_nowait()
+                except Empty:
+                    return
+                yield record, fire(record)
+        finally:
+            # database connections are per thread, so close this thread's once it's done
+            connections.close_all()
+
+    sent_records = []
+    consecutive_failures = 0
+    workers = [send_records() for i in range(max(repeater.max_in_flight, 1))]
+    try:
+        for record, endpoint_failed in iter_concurrently(workers):
+            sent_records.append(record)
+            if endpoint_failed is None:
+                continue
+            if endpoint_failed:
+                consecutive_failures += 1
+            else:
+                consecutive_failures = 0
+            if consecutive_failures >= REPEATER_CIRCUIT_BREAKER_THRESHOLD and not circuit_open.is_set():
+                circuit_open.set()
+                _open_repeater_circuit(redis_client, repeater)
+    finally:
+        # don't send any more records if we stopped early
+        circuit_open.set()
+        session.close()
+    return sent_records
+
+
+def _open_repeater_circuit(redis_client, repeater):
+    redis_client.set(
+        _get_repeater_circuit_key(repeater._id),
+        1,
+        ex=int(REPEATER_CIRCUIT_BREAKER_WAIT.total_seconds()),
+    )
+    datadog_counter('commcare.repeaters.circuit_opened', tags=[u'domain:{}'.format(repeater.domain)])
+
+
+def _is_repeater_circuit_open(redis_client, repeater_id):
+    return redis_client.exists(_get_repeater_circuit_key(repeater_id))
+
+
+def _get_repeater_circuit_key(repeater_id):
+    return 'repeater_circuit_open-{}'.format(repeater_id)
+
+
+def _get_repeater_batch_lock_key(repeater_id):
+    return 'repeater_batch_in_progress-{}'.format(repeater_id)
+
+
 def _get_repeat_record_lock_key(record):
     """
     Including the rev in the key means that the record will be unlocked for processing
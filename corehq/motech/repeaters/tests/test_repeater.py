@@ -16,7 +16,7 @@ from corehq.apps.receiverwrapper.exceptions import DuplicateFormatException, Ign
 from corehq.apps.receiverwrapper.util import submit_form_locally
 from corehq.motech.repeaters.repeater_generators import FormRepeaterXMLPayloadGenerator, RegisterGenerator, \
     BasePayloadGenerator
-from corehq.motech.repeaters.tasks import check_repeaters
+from corehq.motech.repeaters.tasks import check_repeaters, _get_repeater_circuit_key
 from corehq.motech.repeaters.models import (
     CaseRepeater,
     FormRepeater,
@@ -29,6 +29,8 @@ from corehq.motech.repeaters.dbaccessors import delete_all_repeat_records, delet
 from corehq.apps.users.models import CommCareUser
 from corehq.form_processor.tests.utils import run_with_all_backends, FormProcessorTestUtils
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors, FormAccessors
+from corehq.util.test_utils import flag_enabled
+from dimagi.utils.couch.cache.cache_core import get_redis_client
 from couchforms.const import DEVICE_LOG_XMLNS
 from dimagi.utils.parsing import json_format_datetime
 
@@ -221,6 +223,60 @@ class RepeaterTest(BaseRepeaterTest):
             check_repeaters()
             self.assertEqual(mock_fire.call_count, 0)
 
+    @run_with_all_backends
+    @flag_enabled('BATCHED_REPEAT_RECORDS')
+    def test_check_repeat_records_in_batches(self):
+        self.assertEqual(len(RepeatRecord.all()), 2)
+
+        with patch('corehq.motech.repeaters.models._session_post',
+                   return_value=MockResponse(status_code=200, reason='')) as mock_post:
+            check_repeaters()
+            self.assertEqual(mock_post.call_count, 2)
+
+        with patch('corehq.motech.repeaters.models._session_post') as mock_post:
+            check_repeaters()
+            self.assertEqual(mock_post.call_count, 0)
+
+    @run_with_all_backends
+    @flag_enabled('BATCHED_REPEAT_RECORDS')
+    def test_repeater_circuit_breaker(self):
+        redis_client = get_redis_client().client.get_client()
+        for repeater in (self.case_repeater, self.form_repeater):
+            self.addCleanup(redis_client.delete, _get_repeater_circuit_key(repeater._id))
+        self.assertEqual(len(RepeatRecord.all()), 2)
+
+        # each repeater's only record fails, which is enough to trip its circuit breaker
+        with patch('corehq.motech.repeaters.tasks.REPEATER_CIRCUIT_BREAKER_THRESHOLD', 1), \
+                patch('corehq.motech.repeaters.models._session_post',
+                      return_value=MockResponse(status_code=500, reason='')) as mock_post:
+            check_repeaters()
+            self.assertEqual(mock_post.call_count, 2)
+
+        # make the records due again
+        for record in RepeatRecord.all(due_before=datetime.utcnow() + MIN_RETRY_WAIT * 2):
+            record.next_check = datetime.utcnow()
+            record.save()
+
+        with patch('corehq.motech.repeaters.models._session_post') as mock_post:
+            check_repeaters()
+            self.assertEqual(mock_post.call_count, 0)
+
+    @run_with_all_backends
+    @flag_enabled('BATCHED_REPEAT_RECORDS')
+    def test_payload_errors_dont_trip_circuit_breaker(self):
+        redis_client = get_redis_client().client.get_client()
+        for repeater in (self.case_repeater, self.form_repeater):
+            self.addCleanup(redis_client.delete, _get_repeater_circuit_key(repeater._id))
+
+        with patch('corehq.motech.repeaters.tasks.REPEATER_CIRCUIT_BREAKER_THRESHOLD', 1), \
+                patch('corehq.motech.repeaters.models.Repeater.get_payload', side_effect=Exception('bad doc')), \
+                patch('corehq.motech.repeaters.models._session_post') as mock_post:
+            check_repeaters()
+            self.assertEqual(mock_post.call_count, 0)
+
+        for repeater in (self.case_repeater, self.form_repeater):
+            self.assertFalse(redis_client.exists(_get_repeater_circuit_key(repeater._id)))
+
     @run_with_all_backends
     def test_repeat_record_status_check(self):
         self.assertEqual(len(RepeatRecord.all()), 2)
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from corehq.sql_db.operations import RawSQLMigration
+
+migrator = RawSQLMigration(('corehq', 'sql_accessors', 'sql_templates'), {})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_processor', '0064_commcarecaseindexsql_referenced_closed'),
+        ('sql_accessors', '0046_livequery_sql'),
+    ]
+
+    operations = [
+        migrator.get_migration('save_case_and_related_models_3.sql'),
+        migrator.get_migration('update_case_index_referenced_closed.sql'),
+        migrator.get_migration('get_case_closed_status.sql'),
+    ]
@@ -0,0 +1,15 @@
+DROP FUNCTION IF EXISTS get_case_closed_status(TEXT, TEXT[]);
+
+CREATE FUNCTION get_case_closed_status(
+    domain_name TEXT,
+    case_ids_array TEXT[]
+) RETURNS TABLE (case_id VARCHAR(255), closed BOOLEAN) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT case_table.case_id, (case_table.closed OR case_table.deleted) AS closed
+    FROM form_processor_commcarecasesql AS case_table
+    WHERE
+        case_table.domain = domain_name
+        AND case_table.case_id = ANY(case_ids_array);
+END;
+$$ LANGUAGE plpgsql;
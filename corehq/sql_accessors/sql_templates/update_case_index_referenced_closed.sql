@@ -0,0 +1,17 @@
+DROP FUNCTION IF EXISTS update_case_index_referenced_closed(TEXT, TEXT[], BOOLEAN);
+
+CREATE FUNCTION update_case_index_referenced_closed(
+    domain_name TEXT,
+    referenced_ids TEXT[],
+    p_referenced_closed BOOLEAN,
+    affected_count OUT INTEGER) AS $$
+BEGIN
+    UPDATE form_processor_commcarecaseindexsql SET
+        referenced_closed = p_referenced_closed
+    WHERE
+        domain = domain_name
+        AND referenced_id = ANY(referenced_ids)
+        AND referenced_closed IS DISTINCT FROM p_referenced_closed;
+    GET DIAGNOSTICS affected_count = ROW_COUNT;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,56 @@
+from django.db.models import Q
+from django.test import TestCase
+from mock import patch
+
+from corehq.form_processor.models import XFormInstanceSQL
+from corehq.form_processor.tests.utils import FormProcessorTestUtils, create_form_for_test, use_sql_backend
+from corehq.sql_db.util import run_query_across_partitioned_databases
+
+DOMAIN = 'partitioned-query'
+
+
+@use_sql_backend
+@patch('corehq.sql_db.util.PARTITIONED_QUERY_PAGE_SIZE', 2)
+class PartitionedQueryTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(PartitionedQueryTest, cls).setUpClass()
+        cls.form_ids = sorted(create_form_for_test(DOMAIN).form_id for i in range(5))
+
+    @classmethod
+    def tearDownClass(cls):
+        FormProcessorTestUtils.delete_all_sql_forms(DOMAIN)
+        super(PartitionedQueryTest, cls).tearDownClass()
+
+    def test_ordered(self):
+        forms = run_query_across_partitioned_databases(XFormInstanceSQL, Q(domain=DOMAIN), order_by=['form_id'])
+        self.assertEqual([form.form_id for form in forms], self.form_ids)
+
+    def test_ordered_by_several_fields(self):
+        forms = run_query_across_partitioned_databases(
+            XFormInstanceSQL, Q(domain=DOMAIN), order_by=['domain', 'form_id']
+        )
+        self.assertEqual([form.form_id for form in forms], self.form_ids)
+
+    def test_ordered_values(self):
+        results = run_query_across_partitioned_databases(
+            XFormInstanceSQL, Q(domain=DOMAIN), values=['domain'], order_by=['form_id']
+        )
+        self.assertEqual(list(results), [DOMAIN] * 5)
+
+    def test_unordered(self):
+        form_ids = run_query_across_partitioned_databases(XFormInstanceSQL, Q(domain=DOMAIN), values=['form_id'])
+        self.assertEqual(sorted(form_ids), self.form_ids)
+
+    def test_streamed(self):
+        forms = run_query_across_partitioned_databases(
+            XFormInstanceSQL, Q(domain=DOMAIN), order_by=['form_id'], stream=True
+        )
+        self.assertEqual([form.form_id for form in forms], self.form_ids)
+
+    def test_streamed_values(self):
+        form_ids = run_query_across_partitioned_databases(
+            XFormInstanceSQL, Q(domain=DOMAIN), values=['form_id'], order_by=['form_id'], stream=True
+        )
+        self.assertEqual(list(form_ids), self.form_ids)
@@ -1,11 +1,27 @@
+import itertools
+import operator
+import time
+import uuid
 from corehq.form_processor.backends.sql.dbaccessors import ShardAccessor
 from corehq.sql_db.config import partition_config
+from corehq.util.concurrent import iter_concurrently, merge_sorted
+from corehq.util.datadog.gauges import datadog_histogram
 from django.conf import settings
 from django import db
+from django.db import transaction
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import CharField, F, Func, Q, TextField
 from django.db.utils import InterfaceError as DjangoInterfaceError
 from functools import wraps
+from operator import attrgetter, itemgetter
 from psycopg2._psycopg import InterfaceError as Psycopg2InterfaceError
 
+# number of results fetched from each database at a time when querying all of them
+PARTITIONED_QUERY_PAGE_SIZE = 1000
+
+# number of results to hold in memory for each database when querying them concurrently
+PARTITIONED_QUERY_BUFFER_SIZE = 1000
+
 
 def get_object_from_partitioned_database(model_class, partition_value, lookup_field_name, lookup_value):
     """
@@ -58,11 +74,15 @@ def delete_object_from_partitioned_database(obj, partition_value):
     obj.delete(using=db_name)
 
 
-def run_query_across_partitioned_databases(model_class, q_expression, values=None, annotate=None):
+def run_query_across_partitioned_databases(model_class, q_expression, values=None, annotate=None,
+                                           order_by=None, stream=False):
     """
     Runs a query across all partitioned databases and produces a generator
     with the results.
 
+    The results are fetched from each database a page at a time, so only a page of
+    them is held in memory for each database.
+
     :param model_class: A Django model class
 
     :param q_expression: An instance of django.db.models.Q representing the
@@ -76,27 +96,189 @@ def run_query_across_partitioned_databases(model_class, q_expression, values=Non
     :param annotate: (optional) If specified, should by a dictionary of annotated fields
     and their calculations. The dictionary will be splatted into the `.annotate` function
 
+    :param order_by: (optional) If specified, should be a list of fields to sort the results
+    by. The results from each database are merged in order, so the fields must be sorted in
+    ascending order and must identify a result uniquely. Text fields are sorted by their
+    code points (the "C" collation) so that they're in the same order as in Python.
+
+    :param stream: (optional) If True, the query is run once on each database and its results
+    are read with a server-side cursor instead of being fetched a page at a time, which
+    queries each database again for every page. Use this when the filter or sort order
+    isn't covered by an index, so that each database only filters and sorts once.
+
     :return: A generator with the results
     """
     db_names = get_db_aliases_for_partitioned_query()
 
     if values and not isinstance(values, (list, tuple)):
         raise ValueError("Expected a list or tuple")
+    if order_by and any(field.startswith('-') for field in order_by):
+        raise ValueError("Results from partitioned databases can only be merged in ascending order")
+
+    # the pages are fetched in this order
+    page_fields = list(order_by) if order_by else [model_class._meta.pk.name]
+    if values:
+        result_fields = list(values) + [field for field in page_fields if field not in values]
+        get_page_key = itemgetter(*[result_fields.index(field) for field in page_fields])
+    else:
+        get_page_key = attrgetter(*page_fields)
 
-    for db_name in db_names:
+    def get_results(db_name):
         qs = model_class.objects.using(db_name)
         if annotate:
             qs = qs.annotate(**annotate)
 
         qs = qs.filter(q_expression)
+        sort_annotations, sort_fields = _get_sort_fields(model_class, page_fields)
+        if sort_annotations:
+            qs = qs.annotate(**sort_annotations)
+        qs = qs.order_by(*sort_fields)
         if values:
-            if len(values) == 1:
-                qs = qs.values_list(*values, flat=True)
-            else:
-                qs = qs.values_list(*values)
+            qs = qs.values_list(*result_fields)
+        if stream:
+            return _iter_with_server_side_cursor(qs)
+        return _iter_in_pages(qs, sort_fields, get_page_key)
+
+    results = run_query_across_db_aliases(
+        db_names, get_results, sort_key=get_page_key if order_by else None
+    )
+    for result in results:
+        if values:
+            # leave out the fields that were only needed to fetch the pages
+            result = result[0] if len(values) == 1 else result[:len(values)]
+        yield result
+
 
-        for result in qs:
+def collate_c(field):
+    """
+    An expression for a text field with the "C" collation, which compares values by
+    their code points like Python does rather than by the database's locale.
+    """
+    return Func(F(field), template='%(expressions)s COLLATE "C"', output_field=TextField())
+
+
+def _get_sort_fields(model_class, fields):
+    """
+    :return: tuple of (annotations to add to the query,
+                       the names to sort by in place of the fields)
+    """
+    annotations = {}
+    sort_fields = []
+    for field in fields:
+        try:
+            model_field = model_class._meta.pk if field == 'pk' else model_class._meta.get_field(field)
+        except FieldDoesNotExist:
+            # an annotation
+            model_field = None
+        if isinstance(model_field, (CharField, TextField)):
+            sort_field = '{}_sort'.format(field)
+            annotations[sort_field] = collate_c(field)
+            sort_fields.append(sort_field)
+        else:
+            sort_fields.append(field)
+    return annotations, sort_fields
+
+
+def _iter_in_pages(qs, sort_fields, get_page_key, page_size=None):
+    """
+    Fetch the results of a query a page at a time. The query must be sorted by the
+    sort fields, which must identify a result uniquely.
+
+    :param get_page_key: A function that returns the values of the sort fields of a result
+    """
+    page_size = page_size or PARTITIONED_QUERY_PAGE_SIZE
+    page_qs = qs
+    while True:
+        page = list(page_qs[:page_size])
+        for result in page:
+            yield result
+        if len(page) < page_size:
+            return
+
+        last_key = get_page_key(page[-1])
+        if len(sort_fields) == 1:
+            last_key = (last_key,)
+        page_qs = qs.filter(_after_key_q(sort_fields, last_key))
+
+
+def _iter_with_server_side_cursor(qs, chunk_size=None):
+    """
+    Run a query once, reading the primary keys of its results from a server-side
+    cursor a chunk at a time, and fetch the results of each chunk by primary key.
+    """
+    chunk_size = chunk_size or PARTITIONED_QUERY_PAGE_SIZE
+    sql, params = qs.values_list('pk', flat=True).query.sql_with_params()
+    connection = db.connections[qs.db]
+    # server-side cursors only exist within a transaction
+    with transaction.atomic(using=qs.db):
+        connection.ensure_connection()
+        cursor = connection.connection.cursor(name='partitioned_query_{}'.format(uuid.uuid4().hex))
+        try:
+            cursor.execute(sql, params)
+            while True:
+                pks = [row[0] for row in cursor.fetchmany(chunk_size)]
+                if not pks:
+                    return
+                # the query is sorted, so the chunk is too
+                for result in qs.filter(pk__in=pks):
+                    yield result
+        finally:
+            cursor.close()
+
+
+def _after_key_q(fields, key):
+    # (a, b) > (x, y) is a > x OR (a = x AND b > y)
+    conditions = []
+    for i, field in enumerate(fields):
+        kwargs = dict(zip(fields[:i], key[:i]))
+        kwargs['{}__gt'.format(field)] = key[i]
+        conditions.append(Q(**kwargs))
+    return reduce(operator.or_, conditions)
+
+
+def run_query_across_db_aliases(db_aliases, get_results, sort_key=None):
+    """
+    Produces a generator with the results of a query run on each of the databases.
+
+    If settings.PARALLEL_PARTITIONED_QUERIES is True the databases are queried
+    concurrently, each in its own thread and therefore with its own connection,
+    so the query takes about as long as the slowest database instead of the sum
+    of all of them.
+
+    :param db_aliases: A list of Django database aliases
+
+    :param get_results: A function that takes a database alias and returns an
+    iterable of the results from that database e.g. a QuerySet
+
+    :param sort_key: (optional) If specified, the results from each database must be
+    sorted by this key function, and all of the results are produced in sorted order.
+    Otherwise results from different databases may be interleaved in any order.
+    """
+    if settings.PARALLEL_PARTITIONED_QUERIES and len(db_aliases) > 1:
+        return iter_concurrently(
+            [_iter_timed_results(db_alias, get_results, close_connection=True) for db_alias in db_aliases],
+            sort_key=sort_key,
+            buffer_size=PARTITIONED_QUERY_BUFFER_SIZE,
+        )
+
+    results = [_iter_timed_results(db_alias, get_results) for db_alias in db_aliases]
+    if sort_key:
+        return merge_sorted(results, sort_key)
+    return itertools.chain.from_iterable(results)
+
+
+def _iter_timed_results(db_alias, get_results, close_connection=False):
+    start = time.time()
+    try:
+        for result in get_results(db_alias):
             yield result
+    finally:
+        if close_connection:
+            # connections are per thread, so this one won't be used again
+            db.connections[db_alias].close()
+    datadog_histogram('commcare.sql.partitioned_query.duration', (time.time() - start) * 1000, tags=[
+        u'db:{}'.format(db_alias),
+    ])
 
 
 def get_db_alias_for_partitioned_doc(partition_value):
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations
+
+from corehq.sql_db.operations import RawSQLMigration
+
+migrator = RawSQLMigration(('corehq', 'sql_proxy_accessors', 'sql_templates'), {
+    'PL_PROXY_CLUSTER_NAME': settings.PL_PROXY_CLUSTER_NAME
+})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_processor', '0064_commcarecaseindexsql_referenced_closed'),
+        ('sql_proxy_accessors', '0034_livequery_sql'),
+    ]
+
+    operations = [
+        migrator.get_migration('update_case_index_referenced_closed.sql'),
+        migrator.get_migration('get_case_closed_status.sql'),
+    ]
@@ -0,0 +1,10 @@
+DROP FUNCTION IF EXISTS get_case_closed_status(TEXT, TEXT[]);
+
+CREATE FUNCTION get_case_closed_status(
+    domain_name TEXT,
+    case_ids_array TEXT[]
+) RETURNS TABLE (case_id VARCHAR(255), closed BOOLEAN) AS $$
+    CLUSTER '{{ PL_PROXY_CLUSTER_NAME }}';
+    SPLIT case_ids_array;
+    RUN ON hash_string(case_ids_array, 'siphash24');
+$$ LANGUAGE plproxy;
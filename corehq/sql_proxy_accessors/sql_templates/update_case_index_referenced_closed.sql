@@ -0,0 +1,10 @@
+DROP FUNCTION IF EXISTS update_case_index_referenced_closed(TEXT, TEXT[], BOOLEAN);
+
+CREATE FUNCTION update_case_index_referenced_closed(
+    domain_name TEXT,
+    referenced_ids TEXT[],
+    p_referenced_closed BOOLEAN
+) RETURNS SETOF INTEGER AS $$
+    CLUSTER '{{ PL_PROXY_CLUSTER_NAME }}';
+    RUN ON ALL;
+$$ LANGUAGE plproxy;
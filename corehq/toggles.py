@@ -1202,6 +1202,27 @@ PAGINATED_EXPORTS = StaticToggle(
     [NAMESPACE_DOMAIN]
 )
 
+INCREMENTAL_DAILY_SAVED_EXPORTS = StaticToggle(
+    'incremental_daily_saved_exports',
+    'Only process the documents that changed since the last rebuild of daily saved exports',
+    TAG_PRODUCT_PATH,
+    [NAMESPACE_DOMAIN]
+)
+
+SHARDED_UCR_REBUILDS = StaticToggle(
+    'sharded_ucr_rebuilds',
+    'Rebuild UCR data sources with a parallel task for each range of doc ids',
+    TAG_PRODUCT_PATH,
+    [NAMESPACE_DOMAIN]
+)
+
+PARALLEL_EXPORT_SCROLL = StaticToggle(
+    'parallel_export_scroll',
+    'Fetch the documents for exports with a concurrent scroll for each ES shard',
+    TAG_PRODUCT_PATH,
+    [NAMESPACE_DOMAIN]
+)
+
 LOGIN_AS_ALWAYS_OFF = StaticToggle(
     'always_turn_login_as_off',
     'Always turn login as off',
@@ -1259,3 +1280,39 @@ DISPLAY_CONDITION_ON_TABS = StaticToggle(
     TAG_ONE_OFF,
     [NAMESPACE_DOMAIN]
 )
+
+BATCHED_REPEAT_RECORDS = StaticToggle(
+    'batched_repeat_records',
+    'Send repeat records in batches per repeater, reusing connections to the repeater URL',
+    TAG_PRODUCT_PATH,
+    [NAMESPACE_DOMAIN]
+)
+
+UCR_BATCH_LOOKUPS = StaticToggle(
+    'ucr_batch_lookups',
+    'UCR: Fetch the related documents looked up by data sources in bulk for each batch of documents',
+    TAG_PRODUCT_PATH,
+    [NAMESPACE_DOMAIN]
+)
+
+PARALLEL_RESTORE_PROVIDERS = StaticToggle(
+    'parallel_restore_providers',
+    'Generate the fixtures and the case payload of restores concurrently',
+    TAG_PRODUCT_PATH,
+    [NAMESPACE_DOMAIN]
+)
+
+CACHED_RESTORE_CASE_XML = StaticToggle(
+    'cached_restore_case_xml',
+    'Reuse the XML generated for unchanged cases by earlier restores',
+    TAG_PRODUCT_PATH,
+    [NAMESPACE_DOMAIN]
+)
+
+MOBILE_UCR_CACHE_ROWS = StaticToggle(
+    'mobile_ucr_cache_rows',
+    'Mobile UCR: Share the rows of mobile reports between users with the same filter values '
+    'until the data source changes',
+    TAG_PRODUCT_PATH,
+    [NAMESPACE_DOMAIN]
+)
@@ -0,0 +1,93 @@
+import heapq
+import itertools
+import sys
+import threading
+from Queue import Queue, Full
+
+import six
+
+
+def iter_concurrently(iterables, ordered=False, sort_key=None, buffer_size=1000):
+    """
+    Consume each of the iterables in its own thread and yield all of their items.
+
+    Each iterable is iterated entirely within its thread (including closing it if
+    it's a generator), so it's safe to use thread local resources such as Django
+    database connections in it. Exceptions raised by an iterable are re-raised
+    by the returned iterator.
+
+    :param ordered: If True, yield all the items of the first iterable before the
+                    items of the next one and so on. Otherwise items are yielded
+                    as soon as they're available.
+    :param sort_key: If given, the items of each iterable must be sorted by this key,
+                     and the items of all of them are yielded in sorted order.
+    :param buffer_size: The maximum number of items to hold in memory for each iterable
+    """
+    stopped = threading.Event()
+    end_of_items = object()
+    if ordered or sort_key:
+        queues = [Queue(maxsize=buffer_size) for iterable in iterables]
+    else:
+        queues = [Queue(maxsize=buffer_size * len(iterables))] * len(iterables)
+
+    def put(queue, item):
+        while not stopped.is_set():
+            try:
+                queue.put(item, timeout=1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def consume(iterable, queue):
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(queue, (item, None)):
+                    return
+        except Exception:
+            put(queue, (None, sys.exc_info()))
+        else:
+            put(queue, (end_of_items, None))
+        finally:
+            if hasattr(iterator, 'close'):
+                iterator.close()
+
+    for iterable, queue in zip(iterables, queues):
+        thread = threading.Thread(target=consume, args=(iterable, queue))
+        thread.daemon = True
+        thread.start()
+
+    def iter_queue(queue):
+        while True:
+            item, exc_info = queue.get()
+            if exc_info:
+                six.reraise(*exc_info)
+            if item is end_of_items:
+                return
+            yield item
+
+    # when the items aren't ordered all the queues are the same queue,
+    # so this reads it until every iterable is done
+    items = itertools.chain.from_iterable(iter_queue(queue) for queue in queues)
+    if sort_key:
+        items = merge_sorted([iter_queue(queue) for queue in queues], sort_key)
+    try:
+        for item in items:
+            yield item
+    finally:
+        stopped.set()
+
+
+def merge_sorted(iterables, key):
+    """
+    Merge iterables that are each sorted by ``key`` into a single sorted iterator
+    """
+    def decorate(index, iterable):
+        # the indexes break ties so that the items themselves are never compared
+        for position, item in enumerate(iterable):
+            yield key(item), index, position, item
+
+    decorated = [decorate(index, iterable) for index, iterable in enumerate(iterables)]
+    for _, _, _, item in heapq.merge(*decorated):
+        yield item
@@ -22,7 +22,7 @@ def drop_connected_signals(signal):
 @contextmanager
 def notify_someone(email, success_message, error_message='Sorry, your HQ task failed!', send=True):
     def send_message_if_needed(message, exception=None):
-        if email and send:
+        if email and send and message:
             soft_assert(to=email, notify_admins=False, send_to_ops=False)(False, message, exception)
     try:
         yield
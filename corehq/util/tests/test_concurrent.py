@@ -0,0 +1,58 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from corehq.util.concurrent import iter_concurrently, merge_sorted
+
+
+def _items(name, count, error=None):
+    for i in range(count):
+        yield name, i
+    if error:
+        raise error
+
+
+class IterConcurrentlyTest(SimpleTestCase):
+
+    def test_ordered(self):
+        items = iter_concurrently([_items('a', 3), _items('b', 0), _items('c', 2)], ordered=True, buffer_size=1)
+        self.assertEqual(list(items), [('a', 0), ('a', 1), ('a', 2), ('c', 0), ('c', 1)])
+
+    def test_unordered(self):
+        items = iter_concurrently([_items('a', 3), _items('b', 0), _items('c', 2)], buffer_size=1)
+        self.assertEqual(sorted(items), [('a', 0), ('a', 1), ('a', 2), ('c', 0), ('c', 1)])
+
+    def test_sort_key(self):
+        items = iter_concurrently([[1, 4, 7], [2, 3, 9], [], [5, 6, 8]], sort_key=lambda item: item, buffer_size=1)
+        self.assertEqual(list(items), [1, 2, 3, 4, 5, 6, 7, 8, 9])
+
+    def test_error(self):
+        items = iter_concurrently([_items('a', 3), _items('b', 2, error=ValueError('b'))], ordered=True)
+        with self.assertRaises(ValueError):
+            list(items)
+
+    def test_iterables_are_closed_in_their_thread(self):
+        closed_in = []
+
+        def items():
+            try:
+                for i in range(100):
+                    yield i
+            finally:
+                closed_in.append(threading.current_thread())
+
+        results = iter_concurrently([items()], buffer_size=1)
+        self.assertEqual(next(results), 0)
+        results.close()
+        for thread in threading.enumerate():
+            if thread is not threading.current_thread() and thread.daemon:
+                thread.join(5)
+        self.assertEqual(len(closed_in), 1)
+        self.assertIsNot(closed_in[0], threading.current_thread())
+
+
+class MergeSortedTest(SimpleTestCase):
+
+    def test_merge_sorted(self):
+        merged = merge_sorted([[('a', 1), ('c', 2)], [('b', 3)], [('a', 4), ('d', 5)]], key=lambda item: item[0])
+        self.assertEqual(list(merged), [('a', 1), ('a', 4), ('b', 3), ('c', 2), ('d', 5)])
@@ -17,6 +17,8 @@ class NestableTimer(object):
     def init(self, root, parent):
         self.root = root
         self.parent = parent
+        for sub in self.subs:
+            sub.init(root, self)
 
     def start(self):
         self.beginning = time.time()
@@ -106,6 +108,12 @@ class TimingContext(object):
         timer = self.stack.pop()
         timer.stop()
 
+    def append(self, timing_context):
+        """Add the timings of another context under the current timer. This
+        is useful for timing work done in other threads, since a context
+        can only be used by one thread at a time."""
+        self.peek().append(timing_context.root)
+
     def to_dict(self):
         """Get timing data as a recursive dictionary of the format:
         {
@@ -0,0 +1,131 @@
+'''
+Commits a batch of warehouse tables, loading the tables that don't depend
+on each other concurrently.
+'''
+import logging
+import sys
+import threading
+import time
+import uuid
+from Queue import Queue
+
+from django.db import connections
+
+from corehq.warehouse.const import ALL_TABLES, MAX_CONCURRENT_LOADS
+from corehq.warehouse.models import TableState, get_cls_by_slug
+from corehq.warehouse.states import (
+    FACT_TABLE_NEEDS_UPDATING,
+    FACT_TABLE_READY,
+    FACT_TABLE_FAILED,
+    FACT_TABLE_DECOMMISSIONED,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_dependency_graph(slugs):
+    '''
+    Returns a dict of each table's slug to the slugs of the tables it depends on.
+    Dependencies on tables that aren't in slugs are left out, since they aren't
+    part of the batch.
+    '''
+    slugs = set(slugs)
+    return {
+        slug: set(get_cls_by_slug(slug).dependencies()) & slugs
+        for slug in slugs
+    }
+
+
+def commit_tables(start_datetime, end_datetime, slugs=ALL_TABLES, max_concurrent_loads=MAX_CONCURRENT_LOADS):
+    '''
+    Commits the tables for the time range. Each table is loaded in its own thread,
+    and so on its own database connections, as soon as all of the tables it depends
+    on have been committed. A table isn't loaded if any of them failed.
+
+    The state, batch id and duration of each table's load are saved in its TableState.
+
+    :returns: A dict of each table's slug to its TableState. The tables that weren't
+              loaded because they're decommissioned or a dependency failed
+              aren't included.
+    '''
+    batch_id = uuid.uuid4().hex
+    dependencies = get_dependency_graph(slugs)
+    table_states = {slug: _get_table_state(slug) for slug in dependencies}
+    committed = set()
+    for slug, table_state in table_states.items():
+        if table_state.state == FACT_TABLE_DECOMMISSIONED:
+            logger.info('Not loading %s because it is decommissioned', slug)
+            committed.add(slug)
+            del table_states[slug]
+    pending = set(table_states)
+    running = set()
+    results = Queue()
+
+    while pending or running:
+        for slug in sorted(pending):
+            if len(running) >= max_concurrent_loads:
+                break
+            if dependencies[slug] <= committed:
+                pending.remove(slug)
+                running.add(slug)
+                thread = threading.Thread(
+                    target=_commit_table,
+                    args=(slug, start_datetime, end_datetime, results),
+                )
+                thread.daemon = True
+                thread.start()
+
+        if not running:
+            raise ValueError('The dependencies of {} have a cycle'.format(', '.join(sorted(pending))))
+
+        slug, duration, exc_info = results.get()
+        running.remove(slug)
+        table_state = table_states[slug]
+        if exc_info:
+            logger.error('Loading %s failed', slug, exc_info=exc_info)
+            table_state.fail()
+            for dependent in _get_dependents(slug, dependencies) & pending:
+                logger.warning('Not loading %s because %s failed', dependent, slug)
+                pending.remove(dependent)
+                del table_states[dependent]
+        else:
+            _set_committed(table_state)
+            committed.add(slug)
+        table_state.last_batch_id = batch_id
+        table_state.last_duration = duration
+        table_state.save()
+
+    return table_states
+
+
+def _get_dependents(slug, dependencies):
+    dependents = {dependent for dependent, slugs in dependencies.items() if slug in slugs}
+    for dependent in list(dependents):
+        dependents |= _get_dependents(dependent, dependencies)
+    return dependents
+
+
+def _get_table_state(slug):
+    table_state, _ = TableState.objects.get_or_create(slug=slug)
+    return table_state
+
+
+def _commit_table(slug, start_datetime, end_datetime, results):
+    start = time.time()
+    exc_info = None
+    try:
+        get_cls_by_slug(slug).commit(start_datetime, end_datetime)
+    except Exception:
+        exc_info = sys.exc_info()
+    finally:
+        connections.close_all()
+    results.put((slug, time.time() - start, exc_info))
+
+
+def _set_committed(table_state):
+    # a commit both dumps the table's batch and processes it
+    if table_state.state == FACT_TABLE_READY:
+        table_state.queue()
+    if table_state.state in (FACT_TABLE_NEEDS_UPDATING, FACT_TABLE_FAILED):
+        table_state.dump_to_intermediate_table()
+    table_state.process_intermediate_table()
@@ -1,4 +1,8 @@
-DJANGO_MAX_BATCH_SIZE = 1000
+# The number of records copied into a staging table in each transaction
+COPY_CHUNK_SIZE = 10000
+
+# The number of tables that are loaded at the same time by a batch
+MAX_CONCURRENT_LOADS = 4
 
 # Slugs
 
@@ -86,12 +86,14 @@ def get_synclog_ids_by_date(start_datetime, end_datetime):
         yield result['id']
 
 
-def get_forms_by_last_modified(start_datetime, end_datetime):
+def get_forms_by_last_modified(start_datetime, end_datetime, after_form_id=None):
     '''
-    Returns all form ids that have been modified within a time range. The start date is
-    exclusive while the end date is inclusive (start_datetime, end_datetime].
+    Returns all forms that have been modified within a time range, ordered by form_id.
+    The start date is exclusive while the end date is inclusive (start_datetime, end_datetime].
+
+    :param after_form_id: Only return the forms with IDs after this one
     '''
-    for form in FormAccessorSQL.iter_forms_by_last_modified(start_datetime, end_datetime):
+    for form in FormAccessorSQL.iter_forms_by_last_modified(start_datetime, end_datetime, after_form_id):
         yield form
 
     # TODO Couch forms
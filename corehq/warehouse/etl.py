@@ -6,9 +6,11 @@ import os
 
 from django.db import connections
 from django.conf import settings
+from django.db.models import Max
 from django.template import Context, engines
 
-from corehq.warehouse.utils import django_batch_records
+from corehq.sql_db.util import collate_c
+from corehq.warehouse.utils import copy_records
 from corehq.sql_db.routers import db_for_read_write
 
 
@@ -90,6 +92,9 @@ class CouchToDjangoETLMixin(BaseETLMixin):
     Mixin for transferring docs from Couch to a Django model.
     '''
 
+    # The field of the table with the ID of each record
+    record_id_field = None
+
     @classmethod
     def field_mapping(cls):
         # Map source model fields to staging table fields
@@ -97,17 +102,34 @@ class CouchToDjangoETLMixin(BaseETLMixin):
         raise NotImplementedError
 
     @classmethod
-    def record_iter(cls, start_datetime, end_datetime):
+    def record_iter(cls, start_datetime, end_datetime, after_id=None):
+        '''
+        Returns the records to load, ordered by the code points of their IDs (the
+        "C" collation) so that an interrupted load can be resumed.
+
+        :param after_id: Only return the records with IDs after this one
+        '''
         raise NotImplementedError
 
     @classmethod
-    def load(cls, start_datetime, end_datetime):
+    def load(cls, start_datetime, end_datetime, resume=False):
+        '''
+        :param resume: Continue a load of the same time range that was interrupted,
+                       after the last record it committed.
+        '''
         from corehq.warehouse.models.shared import WarehouseTable
 
         assert issubclass(cls, WarehouseTable)
-        record_iter = cls.record_iter(start_datetime, end_datetime)
+        after_id = cls.get_last_record_id() if resume else None
+        record_iter = cls.record_iter(start_datetime, end_datetime, after_id=after_id)
 
-        django_batch_records(cls, record_iter, cls.field_mapping())
+        copy_records(cls, record_iter, cls.field_mapping())
+
+    @classmethod
+    def get_last_record_id(cls):
+        return cls.objects.aggregate(
+            last_id=Max(collate_c(cls.record_id_field))
+        )['last_id']
 
 
 def _render_template(path, context):
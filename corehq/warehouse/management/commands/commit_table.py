@@ -1,6 +1,7 @@
 from django.core.management import BaseCommand, CommandError
 from dimagi.utils.parsing import string_to_utc_datetime
 from corehq.warehouse.const import ALL_TABLES
+from corehq.warehouse.etl import CouchToDjangoETLMixin
 from corehq.warehouse.models import get_cls_by_slug
 
 
@@ -38,6 +39,12 @@ class Command(BaseCommand):
             help='Specifies the last modified datetime at which records should stop being included',
             type=_valid_date
         )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            default=False,
+            help='Continue an interrupted load of a staging table after the records it already committed',
+        )
 
     def handle(self, slug, **options):
         start = options.get('start')
@@ -47,7 +54,13 @@ class Command(BaseCommand):
             model = get_cls_by_slug(slug)
         except KeyError:
             raise CommandError('{} is not a valid slug. \n\n {}'.format(slug, USAGE))
-        model.commit(start, end)
+
+        if options.get('resume'):
+            if not issubclass(model, CouchToDjangoETLMixin):
+                raise CommandError('{} can not be resumed'.format(slug))
+            model.load(start, end, resume=True)
+        else:
+            model.commit(start, end)
 
 
 def _valid_date(date_str):
@@ -0,0 +1,68 @@
+from __future__ import print_function
+from django.core.management import BaseCommand, CommandError
+from corehq.warehouse.batch import commit_tables
+from corehq.warehouse.const import ALL_TABLES, MAX_CONCURRENT_LOADS
+from corehq.warehouse.management.commands.commit_table import _valid_date
+
+
+USAGE = """Usage: ./manage.py commit_tables [<slug> ...] -s <start_datetime> -e <end_datetime>
+
+Commits all of the tables if no slugs are given.
+
+Slugs:
+
+{}
+
+""".format('\n'.join(sorted(ALL_TABLES)))
+
+
+class Command(BaseCommand):
+    """
+    Example: ./manage.py commit_tables group_staging group_dim -s 2017-05-01 -e 2017-06-01
+    """
+    help = USAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*')
+
+        parser.add_argument(
+            '-s',
+            '--start_datetime',
+            dest='start',
+            required=True,
+            help='Specifies the last modified datetime at which records should start being included',
+            type=_valid_date
+        )
+        parser.add_argument(
+            '-e',
+            '--end_datetime',
+            dest='end',
+            required=True,
+            help='Specifies the last modified datetime at which records should stop being included',
+            type=_valid_date
+        )
+        parser.add_argument(
+            '--max-concurrent-loads',
+            dest='max_concurrent_loads',
+            default=MAX_CONCURRENT_LOADS,
+            type=int,
+            help='The number of tables to load at the same time',
+        )
+
+    def handle(self, slugs, **options):
+        invalid_slugs = set(slugs) - set(ALL_TABLES)
+        if invalid_slugs:
+            raise CommandError('{} are not valid slugs. \n\n {}'.format(', '.join(invalid_slugs), USAGE))
+
+        table_states = commit_tables(
+            options['start'],
+            options['end'],
+            slugs=slugs or ALL_TABLES,
+            max_concurrent_loads=options['max_concurrent_loads'],
+        )
+        for slug in sorted(set(slugs or ALL_TABLES)):
+            if slug in table_states:
+                table_state = table_states[slug]
+                print('{}: {} in {:.1f}s'.format(slug, table_state.state, table_state.last_duration))
+            else:
+                print('{}: not loaded'.format(slug))
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.7 on 2017-07-12 14:21
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0007_no_default_for_deleted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tablestate',
+            name='last_duration',
+            field=models.FloatField(null=True),
+        ),
+    ]
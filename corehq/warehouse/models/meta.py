@@ -16,6 +16,8 @@ class TableState(models.Model):
     state = FSMField(default=FACT_TABLE_NEEDS_UPDATING, db_index=True)
     last_modified = models.DateTimeField(auto_now=True)
     last_batch_id = models.CharField(max_length=255)
+    # how long the last batch took to load, in seconds
+    last_duration = models.FloatField(null=True)
 
     @transition(
         field=state,
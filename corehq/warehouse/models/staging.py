@@ -121,6 +121,7 @@ class GroupStagingTable(StagingTable, CouchToDjangoETLMixin):
     Grain: group_id
     '''
     slug = GROUP_STAGING_SLUG
+    record_id_field = 'group_id'
 
     group_id = models.CharField(max_length=255)
     name = models.CharField(max_length=255)
@@ -153,10 +154,10 @@ class GroupStagingTable(StagingTable, CouchToDjangoETLMixin):
         return []
 
     @classmethod
-    def record_iter(cls, start_datetime, end_datetime):
+    def record_iter(cls, start_datetime, end_datetime, after_id=None):
         group_ids = get_group_ids_by_last_modified(start_datetime, end_datetime)
 
-        return iter_docs(Group.get_db(), group_ids)
+        return _iter_docs_in_order(Group.get_db(), group_ids, after_id)
 
 
 class UserStagingTable(StagingTable, CouchToDjangoETLMixin):
@@ -166,6 +167,7 @@ class UserStagingTable(StagingTable, CouchToDjangoETLMixin):
     Grain: user_id
     '''
     slug = USER_STAGING_SLUG
+    record_id_field = 'user_id'
 
     user_id = models.CharField(max_length=255)
     username = models.CharField(max_length=150)
@@ -209,10 +211,10 @@ class UserStagingTable(StagingTable, CouchToDjangoETLMixin):
         ]
 
     @classmethod
-    def record_iter(cls, start_datetime, end_datetime):
+    def record_iter(cls, start_datetime, end_datetime, after_id=None):
         user_ids = get_user_ids_by_last_modified(start_datetime, end_datetime)
 
-        return iter_docs(CouchUser.get_db(), user_ids)
+        return _iter_docs_in_order(CouchUser.get_db(), user_ids, after_id)
 
 
 class DomainStagingTable(StagingTable, CouchToDjangoETLMixin):
@@ -222,6 +224,7 @@ class DomainStagingTable(StagingTable, CouchToDjangoETLMixin):
     Grain: domain_id
     '''
     slug = DOMAIN_STAGING_SLUG
+    record_id_field = 'domain_id'
 
     domain_id = models.CharField(max_length=255)
     domain = models.CharField(max_length=100)
@@ -270,10 +273,10 @@ class DomainStagingTable(StagingTable, CouchToDjangoETLMixin):
         ]
 
     @classmethod
-    def record_iter(cls, start_datetime, end_datetime):
+    def record_iter(cls, start_datetime, end_datetime, after_id=None):
         domain_ids = get_domain_ids_by_last_modified(start_datetime, end_datetime)
 
-        return iter_docs(Domain.get_db(), domain_ids)
+        return _iter_docs_in_order(Domain.get_db(), domain_ids, after_id)
 
 
 class FormStagingTable(StagingTable, CouchToDjangoETLMixin):
@@ -283,6 +286,7 @@ class FormStagingTable(StagingTable, CouchToDjangoETLMixin):
     Grain: form_id
     '''
     slug = FORM_STAGING_SLUG
+    record_id_field = 'form_id'
 
     form_id = models.CharField(max_length=255, unique=True)
 
@@ -323,8 +327,8 @@ class FormStagingTable(StagingTable, CouchToDjangoETLMixin):
         ]
 
     @classmethod
-    def record_iter(cls, start_datetime, end_datetime):
-        return get_forms_by_last_modified(start_datetime, end_datetime)
+    def record_iter(cls, start_datetime, end_datetime, after_id=None):
+        return get_forms_by_last_modified(start_datetime, end_datetime, after_form_id=after_id)
 
 
 class SyncLogStagingTable(StagingTable, CouchToDjangoETLMixin):
@@ -334,6 +338,7 @@ class SyncLogStagingTable(StagingTable, CouchToDjangoETLMixin):
     Grain: sync_log_id
     '''
     slug = SYNCLOG_STAGING_SLUG
+    record_id_field = 'sync_log_id'
 
     sync_log_id = models.CharField(max_length=255)
     sync_date = models.DateTimeField(null=True)
@@ -363,6 +368,13 @@ class SyncLogStagingTable(StagingTable, CouchToDjangoETLMixin):
         ]
 
     @classmethod
-    def record_iter(cls, start_datetime, end_datetime):
+    def record_iter(cls, start_datetime, end_datetime, after_id=None):
         synclog_ids = get_synclog_ids_by_date(start_datetime, end_datetime)
-        return iter_docs(SyncLog.get_db(), synclog_ids)
+        return _iter_docs_in_order(SyncLog.get_db(), synclog_ids, after_id)
+
+
+def _iter_docs_in_order(db, doc_ids, after_id=None):
+    doc_ids = sorted(doc_ids)
+    if after_id:
+        doc_ids = [doc_id for doc_id in doc_ids if doc_id > after_id]
+    return iter_docs(db, doc_ids)
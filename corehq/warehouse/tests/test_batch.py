@@ -0,0 +1,103 @@
+import threading
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from mock import patch
+
+from corehq.warehouse.batch import commit_tables
+from corehq.warehouse.models import TableState
+from corehq.warehouse.states import FACT_TABLE_READY, FACT_TABLE_FAILED, FACT_TABLE_DECOMMISSIONED
+
+
+class FakeTable(object):
+
+    def __init__(self, slug, dependencies, log, error=None, wait_for=None):
+        self.slug = slug
+        self._dependencies = dependencies
+        self.log = log
+        self.error = error
+        self.wait_for = wait_for
+        self.started = threading.Event()
+
+    def dependencies(self):
+        return self._dependencies
+
+    def commit(self, start_datetime, end_datetime):
+        self.log.append(('start', self.slug))
+        self.started.set()
+        if self.wait_for:
+            # only returns in time if the other table is loaded at the same time
+            self.wait_for.started.wait(5)
+            self.log.append(('concurrent', self.wait_for.started.is_set()))
+        if self.error:
+            raise self.error
+        self.log.append(('end', self.slug))
+
+
+class CommitTablesTest(TestCase):
+
+    def setUp(self):
+        self.start = datetime.utcnow() - timedelta(days=1)
+        self.end = datetime.utcnow()
+        self.log = []
+
+    def _commit_tables(self, tables, **kwargs):
+        tables_by_slug = {table.slug: table for table in tables}
+        with patch('corehq.warehouse.batch.get_cls_by_slug', side_effect=tables_by_slug.__getitem__):
+            return commit_tables(self.start, self.end, slugs=list(tables_by_slug), **kwargs)
+
+    def test_dependencies_are_committed_first(self):
+        user_staging = FakeTable('user_staging', [], self.log)
+        domain_staging = FakeTable('domain_staging', [], self.log, wait_for=user_staging)
+        user_dim = FakeTable('user_dim', ['user_staging'], self.log)
+        domain_dim = FakeTable('domain_dim', ['domain_staging'], self.log)
+        form_fact = FakeTable('form_fact', ['user_dim', 'domain_dim'], self.log)
+
+        table_states = self._commit_tables([user_staging, domain_staging, user_dim, domain_dim, form_fact])
+
+        self.assertIn(('concurrent', True), self.log)
+        for dependency, dependent in [
+            ('user_staging', 'user_dim'),
+            ('domain_staging', 'domain_dim'),
+            ('user_dim', 'form_fact'),
+            ('domain_dim', 'form_fact'),
+        ]:
+            self.assertLess(self.log.index(('end', dependency)), self.log.index(('start', dependent)))
+
+        self.assertEqual(len(table_states), 5)
+        batch_ids = {table_state.last_batch_id for table_state in table_states.values()}
+        self.assertEqual(len(batch_ids), 1)
+        for table_state in TableState.objects.all():
+            self.assertEqual(table_state.state, FACT_TABLE_READY)
+            self.assertIsNotNone(table_state.last_duration)
+
+    def test_dependents_of_failed_tables_are_not_loaded(self):
+        user_staging = FakeTable('user_staging', [], self.log, error=Exception('failed'))
+        domain_staging = FakeTable('domain_staging', [], self.log)
+        user_dim = FakeTable('user_dim', ['user_staging'], self.log)
+        form_fact = FakeTable('form_fact', ['user_dim', 'domain_staging'], self.log)
+
+        table_states = self._commit_tables([user_staging, domain_staging, user_dim, form_fact])
+
+        self.assertEqual(set(table_states), {'user_staging', 'domain_staging'})
+        self.assertEqual(table_states['user_staging'].state, FACT_TABLE_FAILED)
+        self.assertEqual(table_states['domain_staging'].state, FACT_TABLE_READY)
+        self.assertNotIn(('start', 'user_dim'), self.log)
+        self.assertNotIn(('start', 'form_fact'), self.log)
+
+    def test_decommissioned_tables_are_not_loaded(self):
+        TableState.objects.create(slug='user_staging', state=FACT_TABLE_DECOMMISSIONED)
+        user_staging = FakeTable('user_staging', [], self.log)
+        user_dim = FakeTable('user_dim', ['user_staging'], self.log)
+
+        table_states = self._commit_tables([user_staging, user_dim], max_concurrent_loads=1)
+
+        self.assertEqual(set(table_states), {'user_dim'})
+        self.assertEqual(self.log, [('start', 'user_dim'), ('end', 'user_dim')])
+
+    def test_dependency_cycle(self):
+        user_dim = FakeTable('user_dim', ['group_dim'], self.log)
+        group_dim = FakeTable('group_dim', ['user_dim'], self.log)
+
+        with self.assertRaises(ValueError):
+            self._commit_tables([user_dim, group_dim])
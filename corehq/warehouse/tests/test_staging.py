@@ -70,21 +70,40 @@ class TestGroupStagingTable(BaseStagingTableTest, StagingRecordsTestsMixin):
         delete_all_docs_by_doc_type(Group.get_db(), ['Group', 'Group-Deleted'])
         super(TestGroupStagingTable, cls).setUpClass()
 
-    def test_stage_records_bulk(self):
+    def test_stage_records_in_chunks(self):
         start = datetime.utcnow() - timedelta(days=3)
         end = datetime.utcnow() + timedelta(days=3)
 
-        # 1 Query for clearing records
-        # 1 Query for inserting recorrds
-        with self.assertNumQueries(2):
+        with patch('corehq.warehouse.utils.COPY_CHUNK_SIZE', 2):
             GroupStagingTable.commit(start, end)
+        self.assertEqual(GroupStagingTable.objects.count(), 3)
+        self.assertEqual(
+            sorted(GroupStagingTable.objects.values_list('name', flat=True)),
+            ['one', 'three', 'two'],
+        )
+
+    def test_resume_stage_records(self):
+        start = datetime.utcnow() - timedelta(days=3)
+        end = datetime.utcnow() + timedelta(days=3)
+        record_iter = GroupStagingTable.record_iter
 
-        # 1 Query for clearing records
-        # 2 Queries for inserting recorrds
-        with self.assertNumQueries(3):
-            with patch('corehq.warehouse.utils.DJANGO_MAX_BATCH_SIZE', 2):
+        def interrupted_record_iter(start_datetime, end_datetime, after_id=None):
+            for index, record in enumerate(record_iter(start_datetime, end_datetime, after_id)):
+                if index == 2:
+                    raise Exception('interrupted')
+                yield record
+
+        with patch('corehq.warehouse.utils.COPY_CHUNK_SIZE', 2), \
+                patch.object(GroupStagingTable, 'record_iter', side_effect=interrupted_record_iter):
+            with self.assertRaises(Exception):
                 GroupStagingTable.commit(start, end)
-        self.assertEqual(GroupStagingTable.objects.count(), 3)
+        self.assertEqual(GroupStagingTable.objects.count(), 2)
+
+        GroupStagingTable.load(start, end, resume=True)
+        self.assertEqual(
+            sorted(GroupStagingTable.objects.values_list('group_id', flat=True)),
+            sorted(group._id for group in self.records),
+        )
 
 
 class TestDomainStagingTable(BaseStagingTableTest, StagingRecordsTestsMixin):
@@ -639,6 +639,17 @@ SMS_QUEUE_DOMAIN_RESTRICTED_RETRY_INTERVAL = 15
 # messages will not be processed.
 SMS_QUEUE_STALE_MESSAGE_DURATION = 7 * 24
 
+# Setting this to True will make the queue claim and send outgoing SMS in
+# batches per backend rather than processing each one in its own celery task.
+SMS_QUEUE_USE_BATCHES = False
+
+# The max number of outgoing SMS claimed by each batch processing task
+SMS_QUEUE_BATCH_SIZE = 500
+
+# Number of minutes to wait before enqueuing the batch processing tasks for
+# the same backend again.
+SMS_QUEUE_BATCH_ENQUEUING_INTERVAL = 1
+
 
 ####### Reminders Queue Settings #######
 
@@ -832,6 +843,9 @@ PL_PROXY_CLUSTER_NAME = 'commcarehq'
 
 USE_PARTITIONED_DATABASE = False
 
+# query all the partitioned databases at the same time for cross-shard queries
+PARALLEL_PARTITIONED_QUERIES = False
+
 # number of days since last access after which a saved export is considered unused
 SAVED_EXPORT_ACCESS_CUTOFF = 35
 
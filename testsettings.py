@@ -74,6 +74,9 @@ ENABLE_PRELOGIN_SITE = True
 # override dev_settings
 CACHE_REPORTS = True
 
+# queries run in other threads can't see the data created in a test's transaction
+PARALLEL_PARTITIONED_QUERIES = False
+
 
 def _set_logging_levels(levels):
     import logging